@@ -2,25 +2,2649 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry, Calendar
 import json
+import gzip
 import csv
 from datetime import datetime, timedelta
 import os
+import sys
 import math
+import queue
+import shlex
+import re
+import bisect
+import heapq
+import fnmatch
+import argparse
+import threading
+import multiprocessing
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict, deque
+from operator import itemgetter
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class TaskApiRequestHandler(BaseHTTPRequestHandler):
+    """JSON-RPC 2.0 over HTTP POST for the local task API"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; avoid the Nagle/delayed-ACK stall
+    disable_nagle_algorithm = True
+    # Largest request body read; anything bigger is refused before reading it
+    max_body = 4 * 1024 * 1024
+
+    def do_POST(self):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            refused = 411, "Content-Length required"
+        elif not length.strip().isdecimal():
+            refused = 400, "Invalid Content-Length"
+        elif int(length) > self.max_body:
+            refused = 413, "Request too large"
+        else:
+            self.reply(*self.server.api.handle_payload(self.rfile.read(int(length))))
+            return
+        self.reply(refused[0], json.dumps(TaskApiServer.error(None, -32600, refused[1])).encode(), close=True)
+
+    def reply(self, status, payload, close=False):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if close:
+            # A refused body is never read and would be taken for the next request
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Hundreds of requests per second would flood stderr
+        pass
+
+
+class TaskApiServer:
+    """Local JSON-RPC server; every call is executed on the Tk thread via a queue.
+    
+    Enqueueing a job wakes the Tk thread with a virtual event, so nothing runs while
+    the API is idle and a client is not held back by a polling interval.
+    """
+
+    def __init__(self, app, port, host='127.0.0.1', timeout=10):
+        self.app = app
+        self.timeout = timeout
+        self.httpd = ThreadingHTTPServer((host, port), TaskApiRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def handle_payload(self, body):
+        """Parse a single or batched request and wait for the GUI thread to run it"""
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            return 200, json.dumps(self.error(None, -32700, "Parse error")).encode()
+
+        batch = isinstance(data, list)
+        calls = data if batch else [data]
+        if not calls:
+            return 200, json.dumps(self.error(None, -32600, "Invalid Request")).encode()
+
+        job = {'calls': calls, 'results': None, 'done': threading.Event()}
+        self.app.api_queue.put(job)
+        try:
+            self.app.root.event_generate('<<ApiCall>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            # The window is closing; the job times out below
+            pass
+        if not job['done'].wait(self.timeout):
+            responses = [self.error(c['id'], -32603, "Timed out") if isinstance(c, dict) and 'id' in c
+                         else None for c in calls]
+        else:
+            responses = job['results']
+
+        # Notifications (no id) get no response entry
+        responses = [r for r in responses if r is not None]
+        if not responses:
+            return 204, b''
+        return 200, json.dumps(responses if batch else responses[0]).encode()
+
+    @staticmethod
+    def error(req_id, code, message):
+        return {'jsonrpc': '2.0', 'id': req_id, 'error': {'code': code, 'message': message}}
+
+
+def priority_rank(priority):
+    """Sort rank for a priority label: Blue > Green > Red"""
+    if 'Blue' in priority:
+        return 0
+    if 'Green' in priority:
+        return 1
+    return 2
+
+
+class TaskIndex:
+    """Status, priority, project, date and parent indexes over the task store"""
+
+    def __init__(self, projects, tasks, version):
+        self.version = version
+        self.by_status = defaultdict(set)
+        self.by_priority = defaultdict(set)
+        self.by_project = {}
+        self.parents = set()
+        starts, ends = [], []
+        
+        for pid in projects:
+            project_tasks = tasks.get(pid, {})
+            self.by_project[pid] = keys = set()
+            for tid, task in project_tasks.items():
+                key = (pid, tid)
+                keys.add(key)
+                self.by_status[task['status'].lower()].add(key)
+                self.by_priority[priority_rank(task['priority'])].add(key)
+                starts.append((task['start_date'], key))
+                ends.append((task['end_date'], key))
+                if task.get('parent'):
+                    self.parents.add((pid, task['parent']))
+        
+        starts.sort()
+        ends.sort()
+        self.start_dates = [d for d, _ in starts]
+        self.start_keys = [k for _, k in starts]
+        self.end_dates = [d for d, _ in ends]
+        self.end_keys = [k for _, k in ends]
+
+    def all_keys(self):
+        keys = set()
+        for project_keys in self.by_project.values():
+            keys |= project_keys
+        return keys
+
+    def date_range(self, field, op, value):
+        """Keys whose start/end date satisfies `op value`, via bisect on the sorted dates"""
+        dates, keys = (self.start_dates, self.start_keys) if field == 'start' else (self.end_dates, self.end_keys)
+        lo, hi = bisect.bisect_left(dates, value), bisect.bisect_right(dates, value)
+        if op == '<':
+            return set(keys[:lo])
+        if op == '<=':
+            return set(keys[:hi])
+        if op == '>':
+            return set(keys[hi:])
+        if op == '>=':
+            return set(keys[lo:])
+        return set(keys[lo:hi])
+
+
+PRIORITIES = ("Most Important (Blue)", "Important (Green)", "Average (Red)")
+
+
+def validate_task_fields(task):
+    """Raise ValueError for a priority, time or date range the add-task form cannot produce"""
+    if task['priority'] not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{task['priority']}'; expected one of {', '.join(PRIORITIES)}")
+    for field in ('time_in', 'time_out'):
+        if not isinstance(task[field], str) or not re.fullmatch(r'([01]\d|2[0-3]):[0-5]\d', task[field]):
+            raise ValueError(f"{field} must be HH:MM between 00:00 and 23:59")
+    start = datetime.strptime(task['start_date'], '%Y-%m-%d')
+    end = datetime.strptime(task['end_date'], '%Y-%m-%d')
+    if end < start:
+        raise ValueError("end_date is before start_date")
+
+
+def parse_minutes(hhmm):
+    """Minutes since midnight for an 'HH:MM' string"""
+    hours, minutes = hhmm.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def task_minutes(task):
+    """Scheduled minutes of a task: daily time_in-time_out span over every day it covers"""
+    try:
+        daily = parse_minutes(task['time_out']) - parse_minutes(task['time_in'])
+        days = (datetime.fromisoformat(task['end_date']) - datetime.fromisoformat(task['start_date'])).days + 1
+    except (ValueError, KeyError):
+        return 0
+    return max(daily, 0) * max(days, 0)
+
+
+RECURRENCE_FREQS = ('daily', 'weekly', 'monthly', 'yearly')
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def occurrence_starts(task, first, last):
+    """Start ordinals of a recurring task's occurrences that overlap the ordinals first..last.
+    
+    The task's own start/end dates are the first occurrence; its `recurrence` rule holds
+    freq, interval, weekdays (weekly), and an optional until date or count. Only the
+    occurrences inside the range are generated, so an open-ended series costs nothing
+    outside the dates a view asks for.
+    """
+    rule = task['recurrence']
+    try:
+        start = datetime.fromisoformat(task['start_date']).toordinal()
+        span = max(datetime.fromisoformat(task['end_date']).toordinal() - start, 0)
+        until = datetime.fromisoformat(rule['until']).toordinal() if rule.get('until') else None
+    except (ValueError, KeyError):
+        return []
+    count = rule.get('count') or None
+    interval = max(int(rule.get('interval') or 1), 1)
+    lo, hi = max(first - span, start), last if until is None else min(last, until)
+    if lo > hi:
+        return []
+    freq = rule.get('freq')
+    result = []
+    if freq == 'daily':
+        n_last = (hi - start) // interval
+        if count:
+            n_last = min(n_last, count - 1)
+        return list(range(start + -(-(lo - start) // interval) * interval, start + n_last * interval + 1, interval))
+    if freq == 'weekly':
+        weekdays = sorted(set(rule.get('weekdays') or [(start - 1) % 7]))
+        monday = start - (start - 1) % 7
+        # Weekdays before the start date in its first week are not occurrences
+        skipped = sum(1 for day in weekdays if monday + day < start)
+        period = 7 * interval
+        for week in range(max((lo - monday) // period, 0), (hi - monday) // period + 1):
+            for index, day in enumerate(weekdays):
+                n = week * len(weekdays) + index - skipped
+                if n < 0:
+                    continue
+                if count and n >= count:
+                    return result
+                ordinal = monday + week * period + day
+                if lo <= ordinal <= hi:
+                    result.append(ordinal)
+        return result
+    if freq in ('monthly', 'yearly'):
+        step = interval * (12 if freq == 'yearly' else 1)
+        base = datetime.fromordinal(start)
+        month0 = base.year * 12 + base.month - 1
+        lo_date, hi_date = datetime.fromordinal(lo), datetime.fromordinal(hi)
+        n = max(-(-(lo_date.year * 12 + lo_date.month - 1 - month0) // step), 0)
+        while not count or n < count:
+            year, month = divmod(month0 + n * step, 12)
+            if (year, month + 1) > (hi_date.year, hi_date.month):
+                break
+            # Day 31 falls on the last day of shorter months
+            month_end = (datetime(year + 1, 1, 1) if month == 11 else datetime(year, month + 2, 1)).toordinal() - 1
+            ordinal = min(datetime(year, month + 1, 1).toordinal() + base.day - 1, month_end)
+            if lo <= ordinal <= hi:
+                result.append(ordinal)
+            n += 1
+    return result
+
+
+def describe_recurrence(rule):
+    """Short label for a recurrence rule, e.g. 'every 2 weeks on Mon, Thu until 2026-12-31'"""
+    interval = int(rule.get('interval') or 1)
+    unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'yearly': 'year'}.get(rule.get('freq'), '?')
+    text = f"every {interval} {unit}s" if interval > 1 else f"every {unit}"
+    if rule.get('freq') == 'weekly' and rule.get('weekdays'):
+        text += " on " + ", ".join(WEEKDAY_NAMES[day] for day in sorted(rule['weekdays']))
+    if rule.get('until'):
+        text += f" until {rule['until']}"
+    elif rule.get('count'):
+        text += f", {rule['count']} times"
+    return text
+
+
+def pack_intervals(intervals):
+    """Sweep-line column packing of (start, end) intervals.
+    
+    Returns (column, columns) per interval: overlapping intervals get distinct columns and
+    every interval in a cluster of transitive overlaps shares the cluster's column count.
+    """
+    placed = [None] * len(intervals)
+    active = []
+    free = []
+    cluster = []
+    width = 0
+    for i in sorted(range(len(intervals)), key=intervals.__getitem__):
+        start, end = intervals[i]
+        while active and active[0][0] <= start:
+            heapq.heappush(free, heapq.heappop(active)[1])
+        if not active:
+            for j in cluster:
+                placed[j] = (placed[j], width)
+            cluster, free, width = [], [], 0
+        if free:
+            column = heapq.heappop(free)
+        else:
+            column, width = width, width + 1
+        heapq.heappush(active, (end, column))
+        placed[i] = column
+        cluster.append(i)
+    for j in cluster:
+        placed[j] = (placed[j], width)
+    return placed
+
+
+def free_slot(busy, duration, work_start, work_end):
+    """Earliest start in [work_start, work_end) leaving `duration` minutes clear of the
+    start-sorted `busy` intervals, or None"""
+    t = work_start
+    for start, end in busy:
+        if start - t >= duration:
+            break
+        t = max(t, end)
+    return t if t + duration <= work_end else None
+
+
+def greedy_schedule(requests, day_load, work_start, work_end, limit):
+    """Place tasks into free time, most important first.
+    
+    `requests` holds (key, rank, first_day, last_day, duration) with day ordinals;
+    `day_load(ordinal)` gives that day's existing (busy intervals, committed minutes).
+    Tasks come off a heap by (priority rank, deadline, arrival) and take the earliest slot
+    of the first day in their window that fits around everything booked so far without
+    pushing the day over `limit`. Returns {key: (ordinal, start, end) or None}.
+    """
+    heap = [(rank, last, seq, key, first, duration)
+            for seq, (key, rank, first, last, duration) in enumerate(requests)]
+    heapq.heapify(heap)
+    days = {}
+    placed = {}
+    while heap:
+        rank, last, seq, key, first, duration = heapq.heappop(heap)
+        placed[key] = None
+        for ordinal in range(first, last + 1):
+            state = days.get(ordinal)
+            if state is None:
+                busy, committed = day_load(ordinal)
+                state = days[ordinal] = [sorted(busy), committed]
+            if state[1] + duration > limit:
+                continue
+            start = free_slot(state[0], duration, work_start, work_end)
+            if start is not None:
+                bisect.insort(state[0], (start, start + duration))
+                state[1] += duration
+                placed[key] = (ordinal, start, start + duration)
+                break
+    return placed
+
+
+def layout_timeline(tasks_to_display, first_day, last_day, min_span=15):
+    """Minute-resolution segments of each task on every day it covers in the range.
+    
+    Each segment is a dict with the task row, day offset, start/end minutes and the
+    column/columns assigned by `pack_intervals` among that day's overlapping segments.
+    """
+    first, last = first_day.toordinal(), last_day.toordinal()
+    by_day = defaultdict(list)
+    for task_data in tasks_to_display:
+        try:
+            start = parse_minutes(task_data['time_in'])
+            end = parse_minutes(task_data['time_out'])
+            task_start = datetime.fromisoformat(task_data['start_date']).toordinal()
+            task_end = datetime.fromisoformat(task_data['end_date']).toordinal()
+        except ValueError:
+            continue
+        start = min(max(start, 0), 1440 - min_span)
+        end = min(max(end, start + min_span), 1440)
+        for day in range(max(task_start, first), min(task_end, last) + 1):
+            by_day[day - first].append({'task': task_data, 'day': day - first, 'start': start, 'end': end,
+                                        'slot': day - task_start})
+    segments = []
+    for day, day_segments in sorted(by_day.items()):
+        packed = pack_intervals([(s['start'], s['end']) for s in day_segments])
+        for segment, (column, columns) in zip(day_segments, packed):
+            segment['column'], segment['columns'] = column, columns
+        segments.extend(day_segments)
+    return segments
+
+
+def summarize_days(tasks_to_display, first_day, last_day):
+    """Bucket tasks by every day they cover in the range, in a single pass.
+    
+    Each bucket (keyed by day offset) holds its tasks ordered by priority and time, the
+    [blue, green, red] priority mix and the completed count; the range totals come along.
+    """
+    first, last = first_day.toordinal(), last_day.toordinal()
+    days = {}
+    completed = 0
+    for task_data in tasks_to_display:
+        done = task_data['status'] == 'Complete'
+        completed += done
+        try:
+            task_start = datetime.fromisoformat(task_data['start_date']).toordinal()
+            task_end = datetime.fromisoformat(task_data['end_date']).toordinal()
+        except ValueError:
+            continue
+        rank = priority_rank(task_data['importance'])
+        for day in range(max(task_start, first), min(task_end, last) + 1):
+            bucket = days.get(day - first)
+            if bucket is None:
+                bucket = days[day - first] = {'tasks': [], 'mix': [0, 0, 0], 'completed': 0}
+            bucket['tasks'].append((rank, task_data['time_in'], day - task_start, task_data))
+            bucket['mix'][rank] += 1
+            bucket['completed'] += done
+    for bucket in days.values():
+        bucket['tasks'].sort(key=lambda entry: entry[:2])
+    return {'days': days, 'total': len(tasks_to_display), 'completed': completed}
+
+
+def calendar_export_rows(tasks_to_display):
+    """CSV rows of the filtered calendar tasks: one per task, or per occurrence of a
+    recurring task, however many days or boxes it covers"""
+    rows, seen = [], set()
+    for task_data in tasks_to_display:
+        key = (task_data['pid'], task_data['tid'], task_data.get('occurrence'))
+        if key not in seen:
+            seen.add(key)
+            rows.append([task_data['project_id'], task_data['task_name'], task_data['time_in'],
+                         task_data['time_out'], task_data['importance'], task_data['status']])
+    return rows
+
+
+def array_minutes(values):
+    """Vectorized parse_minutes over 'HH:MM' strings; anything malformed falls back per item"""
+    if not len(values):
+        return np.zeros(0, dtype=np.int64)
+    text = np.array(values, dtype=str)
+    if text.itemsize // 4 < 5:
+        text = text.astype('U5')
+    digits = text.view(np.uint32).reshape(len(text), -1)[:, :5].astype(np.int64) - ord('0')
+    minutes = (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]
+    numeric = digits[:, [0, 1, 3, 4]]
+    odd = (np.char.str_len(text) != 5) | (digits[:, 2] != ord(':') - ord('0')) | ((numeric < 0) | (numeric > 9)).any(axis=1)
+    for i in np.flatnonzero(odd):
+        try:
+            minutes[i] = parse_minutes(values[i])
+        except ValueError:
+            minutes[i] = 0
+    return minutes
+
+
+def daily_load(rows, first_day, last_day):
+    """Per-day task count, scheduled minutes and completed count over a date range.
+    
+    `rows` holds (start_date, end_date, time_in, time_out, complete) per task. Each task adds
+    its weight at its first day and removes it after its last in difference arrays, so one
+    cumulative sum gives every day's totals without visiting days task by task.
+    """
+    n = last_day.toordinal() - first_day.toordinal() + 1
+    if not rows:
+        empty = np.zeros(n, dtype=np.int64)
+        return {'tasks': empty, 'minutes': empty, 'completed': empty}
+    starts, ends, time_in, time_out, complete = zip(*rows)
+    origin = np.datetime64(first_day.isoformat(), 'D')
+    try:
+        start = (np.array(starts, dtype='datetime64[D]') - origin).astype(np.int64)
+        end = (np.array(ends, dtype='datetime64[D]') - origin).astype(np.int64)
+    except ValueError:
+        valid = []
+        for row in rows:
+            try:
+                datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+            except ValueError:
+                continue
+            valid.append(row)
+        return daily_load(valid, first_day, last_day)
+    daily = np.maximum(array_minutes(time_out) - array_minutes(time_in), 0)
+    keep = (start <= end) & (end >= 0) & (start < n)
+    first = np.maximum(start[keep], 0)
+    after = np.minimum(end[keep], n - 1) + 1
+    
+    def spread(weights=None):
+        if weights is not None:
+            weights = weights[keep]
+        diff = np.bincount(first, weights, minlength=n + 1) - np.bincount(after, weights, minlength=n + 1)
+        return np.cumsum(diff[:n]).astype(np.int64)
+    
+    return {'tasks': spread(), 'minutes': spread(daily), 'completed': spread(np.array(complete, dtype=np.int64))}
+
+
+def natural_key(text):
+    """Sort key that orders embedded numbers numerically, so T9 comes before T10"""
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part.casefold()) for part in re.split(r'(\d+)', text) if part)
+
+
+def task_sort_fields(pid, tid, task):
+    """Typed sort key of every sortable task column"""
+    try:
+        time_key = (parse_minutes(task['time_in']), parse_minutes(task['time_out']))
+    except (ValueError, KeyError):
+        time_key = (-1, -1)
+    return {
+        'project': natural_key(pid),
+        'tid': natural_key(tid),
+        'name': task['name'].casefold(),
+        'priority': priority_rank(task['priority']),
+        'mandatory': not task['mandatory'],
+        'start': task['start_date'],
+        'end': task['end_date'],
+        'time': time_key,
+        'status': task['status'],
+    }
+
+
+class TreeSorter:
+    """Click-to-sort headings for a task Treeview that reorders the existing items in place.
+    
+    `columns` maps headings to fields of `task_sort_fields`. Clicking a heading makes it
+    the primary key (clicking it again reverses it) and the previously used keys break
+    ties, so successive clicks give a stable multi-key order. Siblings are sorted under
+    each parent, so a hierarchy keeps its shape.
+    """
+
+    def __init__(self, tree, columns, fields_of):
+        self.tree = tree
+        self.columns = columns
+        self.fields_of = fields_of
+        self.order = []
+        self.keys = {}
+        self.parents = set()
+        self.rows = {}
+        self.settled = False
+        self.titles = {}
+        for column in columns:
+            self.titles[column] = tree.heading(column)['text']
+            tree.heading(column, command=lambda column=column: self.sort_by(column))
+
+    def track(self, keys, parents=()):
+        """Set the (pid, tid) behind each item and the items that have children"""
+        self.keys = keys
+        self.parents = set(parents)
+        self.rows = {}
+        self.settled = False
+
+    def row(self, item):
+        """Sort keys of an item with the item itself, fetched once per track"""
+        row = self.rows.get(item)
+        if row is None:
+            row = self.rows[item] = dict(self.fields_of(self.keys[item]), item=item)
+        return row
+
+    def sort_by(self, column):
+        descending = bool(self.order) and self.order[0][0] == column and not self.order[0][1]
+        self.order = [(column, descending)] + [entry for entry in self.order if entry[0] != column][:2]
+        for heading, title in self.titles.items():
+            arrow = (' ▼' if descending else ' ▲') if heading == column else ''
+            self.tree.heading(heading, text=title + arrow)
+        # Items already in the previous order only need a stable pass on the new primary key
+        self.apply(self.order[:1] if self.settled else self.order)
+
+    def apply(self, order=None):
+        """Re-sort every sibling list by the current keys"""
+        if not self.order:
+            return
+        # Adjacent keys sorted the same way share one pass; later passes keep earlier ties in order
+        passes = []
+        for column, descending in order or self.order:
+            if passes and passes[-1][1] == descending:
+                passes[-1][0].append(self.columns[column])
+            else:
+                passes.append(([self.columns[column]], descending))
+        for parent in [''] + [item for item in self.parents if self.tree.exists(item)]:
+            current = self.tree.get_children(parent)
+            if any(item not in self.keys for item in current):
+                continue
+            rows = [self.row(item) for item in current]
+            for fields, descending in reversed(passes):
+                rows.sort(key=itemgetter(*fields), reverse=descending)
+            ordered = [row['item'] for row in rows]
+            if ordered != list(current):
+                self.reorder(parent, current, ordered)
+        self.settled = True
+
+    def reorder(self, parent, current, ordered):
+        """Move only the items off the longest already-sorted run, or reorder in one call when many"""
+        rank = {item: index for index, item in enumerate(ordered)}
+        ranks = [rank[item] for item in current]
+        # Each out-of-order neighbour pair needs one of its two items moved
+        if sum(1 for a, b in zip(ranks, ranks[1:]) if a > b) > 64:
+            self.tree.set_children(parent, *ordered)
+            return
+        tails, tail_items, previous = [], [], {}
+        for item in current:
+            i = bisect.bisect_left(tails, rank[item])
+            previous[item] = tail_items[i - 1] if i else None
+            if i == len(tails):
+                tails.append(rank[item])
+                tail_items.append(item)
+            else:
+                tails[i] = rank[item]
+                tail_items[i] = item
+        if len(current) - len(tails) > 32:
+            self.tree.set_children(parent, *ordered)
+            return
+        keep = set()
+        item = tail_items[-1]
+        while item is not None:
+            keep.add(item)
+            item = previous[item]
+        moving = [item for item in ordered if item not in keep]
+        self.tree.detach(*moving)
+        for item in moving:
+            self.tree.move(item, parent, rank[item])
+
+
+class HierarchyIndex:
+    """Parent -> children index per project, built lazily and patched from transaction deltas"""
+
+    def __init__(self, tasks):
+        self.reset(tasks)
+
+    def reset(self, tasks):
+        self.tasks = tasks
+        self.projects = {}
+
+    def project(self, pid):
+        """Children map of one project; the None key holds its top-level tasks"""
+        children = self.projects.get(pid)
+        if children is None:
+            children = defaultdict(dict)
+            for tid, task in self.tasks.get(pid, {}).items():
+                children[task.get('parent') or None][tid] = None
+            self.projects[pid] = children
+        return children
+
+    def children(self, pid, tid):
+        return list(self.project(pid).get(tid, ()))
+
+    def has_children(self, pid, tid):
+        return bool(self.project(pid).get(tid))
+
+    def drop_project(self, pid):
+        self.projects.pop(pid, None)
+
+    def link(self, children, parent, tid):
+        children[parent or None][tid] = None
+
+    def unlink(self, children, parent, tid):
+        siblings = children.get(parent or None)
+        if siblings is not None:
+            siblings.pop(tid, None)
+            if not siblings:
+                del children[parent or None]
+
+    def apply_changes(self, applied):
+        for pid, tid, before, after in applied:
+            children = self.projects.get(pid)
+            if children is None:
+                continue
+            if before is None:
+                self.link(children, after.get('parent'), tid)
+            elif after is None:
+                self.unlink(children, before.get('parent'), tid)
+            elif 'parent' in after:
+                self.unlink(children, before.get('parent'), tid)
+                self.link(children, after['parent'], tid)
+
+    def subtree(self, pid, tid):
+        """Task IDs of `tid` and all its descendants in pre-order; iterative and cycle-safe"""
+        children = self.project(pid)
+        result, seen, stack = [], {tid}, [tid]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            for child in reversed(list(children.get(current, ()))):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return result
+
+    def walk(self, pid, tasks=None, sort_key=None, include_unreached=False):
+        """Iterative pre-order walk of a project (or a subset of its tasks) with rollups.
+        
+        With a subset, tasks whose parent is outside it become top level. Each task is
+        visited once, so parent cycles cannot loop; the task that closes a cycle is
+        recorded in `cycles`. `include_unreached` also walks orphans and cycle members.
+        """
+        if tasks is None:
+            tasks = self.tasks.get(pid, {})
+            children = self.project(pid)
+        else:
+            children = defaultdict(dict)
+            for tid, task in tasks.items():
+                parent = task.get('parent') or None
+                children[parent if parent in tasks else None][tid] = None
+        
+        def ordered(ids):
+            ids = [tid for tid in ids if tid in tasks]
+            return sorted(ids, key=lambda tid: sort_key(tid, tasks[tid])) if sort_key else ids
+        
+        result = TreeWalk()
+        seen = set()
+        
+        def descend(roots):
+            stack = [(tid, None, 0) for tid in reversed(ordered(roots))]
+            while stack:
+                tid, parent, depth = stack.pop()
+                if tid in seen:
+                    result.cycles.append(tid)
+                    continue
+                seen.add(tid)
+                result.order.append((tid, parent, depth))
+                stack.extend((child, tid, depth + 1) for child in reversed(ordered(children.get(tid, ()))))
+        
+        descend(children.get(None, ()))
+        if include_unreached:
+            for tid in tasks:
+                if tid not in seen:
+                    descend([tid])
+        
+        # Children follow their parent in pre-order, so one reverse pass rolls subtrees up
+        size, completed = result.size, result.completed
+        for tid, parent, depth in result.order:
+            size[tid] = 1
+            completed[tid] = 1 if tasks[tid]['status'] == 'Complete' else 0
+        for tid, parent, depth in reversed(result.order):
+            if parent is not None:
+                size[parent] += size[tid]
+                completed[parent] += completed[tid]
+        return result
+
+    def unreachable(self, pid):
+        """Tasks that no top-level task leads to: orphans of deleted parents and parent cycles"""
+        tasks = self.tasks.get(pid, {})
+        reachable = set()
+        for root in self.children(pid, None):
+            reachable.update(self.subtree(pid, root))
+        return [tid for tid in tasks if tid not in reachable]
+
+    def detach_points(self, pid, unreachable):
+        """Tasks whose parent link to clear so every unreachable task hangs off a main task
+        again: the top of each chain under a deleted parent and, for each parent cycle, its
+        member with the lowest task ID"""
+        tasks = self.tasks.get(pid, {})
+        stranded = set(unreachable)
+        owner = {}
+        points = []
+        for tid in unreachable:
+            path = []
+            node = tid
+            while node in stranded and node not in owner:
+                owner[node] = tid
+                path.append(node)
+                node = tasks[node].get('parent')
+            if node not in stranded:
+                if path:
+                    points.append(path[-1])
+            elif owner[node] == tid:
+                points.append(min(path[path.index(node):], key=natural_key))
+        return points
+
+
+class TreeWalk:
+    """Result of HierarchyIndex.walk: pre-order (tid, parent, depth) rows plus subtree rollups"""
+
+    def __init__(self):
+        self.order = []
+        self.size = {}
+        self.completed = {}
+        self.cycles = []
+
+
+class ProgressRollup:
+    """Per-project and per-subtree counters kept current from transaction deltas.
+    
+    Counters are [total, completed, mandatory remaining, scheduled minutes, actual
+    minutes]. A project is built once from a walk; after that each change (or tracked
+    time entry) only touches the task and its ancestors, so updates cost O(depth). A task
+    whose parent link would close a cycle stays detached in `cyclic` and is re-linked once
+    a delete or reparent breaks the cycle.
+    """
+    FIELDS = ('total', 'completed', 'mandatory_remaining', 'minutes', 'actual_minutes')
+    TRACKED = ('parent', 'status', 'mandatory', 'start_date', 'end_date', 'time_in', 'time_out')
+
+    def __init__(self, hierarchy, actual=None):
+        self.hierarchy = hierarchy
+        # Actual minutes per (pid, tid), as tracked by a TimeLog
+        self.actual = actual if actual is not None else {}
+        self.projects = {}
+
+    def reset(self):
+        self.projects = {}
+
+    def drop_project(self, pid):
+        self.projects.pop(pid, None)
+
+    @staticmethod
+    def contribution(info, actual=0):
+        done = info['status'] == 'Complete'
+        return [1, 1 if done else 0, 1 if info['mandatory'] and not done else 0, task_minutes(info), actual]
+
+    def project(self, pid):
+        state = self.projects.get(pid)
+        if state is None:
+            tasks = self.hierarchy.tasks.get(pid, {})
+            walk = self.hierarchy.walk(pid, tasks, include_unreached=True)
+            state = {'info': {}, 'own': {}, 'sub': {}, 'parent': {}, 'kids': defaultdict(set),
+                     'waiting': defaultdict(set), 'cyclic': set(), 'totals': [0] * len(self.FIELDS)}
+            for tid, parent, depth in walk.order:
+                info = {f: tasks[tid].get(f) for f in self.TRACKED}
+                state['info'][tid] = info
+                state['own'][tid] = own = self.contribution(info, self.actual.get((pid, tid), 0))
+                state['sub'][tid] = list(own)
+                state['parent'][tid] = parent
+                if parent is not None:
+                    state['kids'][parent].add(tid)
+                elif info['parent'] in tasks and info['parent'] != tid:
+                    # The walk entered a parent cycle here
+                    state['cyclic'].add(tid)
+                elif info['parent'] and info['parent'] != tid:
+                    state['waiting'][info['parent']].add(tid)
+                self.add(state['totals'], own)
+            for tid, parent, depth in reversed(walk.order):
+                if parent is not None:
+                    self.add(state['sub'][parent], state['sub'][tid])
+            self.projects[pid] = state
+        return state
+
+    @staticmethod
+    def add(target, delta, sign=1):
+        for i, value in enumerate(delta):
+            target[i] += sign * value
+
+    def add_up(self, state, tid, delta, sign=1):
+        """Add `delta` to `tid` and each of its ancestors"""
+        seen = set()
+        while tid is not None and tid not in seen:
+            seen.add(tid)
+            self.add(state['sub'][tid], delta, sign)
+            tid = state['parent'].get(tid)
+
+    def attach(self, state, tid, parent):
+        """Hang `tid` under `parent`, or park it until that parent exists; refuses cycles"""
+        ancestor, seen = parent, set()
+        while ancestor is not None and ancestor not in seen:
+            if ancestor == tid:
+                if parent != tid:
+                    state['cyclic'].add(tid)
+                parent = None
+                break
+            seen.add(ancestor)
+            ancestor = state['parent'].get(ancestor)
+        
+        if parent is not None and parent in state['info']:
+            state['parent'][tid] = parent
+            state['kids'][parent].add(tid)
+            self.add_up(state, parent, state['sub'][tid])
+        else:
+            state['parent'][tid] = None
+            if parent is not None:
+                state['waiting'][parent].add(tid)
+
+    def detach(self, state, tid):
+        state['cyclic'].discard(tid)
+        parent = state['parent'].get(tid)
+        if parent is not None:
+            self.add_up(state, parent, state['sub'][tid], -1)
+            state['kids'][parent].discard(tid)
+        else:
+            declared = state['info'][tid]['parent']
+            if declared in state['waiting']:
+                state['waiting'][declared].discard(tid)
+        state['parent'][tid] = None
+
+    def relink_cycles(self, state):
+        """Retry the links refused as cycles; a delete or reparent may have broken them"""
+        for tid in list(state['cyclic']):
+            state['cyclic'].discard(tid)
+            self.attach(state, tid, state['info'][tid]['parent'])
+
+    def apply_changes(self, applied):
+        for pid, tid, before, after in applied:
+            state = self.projects.get(pid)
+            if state is None:
+                continue
+            if before is None:
+                info = {f: after.get(f) for f in self.TRACKED}
+                state['info'][tid] = info
+                state['own'][tid] = own = self.contribution(info, self.actual.get((pid, tid), 0))
+                state['sub'][tid] = list(own)
+                self.add(state['totals'], own)
+                # Adopt subtasks that were waiting for this ID (e.g. an undone delete)
+                for child in state['waiting'].pop(tid, ()):
+                    state['parent'][child] = tid
+                    state['kids'][tid].add(child)
+                    self.add(state['sub'][tid], state['sub'][child])
+                self.attach(state, tid, info['parent'])
+            elif after is None:
+                if tid not in state['info']:
+                    continue
+                self.detach(state, tid)
+                for child in state['kids'].pop(tid, ()):
+                    state['parent'][child] = None
+                    state['waiting'][tid].add(child)
+                self.add(state['totals'], state['own'].pop(tid), -1)
+                del state['info'][tid], state['sub'][tid], state['parent'][tid]
+                if state['cyclic']:
+                    self.relink_cycles(state)
+            elif tid in state['info']:
+                info = state['info'][tid]
+                if 'parent' in after:
+                    self.detach(state, tid)
+                    info['parent'] = after['parent']
+                    self.attach(state, tid, after['parent'])
+                    if state['cyclic']:
+                        self.relink_cycles(state)
+                if any(f in after for f in self.TRACKED if f != 'parent'):
+                    info.update((f, after[f]) for f in self.TRACKED if f in after)
+                    new_own = self.contribution(info, state['own'][tid][4])
+                    delta = [n - o for n, o in zip(new_own, state['own'][tid])]
+                    state['own'][tid] = new_own
+                    self.add(state['totals'], delta)
+                    self.add_up(state, tid, delta)
+
+    def add_actual(self, pid, tid, minutes):
+        """Count newly tracked minutes on a task and its ancestors"""
+        state = self.projects.get(pid)
+        if state is None or tid not in state['own']:
+            return
+        delta = [0, 0, 0, 0, minutes]
+        self.add(state['own'][tid], delta)
+        self.add(state['totals'], delta)
+        self.add_up(state, tid, delta)
+
+    def as_dict(self, counters):
+        result = dict(zip(self.FIELDS, counters))
+        result['incomplete'] = result['total'] - result['completed']
+        result['percentage'] = (result['completed'] / result['total'] * 100) if result['total'] else 0
+        result['hours'] = result['minutes'] / 60
+        result['actual_hours'] = result['actual_minutes'] / 60
+        return result
+
+    def totals(self, pid):
+        return self.as_dict(self.project(pid)['totals'])
+
+    def subtree_totals(self, pid, tid):
+        return self.as_dict(self.project(pid)['sub'][tid])
+
+
+class TodayView:
+    """Materialized list of the leaf tasks active on one date, patched per task.
+    
+    Rows stay ordered by priority rank, then project and task ID, so a patched row lands
+    where a rebuild would put it; keys whose row changed since the last
+    `take_changes()` are collected so the Today tree can move just those items.
+    """
+
+    def __init__(self, projects, tasks, hierarchy):
+        self.hierarchy = hierarchy
+        self.reset(projects, tasks)
+
+    def reset(self, projects, tasks):
+        self.projects = projects
+        self.tasks = tasks
+        self.date = None
+        self.version = None
+        self.rows = {}
+        self.order = []
+        self.sort_keys = {}
+        self.changed = set()
+        self.rebuilt = False
+
+    def build_row(self, pid, tid):
+        task = self.tasks.get(pid, {}).get(tid)
+        if task is None or pid not in self.projects or self.hierarchy.has_children(pid, tid):
+            return None
+        occurrence = None
+        if task.get('recurrence'):
+            starts = occurrence_starts(task, self.ordinal, self.ordinal)
+            if not starts:
+                return None
+            occurrence = datetime.fromordinal(starts[-1]).strftime('%Y-%m-%d')
+        elif not task['start_date'] <= self.date <= task['end_date']:
+            return None
+        return {
+            'pid': pid,
+            'tid': tid,
+            'project_id': self.projects[pid]['id'],
+            'name': task['name'],
+            'priority': task['priority'],
+            'time_in': task['time_in'],
+            'time_out': task['time_out'],
+            'status': task['status'] if occurrence is None else
+                      'Complete' if occurrence in task.get('done_dates', ()) else 'Incomplete',
+            'occurrence': occurrence
+        }
+
+    def rebuild(self, date, version):
+        self.date = date.isoformat()
+        self.ordinal = date.toordinal()
+        self.version = version
+        self.rows, self.order, self.sort_keys, self.changed = {}, [], {}, set()
+        for pid in self.projects:
+            for tid in self.tasks.get(pid, {}):
+                row = self.build_row(pid, tid)
+                if row is not None:
+                    self.place((pid, tid), row)
+        self.rebuilt = True
+
+    def place(self, key, row):
+        sort_key = (priority_rank(row['priority']), natural_key(key[0]), natural_key(key[1]), key)
+        self.rows[key] = row
+        self.sort_keys[key] = sort_key
+        bisect.insort(self.order, sort_key)
+
+    def remove(self, key):
+        sort_key = self.sort_keys.pop(key)
+        del self.order[bisect.bisect_left(self.order, sort_key)]
+        del self.rows[key]
+
+    def patch(self, key):
+        old, new = self.rows.get(key), self.build_row(*key)
+        if old == new:
+            return
+        if old is not None and new is not None and priority_rank(old['priority']) == priority_rank(new['priority']):
+            self.rows[key] = new
+        else:
+            if old is not None:
+                self.remove(key)
+            if new is not None:
+                self.place(key, new)
+        self.changed.add(key)
+
+    def apply_changes(self, applied, version):
+        """Patch the rows touched by a transaction, including parents whose leaf status may flip"""
+        if self.version != version - 1:
+            return
+        self.version = version
+        for pid, tid, before, after in applied:
+            self.patch((pid, tid))
+            for fields in (before, after):
+                if fields and fields.get('parent'):
+                    self.patch((pid, fields['parent']))
+
+    def index_of(self, key):
+        return bisect.bisect_left(self.order, self.sort_keys[key])
+
+    def take_changes(self):
+        changed, self.changed = self.changed, set()
+        rebuilt, self.rebuilt = self.rebuilt, False
+        return rebuilt, changed
+
+
+class CapacityPlanner:
+    """Committed minutes per day across all projects, kept current task by task.
+    
+    Each leaf task books its daily time_in-time_out slot on every day it covers. A change
+    only rebooks the days of the tasks it touches; per-day summaries are swept lazily
+    from the slot endpoints and cached until one of that day's slots changes. Recurring
+    tasks are kept aside as series and expanded for a day only when it is summarized.
+    """
+
+    def __init__(self, tasks, hierarchy, limit=480):
+        self.hierarchy = hierarchy
+        self.limit = limit
+        self.reset(tasks)
+
+    def reset(self, tasks):
+        self.tasks = tasks
+        self.slots = {}
+        self.days = defaultdict(dict)
+        self.series = {}
+        self.summaries = {}
+        for pid, project_tasks in tasks.items():
+            for tid in project_tasks:
+                self.patch((pid, tid))
+
+    def slot_of(self, pid, tid):
+        """(first day, last day, start minute, end minute) booked by a task, or None"""
+        task = self.tasks.get(pid, {}).get(tid)
+        if task is None or self.hierarchy.has_children(pid, tid):
+            return None
+        try:
+            start, end = parse_minutes(task['time_in']), parse_minutes(task['time_out'])
+            first = datetime.fromisoformat(task['start_date']).toordinal()
+            last = datetime.fromisoformat(task['end_date']).toordinal()
+        except (ValueError, KeyError):
+            return None
+        if end <= start or last < first:
+            return None
+        return (first, last, start, end)
+
+    def patch(self, key):
+        old, new = self.slots.get(key), self.slot_of(*key)
+        task = self.tasks.get(key[0], {}).get(key[1])
+        if new is not None and task.get('recurrence'):
+            # A series can land on any day, so changing one invalidates every summary
+            if self.series.get(key) != (new, task['recurrence']):
+                self.series[key] = (new, task['recurrence'])
+                self.summaries.clear()
+            new = None
+        elif self.series.pop(key, None) is not None:
+            self.summaries.clear()
+        if old == new:
+            return
+        if old is not None:
+            self.unbook(key, old)
+            del self.slots[key]
+        if new is not None:
+            for day in range(new[0], new[1] + 1):
+                self.days[day][key] = new[2:]
+                self.summaries.pop(day, None)
+            self.slots[key] = new
+
+    def unbook(self, key, slot):
+        """Take a slot off its days, dropping days left with no bookings"""
+        for day in range(slot[0], slot[1] + 1):
+            booked = self.days[day]
+            del booked[key]
+            if not booked:
+                del self.days[day]
+            self.summaries.pop(day, None)
+
+    def apply_changes(self, applied):
+        """Rebook tasks touched by a transaction and parents whose leaf status may flip"""
+        for pid, tid, before, after in applied:
+            self.patch((pid, tid))
+            for fields in (before, after):
+                if fields and fields.get('parent'):
+                    self.patch((pid, fields['parent']))
+
+    def drop_project(self, pid):
+        for key in [key for key in self.slots if key[0] == pid]:
+            self.unbook(key, self.slots.pop(key))
+        for key in [key for key in self.series if key[0] == pid]:
+            del self.series[key]
+            self.summaries.clear()
+
+    @staticmethod
+    def sweep(slots):
+        """Sweep a day's slot endpoints: committed, busy (union) and double-booked minutes,
+        peak concurrency and the tasks whose slots overlap another's"""
+        events = []
+        for key, (start, end) in slots.items():
+            events.append((start, 1, key))
+            events.append((end, -1, key))
+        # Ends sort before starts at the same minute, so back-to-back slots do not clash
+        events.sort(key=lambda event: event[:2])
+        active, unmarked, conflicts = set(), set(), set()
+        busy = overlap = peak = 0
+        last = None
+        for minute, step, key in events:
+            if active:
+                busy += minute - last
+                if len(active) > 1:
+                    overlap += minute - last
+            last = minute
+            if step > 0:
+                if active:
+                    conflicts.add(key)
+                    conflicts |= unmarked
+                    unmarked.clear()
+                else:
+                    unmarked.add(key)
+                active.add(key)
+                peak = max(peak, len(active))
+            else:
+                active.discard(key)
+                unmarked.discard(key)
+        return {'tasks': len(slots), 'committed': sum(end - start for start, end in slots.values()),
+                'busy': busy, 'overlap': overlap, 'peak': peak, 'conflicts': conflicts}
+
+    def day(self, date):
+        """Summary of one date (a date object or ordinal), swept on first use"""
+        ordinal = date if isinstance(date, int) else date.toordinal()
+        summary = self.summaries.get(ordinal)
+        if summary is None:
+            summary = self.summaries[ordinal] = self.sweep(self.booked(ordinal))
+        return summary
+
+    def booked(self, ordinal):
+        """key -> (start, end) minutes of every slot on a day, recurring occurrences included"""
+        slots = self.days.get(ordinal, {})
+        if self.series:
+            slots = dict(slots)
+            for key, (slot, rule) in self.series.items():
+                if occurrence_starts(self.tasks[key[0]][key[1]], ordinal, ordinal):
+                    slots[key] = slot[2:]
+        return slots
+
+    def overloaded(self, date):
+        return self.day(date)['committed'] > self.limit
+
+
+class DayDensity:
+    """Tasks per day by priority for the date picker, counted a month at a time.
+    
+    Every dated leaf task sits in sorted start and end lists for its class (open tasks by
+    priority rank, completed tasks last), so the tasks covering a day are the starts on or
+    before it less the ends before it. A month is counted in one pass of bisects over its
+    days and cached until a task overlapping it changes. Recurring tasks are kept aside
+    and expanded for the counted month only.
+    """
+
+    CLASSES = 4
+
+    def __init__(self, tasks, hierarchy):
+        self.hierarchy = hierarchy
+        self.reset(tasks)
+
+    def reset(self, tasks):
+        self.tasks = tasks
+        self.spans = {}
+        self.series = {}
+        self.starts = [[] for _ in range(self.CLASSES)]
+        self.ends = [[] for _ in range(self.CLASSES)]
+        self.months = {}
+        for pid, project_tasks in tasks.items():
+            for tid in project_tasks:
+                self.patch((pid, tid))
+
+    def span_of(self, pid, tid):
+        """(first day, last day, class) of a task, or None if it is a parent or undated"""
+        task = self.tasks.get(pid, {}).get(tid)
+        if task is None or self.hierarchy.has_children(pid, tid):
+            return None
+        try:
+            first = datetime.fromisoformat(task['start_date']).toordinal()
+            last = datetime.fromisoformat(task['end_date']).toordinal()
+        except (ValueError, KeyError):
+            return None
+        if last < first:
+            return None
+        return (first, last, 3 if task['status'] == 'Complete' else priority_rank(task['priority']))
+
+    def patch(self, key):
+        old, new = self.spans.get(key), self.span_of(*key)
+        task = self.tasks.get(key[0], {}).get(key[1])
+        if new is not None and task.get('recurrence'):
+            # A series can land in any month, so changing one invalidates every count
+            series = (new, task['priority'], task['recurrence'], tuple(task.get('done_dates', ())))
+            if self.series.get(key) != series:
+                self.series[key] = series
+                self.months.clear()
+            new = None
+        elif self.series.pop(key, None) is not None:
+            self.months.clear()
+        if old == new:
+            return
+        if old is not None:
+            first, last, rank = self.spans.pop(key)
+            del self.starts[rank][bisect.bisect_left(self.starts[rank], first)]
+            del self.ends[rank][bisect.bisect_left(self.ends[rank], last)]
+            self.forget(first, last)
+        if new is not None:
+            first, last, rank = self.spans[key] = new
+            bisect.insort(self.starts[rank], first)
+            bisect.insort(self.ends[rank], last)
+            self.forget(first, last)
+
+    def forget(self, first, last):
+        """Drop the cached counts of the months the ordinals first..last touch"""
+        start, end = datetime.fromordinal(first), datetime.fromordinal(last)
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            self.months.pop((year, month), None)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def apply_changes(self, applied):
+        """Recount tasks touched by a transaction and parents whose leaf status may flip"""
+        for pid, tid, before, after in applied:
+            self.patch((pid, tid))
+            for fields in (before, after):
+                if fields and fields.get('parent'):
+                    self.patch((pid, fields['parent']))
+
+    def drop_project(self, pid):
+        for key in [key for key in self.spans if key[0] == pid]:
+            first, last, rank = self.spans.pop(key)
+            del self.starts[rank][bisect.bisect_left(self.starts[rank], first)]
+            del self.ends[rank][bisect.bisect_left(self.ends[rank], last)]
+            self.forget(first, last)
+        for key in [key for key in self.series if key[0] == pid]:
+            del self.series[key]
+            self.months.clear()
+
+    def month(self, year, month):
+        """{ordinal: [high, medium, low, complete]} for the days of a month with tasks"""
+        counts = self.months.get((year, month))
+        if counts is not None:
+            return counts
+        first = datetime(year, month, 1).toordinal()
+        last = (datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)).toordinal() - 1
+        counts = {}
+        for day in range(first, last + 1):
+            row = [bisect.bisect_right(starts, day) - bisect.bisect_left(ends, day)
+                   for starts, ends in zip(self.starts, self.ends)]
+            if any(row):
+                counts[day] = row
+        for (pid, tid), ((start, end, _), priority, _, done) in self.series.items():
+            task = self.tasks[pid][tid]
+            for occurrence in occurrence_starts(task, first, last):
+                rank = 3 if datetime.fromordinal(occurrence).strftime('%Y-%m-%d') in done else priority_rank(priority)
+                for day in range(max(occurrence, first), min(occurrence + end - start, last) + 1):
+                    counts.setdefault(day, [0] * self.CLASSES)[rank] += 1
+        self.months[(year, month)] = counts
+        return counts
+
+
+def minute_stamp(moment):
+    """Minutes since day one of the proleptic calendar, for ordering reminder times"""
+    return moment.toordinal() * 1440 + moment.hour * 60 + moment.minute
+
+
+class ReminderQueue:
+    """Upcoming reminder times of every task in one min-heap.
+    
+    An incomplete leaf task has up to two pending events, as minute stamps: 'start',
+    `lead` minutes before its next time_in slot, and 'overdue', at the midnight after its
+    end date. A change re-derives only that task's events; superseded heap entries are
+    skipped when they surface, since `pending` holds the current time of each event.
+    Tasks already past their end date are kept in `overdue`. Recurring tasks get start
+    reminders for their next open occurrence but never go overdue.
+    """
+
+    def __init__(self, tasks, hierarchy, lead=15):
+        self.hierarchy = hierarchy
+        self.lead = lead
+        self.reset(tasks, minute_stamp(datetime.now()))
+
+    def reset(self, tasks, now):
+        self.tasks = tasks
+        self.heap = []
+        self.pending = {}
+        self.reminded = {}
+        self.overdue = set()
+        for pid, project_tasks in tasks.items():
+            for tid in project_tasks:
+                self.patch((pid, tid), now)
+
+    def next_slot(self, task, after):
+        """Minute stamp of the first daily time_in slot of `task` later than `after`, or None"""
+        start_minute = parse_minutes(task['time_in'])
+        if parse_minutes(task['time_out']) <= start_minute:
+            return None
+        day = after // 1440
+        if task.get('recurrence'):
+            first, last = datetime.fromisoformat(task['start_date']).toordinal(), datetime.fromisoformat(task['end_date']).toordinal()
+            done = set(task.get('done_dates', ()))
+            for occurrence in occurrence_starts(task, day, day + 366):
+                if datetime.fromordinal(occurrence).strftime('%Y-%m-%d') in done:
+                    continue
+                for slot_day in range(max(occurrence, day), occurrence + last - first + 1):
+                    if slot_day * 1440 + start_minute > after:
+                        return slot_day * 1440 + start_minute
+            return None
+        for slot_day in range(max(datetime.fromisoformat(task['start_date']).toordinal(), day),
+                              datetime.fromisoformat(task['end_date']).toordinal() + 1):
+            if slot_day * 1440 + start_minute > after:
+                return slot_day * 1440 + start_minute
+        return None
+
+    def events(self, key, now):
+        """({kind: trigger stamp}, overdue now) for one task"""
+        task = self.tasks.get(key[0], {}).get(key[1])
+        if task is None or task['status'] == 'Complete' or self.hierarchy.has_children(*key):
+            return {}, False
+        events = {}
+        try:
+            if not task.get('recurrence'):
+                deadline = (datetime.fromisoformat(task['end_date']).toordinal() + 1) * 1440
+                if deadline <= now:
+                    return {}, True
+                events['overdue'] = deadline
+            slot = self.next_slot(task, max(now, self.reminded.get(key, now)))
+        except (ValueError, KeyError):
+            return events, False
+        if slot is not None:
+            events['start'] = slot - self.lead
+        return events, False
+
+    def patch(self, key, now):
+        events, overdue = self.events(key, now)
+        if overdue:
+            self.overdue.add(key)
+        else:
+            self.overdue.discard(key)
+        for kind in ('start', 'overdue'):
+            when = events.get(kind)
+            if when is None:
+                self.pending.pop((key, kind), None)
+            elif self.pending.get((key, kind)) != when:
+                self.pending[(key, kind)] = when
+                heapq.heappush(self.heap, (when, key, kind))
+        # Superseded entries pile up under heavy editing; rebuild once they dominate
+        if len(self.heap) > 2 * len(self.pending) + 1024:
+            self.heap = [(when, key, kind) for (key, kind), when in self.pending.items()]
+            heapq.heapify(self.heap)
+
+    def apply_changes(self, applied, now):
+        """Re-derive the events of tasks touched by a transaction and of parents whose leaf status may flip"""
+        for pid, tid, before, after in applied:
+            if after is None:
+                self.reminded.pop((pid, tid), None)
+            self.patch((pid, tid), now)
+            for fields in (before, after):
+                if fields and fields.get('parent'):
+                    self.patch((pid, fields['parent']), now)
+
+    def drop_project(self, pid):
+        for event in [event for event in self.pending if event[0][0] == pid]:
+            del self.pending[event]
+        for key in [key for key in self.reminded if key[0] == pid]:
+            del self.reminded[key]
+        self.overdue = {key for key in self.overdue if key[0] != pid}
+
+    def next_due(self):
+        """Stamp of the earliest current event, dropping superseded entries on the way"""
+        heap = self.heap
+        while heap and self.pending.get((heap[0][1], heap[0][2])) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now):
+        """Fire every event due by `now`: returns [(key, kind, slot stamp)] and re-arms start reminders"""
+        fired = []
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                return fired
+            _, key, kind = heapq.heappop(self.heap)
+            del self.pending[(key, kind)]
+            if kind == 'start':
+                self.reminded[key] = when + self.lead
+                fired.append((key, kind, when + self.lead))
+                # Catching up past the end date: re-deriving now would drop the due overdue event
+                if self.pending.get((key, 'overdue'), now + 1) > now:
+                    self.patch(key, now)
+            else:
+                self.overdue.add(key)
+                fired.append((key, kind, when))
+
+
+class DependencyGraph:
+    """Finish-to-start dependencies between tasks, across projects, with a critical-path schedule.
+    
+    A task lists the (pid, tid) tasks it waits for in its `depends_on` field. Linked tasks
+    form components; a change re-solves only the components it touches: a topological sort
+    (members of a cycle are set aside in `cycles`, tasks downstream of one in `blocked`),
+    a forward pass for the earliest start,
+    where a task starts no earlier than its own start date nor before its predecessors
+    finish, and a backward pass from the component's finish for the latest start. Dates
+    are day ordinals with exclusive finishes; zero-slack tasks are critical.
+    """
+
+    def __init__(self, tasks):
+        self.reset(tasks)
+
+    def reset(self, tasks):
+        self.tasks = tasks
+        self.preds = defaultdict(set)
+        self.succs = defaultdict(set)
+        self.schedule = {}
+        self.cycles = set()
+        self.blocked = set()
+        self.waiting = defaultdict(set)
+        for pid, project_tasks in tasks.items():
+            for tid, task in project_tasks.items():
+                for pred in task.get('depends_on') or ():
+                    self.link(tuple(pred), (pid, tid))
+        self.solve_around(set(self.preds) | set(self.succs))
+
+    def task(self, key):
+        return self.tasks.get(key[0], {}).get(key[1])
+
+    def link(self, pred, succ):
+        if pred == succ:
+            return
+        if self.task(pred) is None:
+            # Park links to missing tasks until the task appears (e.g. an undone delete)
+            self.waiting[pred].add(succ)
+        else:
+            self.preds[succ].add(pred)
+            self.succs[pred].add(succ)
+
+    def unlink(self, pred, succ):
+        for index, a, b in ((self.preds, succ, pred), (self.succs, pred, succ)):
+            linked = index.get(a)
+            if linked is not None:
+                linked.discard(b)
+                if not linked:
+                    del index[a]
+
+    def isolate(self, key):
+        for pred in list(self.preds.get(key, ())):
+            self.unlink(pred, key)
+        for succ in list(self.succs.get(key, ())):
+            self.unlink(key, succ)
+            self.waiting[key].add(succ)
+
+    def component(self, key):
+        """Every task linked to `key` through dependencies in either direction"""
+        seen = {key}
+        stack = [key]
+        while stack:
+            node = stack.pop()
+            for other in self.preds.get(node, set()) | self.succs.get(node, set()):
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def reaches(self, start, goal):
+        """True if `goal` is downstream of `start`; adding goal -> start would close a cycle"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node == goal:
+                return True
+            for succ in self.succs.get(node, ()):
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append(succ)
+        return False
+
+    def span(self, key):
+        """(start ordinal, duration in days) of a task; missing or bad dates count as one day"""
+        task = self.task(key)
+        try:
+            start = datetime.fromisoformat(task['start_date']).toordinal()
+            end = datetime.fromisoformat(task['end_date']).toordinal()
+        except (TypeError, ValueError, KeyError):
+            return None, 1
+        return start, max(end - start + 1, 1)
+
+    def cycle_members(self, nodes):
+        """Tasks of `nodes` on a cycle: strongly connected components of more than one task"""
+        index, low, stack, on_stack, members = {}, {}, [], set(), set()
+        for root in nodes:
+            if root in index:
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.succs.get(root, ())))]
+            while work:
+                node, succs = work[-1]
+                for succ in succs:
+                    if succ not in nodes:
+                        continue
+                    if succ not in index:
+                        index[succ] = low[succ] = len(index)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(self.succs.get(succ, ()))))
+                        break
+                    if succ in on_stack:
+                        low[node] = min(low[node], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            key = stack.pop()
+                            on_stack.discard(key)
+                            component.append(key)
+                            if key == node:
+                                break
+                        # link() refuses self-dependencies, so a lone task is never a cycle
+                        if len(component) > 1:
+                            members.update(component)
+        return members
+
+    def solve(self, nodes):
+        """Kahn topological sort of one component, then the forward and backward passes"""
+        for key in nodes:
+            self.schedule.pop(key, None)
+            self.cycles.discard(key)
+            self.blocked.discard(key)
+        if len(nodes) < 2:
+            return
+        indegree = {key: len(self.preds.get(key, ())) for key in nodes}
+        ready = [key for key, n in indegree.items() if n == 0]
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for succ in self.succs.get(key, ()):
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    ready.append(succ)
+        if len(order) < len(nodes):
+            unsorted = nodes - set(order)
+            members = self.cycle_members(unsorted)
+            self.cycles |= members
+            self.blocked |= unsorted - members
+        
+        early = {}
+        for key in order:
+            planned, duration = self.span(key)
+            start = max((early[p][1] for p in self.preds.get(key, ()) if p in early), default=planned)
+            if planned is not None and start is not None:
+                start = max(start, planned)
+            if start is None:
+                start = datetime.now().toordinal()
+            early[key] = (start, start + duration, planned)
+        if not early:
+            return
+        finish = max(ef for _, ef, _ in early.values())
+        late = {}
+        for key in reversed(order):
+            es, ef, planned = early[key]
+            lf = min((late[s] for s in self.succs.get(key, ()) if s in late), default=finish)
+            ls = lf - (ef - es)
+            late[key] = ls
+            self.schedule[key] = {'es': es, 'ef': ef, 'ls': ls, 'lf': lf, 'slack': ls - es,
+                                  'critical': ls == es, 'slipped': planned is not None and es > planned}
+
+    def solve_around(self, keys):
+        """Re-solve each component containing one of `keys`, once"""
+        done = set()
+        for key in keys:
+            if key not in done:
+                nodes = self.component(key)
+                done |= nodes
+                self.solve(nodes)
+
+    def apply_changes(self, applied):
+        """Relink dependency edits and re-solve the components whose dates or links changed"""
+        touched = set()
+        for pid, tid, before, after in applied:
+            key = (pid, tid)
+            if after is None or before is None or 'depends_on' in (after or {}):
+                touched |= self.preds.get(key, set()) | self.succs.get(key, set())
+                touched.add(key)
+                for pred in list(self.preds.get(key, ())):
+                    self.unlink(pred, key)
+                if after is None:
+                    self.isolate(key)
+                    continue
+                for pred in self.task(key).get('depends_on') or ():
+                    self.link(tuple(pred), key)
+                    touched.add(tuple(pred))
+                if before is None:
+                    for succ in self.waiting.pop(key, ()):
+                        succ_task = self.task(succ)
+                        if succ_task and list(key) in [list(p) for p in succ_task.get('depends_on') or ()]:
+                            self.link(key, succ)
+            elif 'start_date' in after or 'end_date' in after:
+                touched.add(key)
+        self.solve_around(touched)
+
+    def drop_project(self, pid):
+        keys = {key for key in set(self.preds) | set(self.succs) if key[0] == pid}
+        neighbours = set()
+        for key in keys:
+            neighbours |= self.preds.get(key, set()) | self.succs.get(key, set())
+            self.isolate(key)
+            self.schedule.pop(key, None)
+            self.cycles.discard(key)
+            self.blocked.discard(key)
+        self.solve_around(neighbours - keys)
+
+    def critical(self, key):
+        entry = self.schedule.get(key)
+        return bool(entry and entry['critical'])
+
+
+class ChangeLog:
+    """Undo/redo history of transactions as their (pid, tid, before, after) deltas.
+    
+    An entry keeps only the fields a transaction changed (whole records just for
+    creations and deletions; tid None is the project record itself), so undoing a bulk
+    delete replays a single inverse transaction. Quick successive edits of the same
+    fields of the same tasks coalesce into one entry, until an undo or redo intervenes.
+    The history is bounded both by entry count and by the total number of deltas held.
+    """
+
+    def __init__(self, limit=100, max_deltas=100000, coalesce=1.5):
+        self.limit = limit
+        self.max_deltas = max_deltas
+        self.coalesce = coalesce
+        self.reset()
+
+    def reset(self):
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.deltas = 0
+        self.group = None
+        self.tail = None
+        self.replaying = False
+
+    @staticmethod
+    def shape(ops):
+        """What an update-only entry touches: (key, changed fields) per delta, or None"""
+        if any(before is None or after is None for _, _, before, after in ops):
+            return None
+        return [(pid, tid, tuple(sorted(after))) for pid, tid, before, after in ops]
+
+    def record(self, ops, now):
+        """Add one transaction's deltas, merging into the open group or a coalescible entry"""
+        if self.replaying or not ops:
+            return
+        self.redo_stack.clear()
+        if self.group is not None:
+            entry = self.tail = self.group
+            if not entry['ops']:
+                self.undo_stack.append(entry)
+        else:
+            last = self.tail
+            shape = self.shape(ops)
+            if (last is not None and shape is not None and now - last['time'] <= self.coalesce
+                    and shape == self.shape(last['ops'])):
+                # Same fields of the same tasks again: keep the first before, take the new after
+                last['ops'] = [(pid, tid, before, after) for (pid, tid, before, _), (_, _, _, after) in zip(last['ops'], ops)]
+                last['time'] = now
+                return
+            entry = self.tail = {'ops': [], 'time': now}
+            self.undo_stack.append(entry)
+        entry['ops'].extend(ops)
+        entry['time'] = now
+        self.deltas += len(ops)
+        while len(self.undo_stack) > 1 and (len(self.undo_stack) > self.limit or self.deltas > self.max_deltas):
+            self.deltas -= len(self.undo_stack.popleft()['ops'])
+
+    def begin(self):
+        if self.group is None:
+            self.group = {'ops': [], 'time': 0}
+
+    def end(self):
+        self.group = None
+
+    @staticmethod
+    def inverse(ops):
+        """Changes that revert `ops`, last delta first"""
+        changes = []
+        for pid, tid, before, after in reversed(ops):
+            changes.append((pid, tid, None if before is None else dict(before)))
+        return changes
+
+    @staticmethod
+    def forward(ops):
+        """Changes that re-apply `ops`"""
+        return [(pid, tid, None if after is None else dict(after)) for pid, tid, before, after in ops]
+
+    @staticmethod
+    def describe(ops):
+        """Short label for an entry, e.g. 'delete 500 tasks' or 'edit project P001'"""
+        projects = [op for op in ops if op[1] is None]
+        if projects:
+            pid, _, before, after = projects[0]
+            verb = 'create' if before is None else 'delete' if after is None else 'edit'
+            return f"{verb} project {pid}" if len(projects) == 1 else f"{verb} {len(projects)} projects"
+        count = len({op[:2] for op in ops})
+        noun = 'task' if count == 1 else 'tasks'
+        if all(before is None for _, _, before, _ in ops):
+            return f"add {count} {noun}"
+        if all(after is None for _, _, _, after in ops):
+            return f"delete {count} {noun}"
+        fields = sorted({field for _, _, before, after in ops if before and after for field in after})
+        return f"edit {', '.join(fields[:3])}{'...' if len(fields) > 3 else ''} of {count} {noun}"
+
+    def take_undo(self):
+        """Move the newest entry to the redo stack and return it, or None"""
+        if not self.undo_stack:
+            return None
+        entry = self.undo_stack.pop()
+        self.tail = None
+        self.deltas -= len(entry['ops'])
+        self.redo_stack.append(entry)
+        return entry
+
+    def take_redo(self):
+        if not self.redo_stack:
+            return None
+        entry = self.redo_stack.pop()
+        self.tail = None
+        self.undo_stack.append(entry)
+        self.deltas += len(entry['ops'])
+        return entry
+
+    @contextmanager
+    def replay(self):
+        """Apply an entry's changes without recording them as a new edit"""
+        self.replaying = True
+        try:
+            yield
+        finally:
+            self.replaying = False
+
+
+class HistoryStore:
+    """Point-in-time history of the workspace: compressed snapshots plus the deltas between them.
+    
+    History is kept in segments, each a gzip file that opens with a full snapshot and
+    grows by timestamped delta batches appended at every save. A new segment (and
+    snapshot) starts only after `segment_deltas` deltas, so storage follows the volume
+    of change rather than workspace size times the number of saves. Reconstructing a
+    moment reads a single segment: its snapshot replayed up to that moment. A segment
+    also records the `scope` (the open workspaces) it covers; opening or closing a
+    workspace starts a new snapshot, so deltas never land on a snapshot without their
+    projects.
+    """
+
+    def __init__(self, directory=None, segment_deltas=20000):
+        self.segment_deltas = segment_deltas
+        self.open(directory)
+
+    def open(self, directory, scope=None):
+        self.directory = directory
+        self.scope = scope
+        self.pending = []
+        self.segments = []
+        if directory and os.path.exists(os.path.join(directory, 'index.json')):
+            with open(os.path.join(directory, 'index.json'), 'r') as f:
+                self.segments = json.load(f)['segments']
+
+    def record(self, applied, moment):
+        """Queue one transaction's deltas for the next flush"""
+        self.pending.append((moment.isoformat(timespec='seconds'), [list(delta) for delta in applied]))
+
+    def flush(self, projects, tasks, moment=None):
+        """Append queued deltas to the open segment, starting a new snapshot segment when it is full"""
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        pending, self.pending = self.pending, []
+        rescoped = bool(self.segments) and self.segments[-1].get('scope') != self.scope
+        if self.segments and not rescoped:
+            if not pending:
+                return
+            segment = self.segments[-1]
+            with gzip.open(os.path.join(self.directory, segment['file']), 'at', encoding='utf-8') as f:
+                for stamp, deltas in pending:
+                    f.write(json.dumps({'t': stamp, 'deltas': deltas}) + '\n')
+            segment['deltas'] += sum(len(deltas) for _, deltas in pending)
+        if not self.segments or rescoped or self.segments[-1]['deltas'] >= self.segment_deltas:
+            # The current state already includes everything flushed so far
+            segment = {'file': f"segment-{len(self.segments) + 1:05d}.gz",
+                       'start': (moment or datetime.now()).isoformat(timespec='seconds'), 'deltas': 0}
+            if self.scope is not None:
+                segment['scope'] = self.scope
+            with gzip.open(os.path.join(self.directory, segment['file']), 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({'t': segment['start'], 'projects': projects, 'tasks': tasks}) + '\n')
+            self.segments.append(segment)
+        with open(os.path.join(self.directory, 'index.json'), 'w') as f:
+            json.dump({'segments': self.segments}, f)
+
+    @staticmethod
+    def apply(projects, tasks, delta):
+        """Replay one (pid, tid, before, after) delta onto plain dicts"""
+        pid, tid, before, after = delta
+        if tid is None:
+            records, key = projects, pid
+            if after is None:
+                tasks.pop(pid, None)
+            else:
+                tasks.setdefault(pid, {})
+        else:
+            records, key = tasks.setdefault(pid, {}), tid
+        if after is None:
+            records.pop(key, None)
+        elif before is None:
+            records[key] = dict(after)
+        else:
+            records.setdefault(key, {}).update(after)
+
+    def state_at(self, moment):
+        """(projects, tasks) as they stood at `moment`, or None if history starts later"""
+        stamp = moment.isoformat(timespec='seconds')
+        starts = [segment['start'] for segment in self.segments]
+        index = bisect.bisect_right(starts, stamp) - 1
+        if index < 0:
+            return None
+        projects = tasks = None
+        with gzip.open(os.path.join(self.directory, self.segments[index]['file']), 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record['t'] > stamp:
+                    break
+                if 'projects' in record:
+                    projects, tasks = record['projects'], record['tasks']
+                    continue
+                for delta in record['deltas']:
+                    self.apply(projects, tasks, delta)
+        return projects, tasks
+
+    @staticmethod
+    def diff(old, new, pid=None):
+        """Rows of (project, task, change, field, old value, new value) between two states"""
+        old_projects, old_tasks = old
+        new_projects, new_tasks = new
+        rows = []
+        for project in sorted(set(old_projects) | set(new_projects)):
+            if pid is not None and project != pid:
+                continue
+            before, after = old_projects.get(project), new_projects.get(project)
+            if before is None or after is None:
+                rows.append((project, '', 'project added' if before is None else 'project removed', '', '', ''))
+            else:
+                rows.extend((project, '', 'project changed', field, before.get(field), after.get(field))
+                            for field in sorted(set(before) | set(after)) if before.get(field) != after.get(field))
+            old_set, new_set = old_tasks.get(project, {}), new_tasks.get(project, {})
+            for tid in sorted(set(old_set) | set(new_set)):
+                before, after = old_set.get(tid), new_set.get(tid)
+                if before == after:
+                    continue
+                if before is None or after is None:
+                    task = after or before
+                    rows.append((project, tid, 'added' if before is None else 'removed', 'name', '', task.get('name')))
+                else:
+                    rows.extend((project, tid, 'changed', field, before.get(field), after.get(field))
+                                for field in sorted(set(before) | set(after)) if before.get(field) != after.get(field))
+        return rows
+
+
+class TimeLog:
+    """Append-only log of task timers and the actual minutes worked per task.
+    
+    Each line is 'S' or 'E', a minute stamp, the project ID and the task ID, tab
+    separated. A stop closes the open start of the same task into an entry, and a start
+    without a stop is a timer still running, so timers survive restarts. Entries are also
+    held as parallel start/end/task columns that reports aggregate as numpy arrays.
+    Projects of secondary workspaces are logged under their file's normalized path rather
+    than the 'name:pid' they are shown as, since the name depends on the opening order.
+    """
+
+    def __init__(self, path=None):
+        self.keys = []
+        self.index = {}
+        self.minutes = {}
+        self.open(path)
+
+    @staticmethod
+    def normalize(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def open(self, path, workspaces=None):
+        """Read the log at `path`; `workspaces` maps each secondary workspace name to its file"""
+        self.path = path
+        self.files = {name: self.normalize(file) for name, file in (workspaces or {}).items()}
+        self.names = {file: name for name, file in self.files.items()}
+        self.keys.clear()
+        self.index.clear()
+        self.minutes.clear()
+        self.starts, self.ends, self.owners = [], [], []
+        self.running = {}
+        self.columns = None
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) == 4 and parts[1].isdigit():
+                        self.replay(parts[0], int(parts[1]), (self.model_pid(parts[2]), parts[3]))
+
+    def model_pid(self, logged):
+        """Project ID in the model of a logged one; project IDs themselves never hold a ':'"""
+        file, _, bare = logged.rpartition(':')
+        return f"{self.names[file]}:{bare}" if file in self.names else logged
+
+    def logged_pid(self, pid):
+        name, _, bare = pid.rpartition(':')
+        return f"{self.files[name]}:{bare}" if name in self.files else pid
+
+    def replay(self, kind, stamp, key):
+        """Apply one log record; returns the minutes of the entry a stop closes"""
+        if kind == 'S':
+            self.running.setdefault(key, stamp)
+        elif kind == 'E' and key in self.running:
+            start = self.running.pop(key)
+            if key not in self.index:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+            self.starts.append(start)
+            self.ends.append(max(stamp, start))
+            self.owners.append(self.index[key])
+            self.minutes[key] = self.minutes.get(key, 0) + max(stamp - start, 0)
+            self.columns = None
+            return max(stamp - start, 0)
+        return None
+
+    def write(self, kind, stamp, key):
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{kind}\t{stamp}\t{self.logged_pid(key[0])}\t{key[1]}\n")
+        return self.replay(kind, stamp, key)
+
+    def start(self, key, stamp):
+        """Start a task's timer; False if it is already running"""
+        if key in self.running:
+            return False
+        self.write('S', stamp, key)
+        return True
+
+    def stop(self, key, stamp):
+        """Stop a task's timer; the minutes it ran, or None if it was not running"""
+        if key not in self.running:
+            return None
+        return self.write('E', stamp, key)
+
+    def entries(self):
+        """(start, end, task index) columns of every closed entry, cached until the next stop"""
+        if self.columns is None:
+            self.columns = tuple(np.array(column, dtype=np.int64) for column in (self.starts, self.ends, self.owners))
+        return self.columns
+
+
+class TaskQuery:
+    """Filter expression such as `priority:blue status:incomplete due<2026-11-01 project:P00* mandatory`
+
+    Terms are AND-ed; a leading `-` negates a term and bare words match the task name.
+    Parsed once into predicates; positive terms that map onto a TaskIndex narrow the
+    candidate set before the remaining predicates run.
+    """
+    FIELDS = ('priority', 'status', 'project', 'type', 'name', 'id', 'parent', 'start', 'end', 'due', 'on')
+    FLAGS = ('mandatory', 'leaf', 'overdue')
+    OPERATORS = ('<=', '>=', '<', '>', '=', ':')
+    PRIORITY_WORDS = {'blue': 0, 'most': 0, 'green': 1, 'important': 1, 'red': 2, 'average': 2}
+
+    def __init__(self, text):
+        self.text = text
+        self.terms = []
+        try:
+            words = shlex.split(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid query: {e}")
+        for word in words:
+            self.terms.append(self.parse_term(word))
+        self.compiled_for = None
+        self.predicates = []
+
+    def parse_term(self, word):
+        negate = word.startswith('-') and len(word) > 1
+        if negate:
+            word = word[1:]
+        
+        lowered = word.lower()
+        if lowered in self.FLAGS:
+            return (lowered, None, None, negate)
+        
+        for op in self.OPERATORS:
+            field, sep, value = word.partition(op)
+            if sep and field.lower() in self.FIELDS:
+                field = field.lower()
+                if field == 'due':
+                    field = 'end'
+                if field in ('start', 'end', 'on'):
+                    if field == 'on' and op not in (':', '='):
+                        raise ValueError(f"'on' only supports ':' in '{word}'")
+                    self.parse_date(value)
+                    op = '=' if op == ':' else op
+                elif op != ':':
+                    raise ValueError(f"Field '{field}' only supports ':' in '{word}'")
+                elif field == 'priority' and value.lower() not in self.PRIORITY_WORDS:
+                    raise ValueError(f"Unknown priority '{value}' (use blue, green or red)")
+                return (field, op, value if field in ('start', 'end', 'on') else value.lower(), negate)
+        
+        if ':' in word or '<' in word or '>' in word:
+            raise ValueError(f"Unknown query term '{word}'")
+        return ('text', None, lowered, negate)
+
+    @staticmethod
+    def parse_date(value, today=None):
+        """Resolve YYYY-MM-DD, `today`, `today+N` or `today-N` to an ISO date string"""
+        lowered = value.lower()
+        if lowered.startswith('today'):
+            offset = lowered[5:]
+            try:
+                days = int(offset) if offset else 0
+            except ValueError:
+                raise ValueError(f"Invalid relative date '{value}'")
+            return ((today or datetime.now().date()) + timedelta(days=days)).isoformat()
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+        except ValueError:
+            raise ValueError(f"Invalid date '{value}' (use YYYY-MM-DD)")
+
+    def candidates(self, index, projects, today):
+        """Intersect the index lookups of all positive indexable terms; None means scan"""
+        sets = []
+        for field, op, value, negate in self.terms:
+            if negate:
+                continue
+            if field == 'status':
+                sets.append(index.by_status.get(value, set()))
+            elif field == 'priority':
+                sets.append(index.by_priority.get(self.PRIORITY_WORDS[value], set()))
+            elif field == 'project':
+                matched = set()
+                for pid, project in projects.items():
+                    if self.glob(value, pid) or self.glob(value, project['name']):
+                        matched |= index.by_project.get(pid, set())
+                sets.append(matched)
+            elif field in ('start', 'end'):
+                sets.append(index.date_range(field, op, self.parse_date(value, today)))
+            elif field == 'on':
+                date = self.parse_date(value, today)
+                sets.append(index.date_range('start', '<=', date) & index.date_range('end', '>=', date))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+        return result
+
+    @staticmethod
+    def glob(pattern, value):
+        value = str(value).lower()
+        if any(c in pattern for c in '*?['):
+            return fnmatch.fnmatchcase(value, pattern)
+        return pattern in value
+
+    def compile(self, today):
+        """Build one predicate(pid, tid, task, project, index) per term; relative dates pin to `today`"""
+        if self.compiled_for == today:
+            return self.predicates
+        predicates = []
+        for field, op, value, negate in self.terms:
+            pred = self.compile_term(field, op, value, today)
+            predicates.append((lambda p: lambda *a: not p(*a))(pred) if negate else pred)
+        self.compiled_for, self.predicates = today, predicates
+        return predicates
+
+    def compile_term(self, field, op, value, today):
+        glob = self.glob
+        today_iso = today.isoformat()
+        if field == 'mandatory':
+            return lambda pid, tid, t, proj, idx: bool(t['mandatory'])
+        if field == 'leaf':
+            return lambda pid, tid, t, proj, idx: (pid, tid) not in idx.parents
+        if field == 'overdue':
+            return lambda pid, tid, t, proj, idx: t['status'] != 'Complete' and t['end_date'] < today_iso
+        if field == 'text':
+            return lambda pid, tid, t, proj, idx: value in t['name'].lower()
+        if field == 'status':
+            return lambda pid, tid, t, proj, idx: t['status'].lower() == value
+        if field == 'priority':
+            rank = self.PRIORITY_WORDS[value]
+            return lambda pid, tid, t, proj, idx: priority_rank(t['priority']) == rank
+        if field == 'project':
+            return lambda pid, tid, t, proj, idx: glob(value, pid) or glob(value, proj['name'])
+        if field == 'type':
+            return lambda pid, tid, t, proj, idx: glob(value, proj.get('type', ''))
+        if field == 'name':
+            return lambda pid, tid, t, proj, idx: glob(value, t['name'])
+        if field == 'id':
+            return lambda pid, tid, t, proj, idx: glob(value, tid)
+        if field == 'parent':
+            return lambda pid, tid, t, proj, idx: glob(value, t.get('parent') or '')
+        
+        date = self.parse_date(value, today)
+        if field == 'on':
+            return lambda pid, tid, t, proj, idx: t['start_date'] <= date <= t['end_date']
+        key = 'start_date' if field == 'start' else 'end_date'
+        if op == '<':
+            return lambda pid, tid, t, proj, idx: t[key] < date
+        if op == '<=':
+            return lambda pid, tid, t, proj, idx: t[key] <= date
+        if op == '>':
+            return lambda pid, tid, t, proj, idx: t[key] > date
+        if op == '>=':
+            return lambda pid, tid, t, proj, idx: t[key] >= date
+        return lambda pid, tid, t, proj, idx: t[key] == date
+
+    def run(self, projects, tasks, index, scope=None, today=None):
+        """Set of (pid, tid) keys matching the query, optionally limited to one project"""
+        today = today or datetime.now().date()
+        keys = self.candidates(index, projects, today)
+        if scope is not None:
+            scoped = index.by_project.get(scope, set())
+            keys = scoped if keys is None else keys & scoped
+        elif keys is None:
+            keys = index.all_keys()
+        
+        predicates = self.compile(today)
+        return {(pid, tid) for pid, tid in keys
+                if all(pred(pid, tid, tasks[pid][tid], projects[pid], index) for pred in predicates)}
+
+
+class CanvasPool:
+    """Canvas items reused across redraws instead of being deleted and recreated.
+    
+    Each spec names its item by a stable key, so a task's box is moved rather than redrawn
+    when the view changes. Specs outside the visible region get no item; spare items are
+    hidden on per-kind free lists and only coords/options that differ are sent to Tk.
+    """
+
+    CREATE = {'rect': 'create_rectangle', 'text': 'create_text', 'line': 'create_line'}
+    DEFAULTS = {
+        'rect': {'fill': '', 'outline': 'black', 'width': 1},
+        'text': {'text': '', 'font': ('Arial', 9), 'fill': 'black', 'anchor': 'center', 'width': 0},
+        'line': {'fill': 'black', 'width': 1}
+    }
+    LAYERS = ('calbg', 'calbox', 'caltext')
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.live = {}
+        self.kinds = {}
+        self.state = {}
+        self.free = defaultdict(list)
+        self.hidden = set()
+
+    @classmethod
+    def spec(cls, kind, key, coords, layer='calbg', **opts):
+        """Describe one item; the bounding box is what viewport culling tests against"""
+        merged = dict(cls.DEFAULTS[kind])
+        merged.update(opts)
+        if kind == 'text':
+            x, y = coords
+            reach = merged['width'] or 150
+            left = x if merged['anchor'] in ('nw', 'w', 'sw') else x - reach
+            bbox = (left, y - 20, x + reach, y + 20)
+        else:
+            bbox = (min(coords[0::2]), min(coords[1::2]), max(coords[0::2]), max(coords[1::2]))
+        return {'kind': kind, 'key': key, 'coords': tuple(coords), 'opts': merged,
+                'layer': layer, 'bbox': bbox, 'item': None}
+
+    def render(self, specs, view):
+        """Give every spec meeting `view` an item, reusing the one it had last time"""
+        x0, y0, x1, y1 = view
+        previous, self.live = self.live, {}
+        pending = []
+        for spec in specs:
+            bx0, by0, bx1, by1 = spec['bbox']
+            spec['item'] = None
+            if bx1 < x0 or bx0 > x1 or by1 < y0 or by0 > y1:
+                continue
+            item = previous.pop(spec['key'], None)
+            if item is not None and self.kinds[item] != (spec['kind'], spec['layer']):
+                self.free[self.kinds[item]].append(item)
+                item = None
+            if item is None:
+                pending.append(spec)
+            else:
+                self.place(item, spec)
+        for item in previous.values():
+            self.free[self.kinds[item]].append(item)
+        for spec in pending:
+            spare = self.free[(spec['kind'], spec['layer'])]
+            self.place(spare.pop() if spare else self.create(spec), spec)
+        for spare in self.free.values():
+            for item in spare:
+                if item not in self.hidden:
+                    self.canvas.itemconfigure(item, state='hidden')
+                    self.hidden.add(item)
+        if pending:
+            for layer in self.LAYERS[1:]:
+                self.canvas.tag_raise(layer)
+
+    def create(self, spec):
+        item = getattr(self.canvas, self.CREATE[spec['kind']])(*spec['coords'], tags=(spec['layer'],), **spec['opts'])
+        self.kinds[item] = (spec['kind'], spec['layer'])
+        self.state[item] = (spec['coords'], dict(spec['opts']))
+        return item
+
+    def place(self, item, spec):
+        """Point `item` at `spec`, sending Tk only what changed"""
+        spec['item'] = item
+        self.live[spec['key']] = item
+        coords, opts = self.state[item]
+        if coords != spec['coords']:
+            self.canvas.coords(item, *spec['coords'])
+        changed = {k: v for k, v in spec['opts'].items() if opts.get(k) != v}
+        if item in self.hidden:
+            self.hidden.discard(item)
+            changed['state'] = 'normal'
+        if changed:
+            self.canvas.itemconfigure(item, **changed)
+        self.state[item] = (spec['coords'], dict(spec['opts']))
+
+
+class SpatialGrid:
+    """Uniform grid over canvas boxes so hit tests only look at the cells they touch."""
+
+    def __init__(self, cell=100):
+        self.cell = cell
+        self.buckets = defaultdict(list)
+        self.count = 0
+
+    def cells(self, x0, y0, x1, y1):
+        c = self.cell
+        for cx in range(int(x0 // c), int(x1 // c) + 1):
+            for cy in range(int(y0 // c), int(y1 // c) + 1):
+                yield (cx, cy)
+
+    def insert(self, bbox, value):
+        entry = (self.count, bbox, value)
+        self.count += 1
+        for cell in self.cells(*bbox):
+            self.buckets[cell].append(entry)
+
+    def at(self, x, y):
+        """Values whose box contains the point, in insertion order"""
+        bucket = self.buckets.get((int(x // self.cell), int(y // self.cell)), ())
+        return [v for _, (x0, y0, x1, y1), v in bucket if x0 <= x <= x1 and y0 <= y <= y1]
+
+    def overlapping(self, bbox):
+        """Values whose box meets `bbox`, each once, in insertion order"""
+        rx0, ry0, rx1, ry1 = bbox
+        found = {}
+        for cell in self.cells(*bbox):
+            for seq, (x0, y0, x1, y1), value in self.buckets.get(cell, ()):
+                if x0 <= rx1 and x1 >= rx0 and y0 <= ry1 and y1 >= ry0:
+                    found[seq] = value
+        return [found[seq] for seq in sorted(found)]
+
+
+class GanttLayout:
+    """Gantt rows of one project precomputed from a hierarchy walk.
+    
+    `rows` hold (tid, depth, start_day, end_day, subtree_size) in pre-order with bar
+    geometry in days from `origin` (end exclusive), so rendering only scales and clips.
+    """
+
+    def __init__(self, walk, tasks, project=None):
+        self.rows = []
+        ordinals = []
+        for tid, parent, depth in walk.order:
+            task = tasks[tid]
+            try:
+                start = datetime.fromisoformat(task['start_date']).toordinal()
+                end = datetime.fromisoformat(task['end_date']).toordinal() + 1
+            except ValueError:
+                start = end = None
+            else:
+                ordinals += (start, end)
+            self.rows.append([tid, depth, start, end, walk.size[tid]])
+        if not ordinals and project:
+            try:
+                ordinals = [datetime.fromisoformat(project['start']).toordinal(),
+                            datetime.fromisoformat(project['end']).toordinal() + 1]
+            except (ValueError, KeyError):
+                pass
+        if not ordinals:
+            ordinals = [datetime.now().toordinal()] * 2
+        # A little slack on both sides so edge bars are not flush with the chart border
+        self.origin = min(ordinals) - 3
+        self.days = max(ordinals) + 3 - self.origin
+        for row in self.rows:
+            if row[2] is not None:
+                row[2] -= self.origin
+                row[3] -= self.origin
+
+    def visible(self, collapsed):
+        """Indices of rows not hidden under a collapsed ancestor, skipping whole subtrees"""
+        shown = []
+        i = 0
+        while i < len(self.rows):
+            shown.append(i)
+            tid, size = self.rows[i][0], self.rows[i][4]
+            i += size if tid in collapsed else 1
+        return shown
+
+
+def workspace_name(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def read_workspace(path, name, primary):
+    """Parse one workspace file for the combined model; runs in a worker process.
+    
+    Project IDs of every workspace but the primary one are namespaced as 'name:pid'. Files
+    store their own IDs bare and links into other workspaces qualified with the owner's name.
+    """
+    if not os.path.exists(path):
+        return {}, {}, {}
+    with open(path, 'r') as f:
+        data = json.load(f)
+    # Reject anything that is not shaped like a workspace before the model is touched
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} is not a workspace file")
+    projects, tasks, settings = data.get('projects', {}), data.get('tasks', {}), data.get('settings', {})
+    if not (isinstance(projects, dict) and isinstance(tasks, dict) and isinstance(settings, dict)
+            and all(isinstance(project, dict) for project in projects.values())
+            and all(isinstance(project_tasks, dict) and all(isinstance(task, dict) for task in project_tasks.values())
+                    for project_tasks in tasks.values())):
+        raise ValueError(f"{path} is not a workspace file")
+    if name == primary:
+        # The primary workspace's IDs are the model's IDs already
+        return projects, tasks, settings
+
+    def qualify(pid):
+        if ':' in pid:
+            owner, bare = pid.split(':', 1)
+            return bare if owner == primary else pid
+        return f"{name}:{pid}"
+
+    projects = {qualify(pid): dict(project, id=qualify(project.get('id', pid))) for pid, project in projects.items()}
+    tasks = {qualify(pid): {tid: dict(task, depends_on=[[qualify(p), t] for p, t in task['depends_on']])
+                            if task.get('depends_on') else task for tid, task in project_tasks.items()}
+             for pid, project_tasks in tasks.items()}
+    return projects, tasks, settings
+
+
+def deep_size(value, seen=None):
+    """Bytes held by a tree of dicts, lists and scalars, counting shared objects once"""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def count_tk_items(widget, counts=None):
+    """Live items per widget path: Treeview rows, Canvas items and Listbox entries"""
+    if counts is None:
+        counts = {}
+    if isinstance(widget, ttk.Treeview):
+        stack, total = [''], 0
+        while stack:
+            children = widget.get_children(stack.pop())
+            total += len(children)
+            stack.extend(children)
+        counts[str(widget)] = total
+    elif isinstance(widget, tk.Canvas):
+        counts[str(widget)] = len(widget.find_all())
+    elif isinstance(widget, tk.Listbox):
+        counts[str(widget)] = widget.size()
+    for child in widget.winfo_children():
+        count_tk_items(child, counts)
+    return counts
+
+
+def compare_memory_reports(baseline, current, tolerance=0.1):
+    """Regressions of `current` against `baseline`: per-task model bytes and per-phase
+    allocations that grew by more than `tolerance` (a fraction)"""
+    regressions = []
+    checks = [('bytes_per_task', baseline.get('bytes_per_task'), current.get('bytes_per_task'))]
+    for label, phase in current.get('phases', {}).items():
+        old = baseline.get('phases', {}).get(label)
+        if old and baseline.get('tasks') and current.get('tasks'):
+            checks.append((f"{label} bytes per task", old['peak'] / baseline['tasks'], phase['peak'] / current['tasks']))
+    for name, old, new in checks:
+        if old and new and new > old * (1 + tolerance):
+            regressions.append({'measure': name, 'baseline': round(old, 1), 'current': round(new, 1),
+                                'change': f"{(new / old - 1) * 100:+.1f}%"})
+    return regressions
+
+
+class MemoryDiagnostics:
+    """tracemalloc measurements around the expensive phases of the app, written as a JSON report.
+    
+    Wrapped phases record calls, net and peak bytes traced per call; the first call of each
+    also keeps the top allocation sites from a snapshot diff (later calls skip snapshots,
+    which are costly on a large heap). The report adds per-task model size and live Tk item
+    counts, and lists regressions against the previous report at the same path.
+    """
+
+    def __init__(self, path, frames=5):
+        self.path = path
+        self.phases = {}
+        # Peaks seen by the phases running now, innermost last; a nested phase resets the
+        # traced peak, so it hands what it saw back to the phase around it
+        self.peaks = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def wrap(self, label, function):
+        def measured(*args, **kwargs):
+            first = label not in self.phases
+            before = tracemalloc.take_snapshot() if first else None
+            start, peak = tracemalloc.get_traced_memory()
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            self.peaks.append(0)
+            tracemalloc.reset_peak()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self.peaks.pop())
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                phase = self.phases.setdefault(label, {'calls': 0, 'net': 0, 'peak': 0, 'top': []})
+                phase['calls'] += 1
+                phase['net'] += current - start
+                phase['peak'] = max(phase['peak'], peak - start)
+                if first:
+                    stats = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+                    phase['top'] = [{'site': str(stat.traceback[0]), 'bytes': stat.size_diff, 'blocks': stat.count_diff}
+                                    for stat in stats[:10]]
+        return measured
+
+    def report(self, projects, tasks, root):
+        task_count = sum(len(project_tasks) for project_tasks in tasks.values())
+        model = deep_size(projects) + deep_size(tasks)
+        current, peak = tracemalloc.get_traced_memory()
+        items = count_tk_items(root)
+        return {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'projects': len(projects),
+            'tasks': task_count,
+            'model_bytes': model,
+            'bytes_per_task': model / task_count if task_count else 0,
+            'traced_bytes': current,
+            'traced_peak': peak,
+            'phases': self.phases,
+            'tk_items': dict(sorted(items.items(), key=lambda item: -item[1])),
+            'tk_items_total': sum(items.values()),
+        }
+
+    def write(self, projects, tasks, root):
+        """Write the report, comparing it with the one it replaces; returns the regressions"""
+        report = self.report(projects, tasks, root)
+        baseline = None
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    baseline = json.load(f)
+            except ValueError:
+                baseline = None
+        report['regressions'] = compare_memory_reports(baseline, report) if baseline else []
+        with open(self.path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report['regressions']
+
 
 class ProjectTaskManager:
-    def __init__(self, root):
+    def __init__(self, root, workspaces=(), diagnostics=None):
         self.root = root
         self.root.title("Project & Task Management System")
         self.root.geometry("1400x950")
         
+        # Diagnostics mode: tracemalloc around loading, full refreshes and calendar renders
+        self.diagnostics = MemoryDiagnostics(diagnostics) if diagnostics else None
+        self.memory_regressions = []
+        if self.diagnostics:
+            for name in ('load_data', 'refresh_all_tabs', 'apply_calendar_filter', 'render_calendar', 'render_gantt'):
+                setattr(self, name, self.diagnostics.wrap(name, getattr(self, name)))
+            root.protocol('WM_DELETE_WINDOW', lambda: self.write_diagnostics(quit_after=True))
+        
         # Data storage
         self.projects = {}
         self.tasks = {}
         self.data_file = "project_data.json"
+        self.data_version = 0
+        
+        # Workspace files shown together; projects of all but the primary one are 'name:pid'
+        self.primary_workspace = workspace_name(self.data_file)
+        self.workspaces = OrderedDict([(self.primary_workspace, self.data_file)])
+        self.workspace_settings = {}
+        for path in workspaces:
+            self.add_workspace(path)
+        
+        # Query language: parsed queries, result cache and the index behind it
+        self.compiled_queries = {}
+        self.query_results = OrderedDict()
+        self.calendar_layouts = OrderedDict()
+        self.task_index = None
+        
+        # Deferred work and API requests from the server thread
+        self.refresh_pending = False
+        self.save_pending = False
+        self.api_queue = queue.Queue()
+        self.api_server = None
+        
+        # Callables receiving the (pid, tid, before, after) deltas of each transaction
+        self.change_listeners = []
+        self.batch_depth = 0
+        self.batch_dirty = False
+        self.change_log = ChangeLog()
+        self.history = HistoryStore()
+        
+        # Parent -> children index kept in step with every transaction
+        self.hierarchy = HierarchyIndex(self.tasks)
+        self.change_listeners.append(self.hierarchy.apply_changes)
+        self.time_log = TimeLog()
+        self.rollup = ProgressRollup(self.hierarchy, self.time_log.minutes)
+        self.change_listeners.append(self.rollup.apply_changes)
+        self.today_view = TodayView(self.projects, self.tasks, self.hierarchy)
+        self.change_listeners.append(lambda applied: self.today_view.apply_changes(applied, self.data_version))
+        self.today_items = {}
+        self.today_keys = {}
+        self.today_conflicts = set()
+        
+        # Committed minutes per day against the daily limit (saved with the data)
+        self.settings = {'daily_limit_minutes': 480, 'work_start': '08:00', 'work_end': '18:00',
+                         'reminder_lead_minutes': 15, 'orphans_swept': False}
+        self.capacity = CapacityPlanner(self.tasks, self.hierarchy)
+        self.change_listeners.append(self.capacity.apply_changes)
+        
+        # Tasks per day for the Calendar Filter date picker, marked a month at a time
+        self.density = DayDensity(self.tasks, self.hierarchy)
+        self.change_listeners.append(self.density.apply_changes)
+        self.density_events = {}
+        self.density_months = set()
+        
+        # Finish-to-start links with earliest/latest starts and the critical path
+        self.dependencies = DependencyGraph(self.tasks)
+        self.change_listeners.append(self.dependencies.apply_changes)
+        
+        # Reminders: one timer armed for the earliest upcoming or overdue event
+        self.reminders = ReminderQueue(self.tasks, self.hierarchy)
+        self.change_listeners.append(self.on_reminder_changes)
+        self.reminder_timer = None
+        self.reminder_due = None
+        
+        # Typed column sort keys per task, dropped when a transaction touches the task
+        self.sort_field_cache = {}
+        self.sort_cache_version = 0
+        self.change_listeners.append(self.drop_sort_fields)
+        self.tree_sorters = {}
         
         # Load existing data
         self.load_data()
         
+        # Edit menu: undo/redo over the change log (Ctrl+Z, Ctrl+Y / Ctrl+Shift+Z)
+        menubar = tk.Menu(root)
+        self.edit_menu = tk.Menu(menubar, tearoff=0, postcommand=self.update_edit_menu)
+        self.edit_menu.add_command(label="Undo", command=self.undo, accelerator="Ctrl+Z")
+        self.edit_menu.add_command(label="Redo", command=self.redo, accelerator="Ctrl+Y")
+        menubar.add_cascade(label="Edit", menu=self.edit_menu)
+        workspace_menu = tk.Menu(menubar, tearoff=0)
+        workspace_menu.add_command(label="Open Workspace...", command=self.open_workspace)
+        workspace_menu.add_command(label="Close Workspace...", command=self.close_workspace)
+        workspace_menu.add_command(label="Workspace Report", command=self.show_workspace_report)
+        menubar.add_cascade(label="Workspaces", menu=workspace_menu)
+        root.config(menu=menubar)
+        for sequence, command in (('<Control-z>', self.undo), ('<Control-y>', self.redo), ('<Control-Z>', self.redo)):
+            root.bind_all(sequence, command)
+        
         # Create notebook (tabs)
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
@@ -32,9 +2656,18 @@ class ProjectTaskManager:
         self.create_edit_tab()
         self.create_progress_tab()
         self.create_calendar_filter_tab()
+        self.create_gantt_tab()
         
         # Auto-save every 30 seconds
         self.auto_save()
+        
+        # Report tasks left behind by older versions' non-recursive delete, once per data
+        # file; later checks are left to the Find Orphans button
+        if not self.settings['orphans_swept']:
+            self.settings['orphans_swept'] = True
+            self.schedule_save()
+            if self.sweep_orphans():
+                self.root.after_idle(lambda: self.sweep_orphans(report=True))
     
     def create_project_tab(self):
         """Tab 1: Create/Manage Projects"""
@@ -95,12 +2728,12 @@ class ProjectTaskManager:
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
         # Treeview for projects
-        columns = ('ID', 'Name', 'Type', 'Start', 'End')
+        columns = ('ID', 'Name', 'Type', 'Start', 'End', 'Progress', 'Mandatory Open', 'Hours')
         self.project_tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
         
         for col in columns:
             self.project_tree.heading(col, text=col)
-            self.project_tree.column(col, width=150,)
+            self.project_tree.column(col, width=150 if col in ('ID', 'Name', 'Type', 'Start', 'End') else 110,)
         
         scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.project_tree.yview)
         self.project_tree.configure(yscrollcommand=scrollbar.set)
@@ -206,9 +2839,12 @@ class ProjectTaskManager:
         self.task_comments = tk.Text(form_frame, width=40, height=3)
         self.task_comments.grid(row=9, column=1, pady=5, padx=10)
         
+        # Repeat: a recurring task is stored once and expanded per view
+        self.task_recurrence, self.set_task_recurrence = self.recurrence_fields(form_frame, 10)
+        
         # Buttons
         btn_frame = ttk.Frame(form_frame)
-        btn_frame.grid(row=10, column=0, columnspan=2, pady=20)
+        btn_frame.grid(row=11, column=0, columnspan=2, pady=20)
         
         ttk.Button(btn_frame, text="Add Task", command=self.add_task).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Clear Form", command=self.clear_task_form).pack(side='left', padx=5)
@@ -234,6 +2870,74 @@ class ProjectTaskManager:
             self.time_in_label.config(foreground='black')
             self.time_out_label.config(foreground='black')
     
+    def recurrence_fields(self, parent, row, rule=None):
+        """Grid the repeat controls into `parent` at `row`. Returns (get_rule, set_rule):
+        get_rule gives the chosen rule (None for a one-off task) or raises ValueError"""
+        ttk.Label(parent, text="Repeat:").grid(row=row, column=0, sticky='nw', pady=5)
+        frame = ttk.Frame(parent)
+        frame.grid(row=row, column=1, pady=5, padx=10, sticky='w')
+        
+        freq_frame = ttk.Frame(frame)
+        freq_frame.pack(anchor='w')
+        freq_combo = ttk.Combobox(freq_frame, width=10, state='readonly', values=('Never',) + tuple(f.capitalize() for f in RECURRENCE_FREQS))
+        freq_combo.pack(side='left')
+        ttk.Label(freq_frame, text="every").pack(side='left', padx=5)
+        interval_spin = ttk.Spinbox(freq_frame, from_=1, to=99, width=4)
+        interval_spin.pack(side='left')
+        
+        weekday_frame = ttk.Frame(frame)
+        weekday_frame.pack(anchor='w')
+        weekday_vars = []
+        for name in WEEKDAY_NAMES:
+            var = tk.BooleanVar()
+            ttk.Checkbutton(weekday_frame, text=name, variable=var).pack(side='left')
+            weekday_vars.append(var)
+        
+        end_frame = ttk.Frame(frame)
+        end_frame.pack(anchor='w')
+        ttk.Label(end_frame, text="Ends:").pack(side='left')
+        end_combo = ttk.Combobox(end_frame, width=8, state='readonly', values=('Never', 'On', 'After'))
+        end_combo.pack(side='left', padx=5)
+        until_entry = DateEntry(end_frame, width=12)
+        until_entry.pack(side='left')
+        count_spin = ttk.Spinbox(end_frame, from_=1, to=999, width=4)
+        count_spin.pack(side='left', padx=5)
+        ttk.Label(end_frame, text="times").pack(side='left')
+        
+        def get_rule():
+            freq = freq_combo.get().lower()
+            if freq == 'never':
+                return None
+            try:
+                interval = int(interval_spin.get())
+                count = int(count_spin.get()) if end_combo.get() == 'After' else None
+            except ValueError:
+                raise ValueError("Repeat interval and count must be whole numbers")
+            if interval < 1 or (count is not None and count < 1):
+                raise ValueError("Repeat interval and count must be at least 1")
+            chosen = {'freq': freq, 'interval': interval}
+            if freq == 'weekly':
+                chosen['weekdays'] = [day for day, var in enumerate(weekday_vars) if var.get()]
+            if end_combo.get() == 'On':
+                chosen['until'] = until_entry.get_date().strftime('%Y-%m-%d')
+            elif count is not None:
+                chosen['count'] = count
+            return chosen
+        
+        def set_rule(rule):
+            rule = rule or {}
+            freq_combo.set(rule['freq'].capitalize() if rule.get('freq') else 'Never')
+            interval_spin.set(rule.get('interval', 1))
+            for day, var in enumerate(weekday_vars):
+                var.set(day in rule.get('weekdays', ()))
+            end_combo.set('On' if rule.get('until') else 'After' if rule.get('count') else 'Never')
+            if rule.get('until'):
+                until_entry.set_date(datetime.strptime(rule['until'], '%Y-%m-%d'))
+            count_spin.set(rule.get('count') or 10)
+        
+        set_rule(rule)
+        return get_rule, set_rule
+    
     def create_edit_tab(self):
         """Tab 3: Edit Tasks"""
         tab = ttk.Frame(self.notebook)
@@ -248,12 +2952,22 @@ class ProjectTaskManager:
         self.edit_project_select.pack(side='left', padx=5)
         self.edit_project_select.bind('<<ComboboxSelected>>', self.on_project_select_edit)
         
+        ttk.Label(select_frame, text="Query:").pack(side='left', padx=(20, 5))
+        self.edit_query = ttk.Entry(select_frame, width=45)
+        self.edit_query.pack(side='left', padx=5)
+        self.edit_query.bind('<Return>', self.on_project_select_edit)
+        ttk.Button(select_frame, text="Apply",
+                  command=lambda: self.on_project_select_edit(None)).pack(side='left', padx=5)
+        ttk.Button(select_frame, text="Clear", 
+                  command=lambda: self.clear_query(self.edit_query, self.on_project_select_edit)).pack(side='left', padx=5)
+        
         # Tasks List
         list_frame = ttk.LabelFrame(tab, text="Tasks", padding=20)
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
         columns = ('Task', 'Priority', 'Mandatory', 'Start', 'End', 'Status')
-        self.edit_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings', height=22)
+        self.edit_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings', height=22,
+                                      selectmode='extended')
         
         self.edit_tree.heading('#0', text='Task ID')
         self.edit_tree.column('#0', width=80, anchor='center')
@@ -264,6 +2978,7 @@ class ProjectTaskManager:
         for col in columns:
             self.edit_tree.heading(col, text=col)
             self.edit_tree.column(col, width=col_widths.get(col, 120), anchor='center')
+        self.tree_sorters[self.edit_tree] = TreeSorter(self.edit_tree, self.task_sort_columns(), self.sort_fields)
         
         scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.edit_tree.yview)
         self.edit_tree.configure(yscrollcommand=scrollbar.set)
@@ -278,8 +2993,25 @@ class ProjectTaskManager:
         ttk.Button(btn_frame, text="Edit Selected Task", command=self.edit_task).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Mark Complete", command=self.mark_complete).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Mark Incomplete", command=self.mark_incomplete).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Set Priority", command=self.reprioritize_selected).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Reschedule", command=self.reschedule_selected).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Auto-Schedule", command=self.auto_schedule_selected).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Dependencies", command=self.edit_dependencies_selected).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Delete Task", command=self.delete_task).pack(side='left', padx=5)
         
+        subtree_frame = ttk.Frame(list_frame)
+        subtree_frame.pack(pady=(0, 10))
+        
+        ttk.Label(subtree_frame, text="With subtasks:").pack(side='left', padx=5)
+        ttk.Button(subtree_frame, text="Complete Subtree", 
+                  command=self.complete_subtree_selected).pack(side='left', padx=5)
+        ttk.Button(subtree_frame, text="Duplicate", 
+                  command=self.duplicate_selected).pack(side='left', padx=5)
+        ttk.Button(subtree_frame, text="Move to Project", 
+                  command=self.move_selected).pack(side='left', padx=5)
+        ttk.Button(subtree_frame, text="Find Orphans", 
+                  command=lambda: self.sweep_orphans(report=True)).pack(side='left', padx=5)
+        
         self.update_edit_project_list()
     
     def create_progress_tab(self):
@@ -295,9 +3027,15 @@ class ProjectTaskManager:
         self.progress_project_select = ttk.Combobox(filter_frame, width=40, state='readonly')
         self.progress_project_select.pack(side='left', padx=5)
         
+        ttk.Label(filter_frame, text="Query:").pack(side='left', padx=5)
+        self.progress_query = ttk.Entry(filter_frame, width=35)
+        self.progress_query.pack(side='left', padx=5)
+        self.progress_query.bind('<Return>', lambda e: self.show_progress())
+        
         ttk.Button(filter_frame, text="Show Progress", command=self.show_progress).pack(side='left', padx=10)
         ttk.Button(filter_frame, text="Export to CSV", command=self.export_csv).pack(side='left', padx=5)
         ttk.Button(filter_frame, text="Import from CSV", command=self.import_csv).pack(side='left', padx=5)
+        ttk.Button(filter_frame, text="History", command=self.show_history).pack(side='left', padx=5)
         
         # Progress Display
         display_frame = ttk.LabelFrame(tab, text="Project Progress", padding=20)
@@ -321,6 +3059,7 @@ class ProjectTaskManager:
         for col in columns:
             self.progress_tree.heading(col, text=col)
             self.progress_tree.column(col, width=col_widths.get(col, 120), anchor='center')
+        self.tree_sorters[self.progress_tree] = TreeSorter(self.progress_tree, self.task_sort_columns(), self.sort_fields)
         
         scrollbar = ttk.Scrollbar(display_frame, orient='vertical', command=self.progress_tree.yview)
         self.progress_tree.configure(yscrollcommand=scrollbar.set)
@@ -334,6 +3073,7 @@ class ProjectTaskManager:
         """Tab 5: Today's Tasks with Analog Clock"""
         tab = ttk.Frame(self.notebook)
         self.notebook.add(tab, text="Today's Tasks")
+        self.today_tab = tab
         
         # Top frame for clock and date
         top_frame = ttk.Frame(tab)
@@ -366,8 +3106,53 @@ class ProjectTaskManager:
         self.today_month_year_label = ttk.Label(date_frame, text="", font=('Arial', 14))
         self.today_month_year_label.pack(pady=5)
         
+        self.today_overall_label = ttk.Label(date_frame, text="", font=('Arial', 11))
+        self.today_overall_label.pack(pady=5)
+        
+        # Capacity: committed hours against the daily limit
+        capacity_frame = ttk.Frame(date_frame)
+        capacity_frame.pack(pady=5)
+        self.today_capacity_label = ttk.Label(capacity_frame, text="", font=('Arial', 11))
+        self.today_capacity_label.pack(side='left', padx=5)
+        ttk.Label(capacity_frame, text="Daily limit (h):").pack(side='left', padx=5)
+        self.daily_limit_spin = ttk.Spinbox(capacity_frame, from_=0.5, to=24, increment=0.5, width=5)
+        self.daily_limit_spin.set(self.settings['daily_limit_minutes'] / 60)
+        self.daily_limit_spin.pack(side='left')
+        ttk.Button(capacity_frame, text="Set", command=self.set_daily_limit).pack(side='left', padx=5)
+        
         # Refresh button
-        ttk.Button(date_frame, text="Refresh Tasks", command=self.refresh_today_tasks).pack(pady=10)
+        ttk.Button(date_frame, text="Refresh Tasks", 
+                  command=lambda: self.refresh_today_tasks(force=True)).pack(pady=10)
+        
+        # Reminders (right side): notifications as they fire, newest first
+        reminder_frame = ttk.LabelFrame(top_frame, text="Reminders", padding=10)
+        reminder_frame.pack(side='left', padx=10, fill='both')
+        self.overdue_label = ttk.Label(reminder_frame, text="", font=('Arial', 11, 'bold'), foreground='red')
+        self.overdue_label.pack(anchor='w')
+        self.notification_list = tk.Listbox(reminder_frame, width=50, height=8)
+        self.notification_list.pack(fill='both', expand=True, pady=5)
+        lead_frame = ttk.Frame(reminder_frame)
+        lead_frame.pack(fill='x')
+        ttk.Label(lead_frame, text="Remind (min before):").pack(side='left')
+        self.reminder_lead_spin = ttk.Spinbox(lead_frame, from_=0, to=240, increment=5, width=5)
+        self.reminder_lead_spin.set(self.settings['reminder_lead_minutes'])
+        self.reminder_lead_spin.pack(side='left', padx=5)
+        ttk.Button(lead_frame, text="Set", command=self.set_reminder_lead).pack(side='left')
+        ttk.Button(lead_frame, text="Overdue...", command=self.show_overdue_tasks).pack(side='left', padx=5)
+        ttk.Button(lead_frame, text="Clear", command=lambda: self.notification_list.delete(0, 'end')).pack(side='left')
+        
+        # Timers (right side): running task timers, kept in the time log across restarts
+        timer_frame = ttk.LabelFrame(top_frame, text="Timers", padding=10)
+        timer_frame.pack(side='left', padx=10, fill='both')
+        self.timer_list = tk.Listbox(timer_frame, width=40, height=8, selectmode='extended')
+        self.timer_list.pack(fill='both', expand=True)
+        self.timer_keys = []
+        self.timer_minute = None
+        timer_buttons = ttk.Frame(timer_frame)
+        timer_buttons.pack(fill='x', pady=(5, 0))
+        ttk.Button(timer_buttons, text="Start", command=self.start_timers).pack(side='left')
+        ttk.Button(timer_buttons, text="Stop", command=self.stop_timers).pack(side='left', padx=5)
+        ttk.Button(timer_buttons, text="Report...", command=self.show_time_report).pack(side='left')
         
         # Tasks display
         tasks_frame = ttk.LabelFrame(tab, text="Tasks & Subtasks for Today (Sorted by Importance)", padding=20)
@@ -379,7 +3164,8 @@ class ProjectTaskManager:
         
         # Tasks tree - simplified columns
         columns = ('Project ID', 'Task/Subtask Name', 'Time', 'Importance')
-        self.today_tree = ttk.Treeview(tasks_frame, columns=columns, show='headings', height=22)
+        self.today_tree = ttk.Treeview(tasks_frame, columns=columns, show='headings', height=22,
+                                       selectmode='extended')
         
         # Set column widths and center alignment
         self.today_tree.column('Project ID', width=100, anchor='center')
@@ -392,6 +3178,9 @@ class ProjectTaskManager:
         self.today_tree.heading('Task/Subtask Name', text='Task/Subtask Name')
         self.today_tree.heading('Time', text='Time')
         self.today_tree.heading('Importance', text='Importance')
+        self.tree_sorters[self.today_tree] = TreeSorter(self.today_tree, {
+            'Project ID': 'project', 'Task/Subtask Name': 'name', 'Time': 'time', 'Importance': 'priority'
+        }, self.sort_fields)
         
         scrollbar = ttk.Scrollbar(tasks_frame, orient='vertical', command=self.today_tree.yview)
         self.today_tree.configure(yscrollcommand=scrollbar.set)
@@ -411,7 +3200,10 @@ class ProjectTaskManager:
         # Start clock update
         self.update_clock()
         self.update_today_date()
+        self.show_timers()
         self.refresh_today_tasks()
+        self.arm_reminders()
+        self.show_overdue_badge()
     
     def create_calendar_filter_tab(self):
         """Tab 6: Calendar Filter View"""
@@ -427,6 +3219,10 @@ class ProjectTaskManager:
         self.filter_calendar = Calendar(filter_frame, selectmode='day', 
                                        date_pattern='yyyy-mm-dd')
         self.filter_calendar.grid(row=1, column=0, rowspan=3, padx=10, pady=5)
+        for rank, color in enumerate(('lightblue', 'lightgreen', 'lightcoral', 'lightgray')):
+            self.filter_calendar.tag_config(f'density{rank}', background=color, foreground='black')
+        self.filter_calendar.bind('<<CalendarMonthChanged>>', lambda e: self.show_month_density())
+        self.show_month_density()
         
         # Filter type
         ttk.Label(filter_frame, text="Filter Type:", font=('Arial', 11)).grid(row=0, column=1, sticky='w', padx=20)
@@ -438,10 +3234,12 @@ class ProjectTaskManager:
                        value="week").grid(row=2, column=1, sticky='w', padx=20)
         ttk.Radiobutton(filter_frame, text="Month (Week x Day Grid)", variable=self.filter_type, 
                        value="month").grid(row=3, column=1, sticky='w', padx=20)
+        ttk.Radiobutton(filter_frame, text="Year (Load Heatmap)", variable=self.filter_type, 
+                       value="year").grid(row=4, column=1, sticky='w', padx=20)
         
         # Apply button
         ttk.Button(filter_frame, text="Apply Filter", command=self.apply_calendar_filter,
-                  style='Accent.TButton').grid(row=4, column=0, columnspan=2, pady=20)
+                  style='Accent.TButton').grid(row=5, column=0, columnspan=2, pady=20)
         
         # Results frame
         results_frame = ttk.LabelFrame(tab, text="Filtered Tasks", padding=20)
@@ -457,9 +3255,16 @@ class ProjectTaskManager:
         canvas_frame.pack(fill='both', expand=True)
         
         self.calendar_canvas = tk.Canvas(canvas_frame, bg='white')
-        v_scrollbar = ttk.Scrollbar(canvas_frame, orient='vertical', command=self.calendar_canvas.yview)
-        h_scrollbar = ttk.Scrollbar(canvas_frame, orient='horizontal', command=self.calendar_canvas.xview)
+        v_scrollbar = ttk.Scrollbar(canvas_frame, orient='vertical', 
+                                    command=lambda *args: self.scroll_calendar(self.calendar_canvas.yview, *args))
+        h_scrollbar = ttk.Scrollbar(canvas_frame, orient='horizontal', 
+                                    command=lambda *args: self.scroll_calendar(self.calendar_canvas.xview, *args))
         self.calendar_canvas.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.calendar_canvas.bind('<Configure>', lambda e: self.schedule_calendar_render())
+        self.calendar_canvas.bind('<ButtonPress-1>', self.on_calendar_click)
+        self.calendar_canvas.bind('<Control-ButtonPress-1>', lambda e: self.on_calendar_click(e, extend=True))
+        self.calendar_canvas.bind('<B1-Motion>', self.on_calendar_drag)
+        self.calendar_canvas.bind('<ButtonRelease-1>', self.on_calendar_release)
         
         self.calendar_canvas.grid(row=0, column=0, sticky='nsew')
         v_scrollbar.grid(row=0, column=1, sticky='ns')
@@ -476,12 +3281,86 @@ class ProjectTaskManager:
                   command=self.mark_filter_complete).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Mark Incomplete", 
                   command=self.mark_filter_incomplete).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Set Priority", 
+                  command=lambda: self.bulk_filter_action(self.bulk_reprioritize)).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Reschedule", 
+                  command=lambda: self.bulk_filter_action(self.bulk_reschedule)).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Auto-Schedule", 
+                  command=lambda: self.bulk_filter_action(self.auto_schedule)).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Export Filtered to CSV", 
                   command=self.export_filtered_csv).pack(side='left', padx=5)
         
-        # Store tasks for selection
-        self.calendar_tasks = []
-        self.selected_calendar_task = None
+        # Items are pooled across redraws; calendar_rows holds the filtered tasks and
+        # the selection is kept by task key so it survives scrolling (Ctrl-click adds to it,
+        # dragging on the canvas selects every box the band touches)
+        self.calendar_pool = CanvasPool(self.calendar_canvas)
+        self.calendar_render_pending = False
+        self.calendar_specs = []
+        self.calendar_rows = []
+        self.calendar_boxes = defaultdict(list)
+        self.calendar_grid = SpatialGrid()
+        self.calendar_links = SpatialGrid()
+        self.calendar_items = {}
+        self.calendar_drag = None
+        self.calendar_band = None
+        self.selected_calendar_keys = set()
+        self.calendar_occurrences = {}
+    
+    def create_gantt_tab(self):
+        """Tab 7: Gantt Chart"""
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text="Gantt Chart")
+        
+        control_frame = ttk.Frame(tab, padding=10)
+        control_frame.pack(fill='x')
+        
+        ttk.Label(control_frame, text="Project:").pack(side='left', padx=5)
+        self.gantt_project_select = ttk.Combobox(control_frame, width=40, state='readonly')
+        self.gantt_project_select.pack(side='left', padx=5)
+        self.gantt_project_select.bind('<<ComboboxSelected>>', lambda e: self.show_gantt())
+        
+        ttk.Label(control_frame, text="Zoom:").pack(side='left', padx=5)
+        self.gantt_zoom = ttk.Combobox(control_frame, width=8, state='readonly', values=list(self.GANTT_ZOOM))
+        self.gantt_zoom.set('week')
+        self.gantt_zoom.pack(side='left', padx=5)
+        self.gantt_zoom.bind('<<ComboboxSelected>>', lambda e: self.set_gantt_zoom())
+        
+        ttk.Button(control_frame, text="Expand All", command=lambda: self.collapse_gantt(False)).pack(side='left', padx=5)
+        ttk.Button(control_frame, text="Collapse All", command=lambda: self.collapse_gantt(True)).pack(side='left', padx=5)
+        ttk.Button(control_frame, text="Today", command=self.scroll_gantt_today).pack(side='left', padx=5)
+        
+        # The chart scrolls virtually: only the rows and time columns in view are drawn
+        canvas_frame = ttk.Frame(tab)
+        canvas_frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        self.gantt_canvas = tk.Canvas(canvas_frame, bg='white', width=900, height=500)
+        self.gantt_vbar = ttk.Scrollbar(canvas_frame, orient='vertical', command=lambda *args: self.scroll_gantt('y', *args))
+        self.gantt_hbar = ttk.Scrollbar(canvas_frame, orient='horizontal', command=lambda *args: self.scroll_gantt('x', *args))
+        self.gantt_canvas.grid(row=0, column=0, sticky='nsew')
+        self.gantt_vbar.grid(row=0, column=1, sticky='ns')
+        self.gantt_hbar.grid(row=1, column=0, sticky='ew')
+        canvas_frame.grid_rowconfigure(0, weight=1)
+        canvas_frame.grid_columnconfigure(0, weight=1)
+        
+        self.gantt_canvas.bind('<Configure>', lambda e: self.schedule_gantt_render())
+        self.gantt_canvas.bind('<Button-1>', self.on_gantt_click)
+        self.gantt_canvas.bind('<MouseWheel>', lambda e: self.scroll_gantt('y', 'scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.gantt_canvas.bind('<Shift-MouseWheel>', lambda e: self.scroll_gantt('x', 'scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.gantt_canvas.bind('<Button-4>', lambda e: self.scroll_gantt('y', 'scroll', -1, 'units'))
+        self.gantt_canvas.bind('<Button-5>', lambda e: self.scroll_gantt('y', 'scroll', 1, 'units'))
+        self.gantt_canvas.bind('<Shift-Button-4>', lambda e: self.scroll_gantt('x', 'scroll', -1, 'units'))
+        self.gantt_canvas.bind('<Shift-Button-5>', lambda e: self.scroll_gantt('x', 'scroll', 1, 'units'))
+        
+        self.gantt_pool = CanvasPool(self.gantt_canvas)
+        self.gantt_render_pending = False
+        self.gantt_pid = None
+        self.gantt_layout = None
+        self.gantt_layout_key = None
+        self.gantt_scale = self.GANTT_ZOOM['week']
+        self.gantt_collapsed = set()
+        self.gantt_rows = []
+        self.gantt_top = 0
+        self.gantt_left = 0
+        self.update_gantt_project_list()
     
     # Project Management Functions
     def toggle_project_id(self):
@@ -534,17 +3413,13 @@ class ProjectTaskManager:
                 messagebox.showwarning("Warning", f"Project ID '{pid}' already exists. Please use a different ID.")
                 return
         
-        self.projects[pid] = {
+        self.apply_task_changes([(pid, None, {
             'name': name,
             'id': pid,
             'type': ptype,
             'start': start,
             'end': end
-        }
-        
-        self.tasks[pid] = {}
-        self.save_data()
-        self.refresh_all_tabs()
+        })])
         self.clear_project_form()
         messagebox.showinfo("Success", f"Project created successfully with ID: {pid}")
     
@@ -597,13 +3472,12 @@ class ProjectTaskManager:
         end_date.grid(row=4, column=1, pady=5)
         
         def save_project_changes():
-            project['name'] = name_entry.get().strip()
-            project['type'] = type_combo.get()
-            project['start'] = start_date.get_date().strftime('%Y-%m-%d')
-            project['end'] = end_date.get_date().strftime('%Y-%m-%d')
-            
-            self.save_data()
-            self.refresh_all_tabs()
+            self.apply_task_changes([(pid, None, {
+                'name': name_entry.get().strip(),
+                'type': type_combo.get(),
+                'start': start_date.get_date().strftime('%Y-%m-%d'),
+                'end': end_date.get_date().strftime('%Y-%m-%d')
+            })])
             edit_win.destroy()
             messagebox.showinfo("Success", "Project updated successfully!")
         
@@ -621,8 +3495,11 @@ class ProjectTaskManager:
             self.project_tree.delete(item)
         
         for pid, proj in self.projects.items():
+            progress = self.rollup.totals(pid)
             self.project_tree.insert('', 'end', values=(
-                proj['id'], proj['name'], proj['type'], proj['start'], proj['end']
+                proj['id'], proj['name'], proj['type'], proj['start'], proj['end'],
+                f"{progress['completed']}/{progress['total']} ({progress['percentage']:.0f}%)",
+                progress['mandatory_remaining'], f"{progress['hours']:.1f}"
             ))
     
     def delete_project(self):
@@ -634,11 +3511,8 @@ class ProjectTaskManager:
         values = self.project_tree.item(selected[0])['values']
         pid = values[0]
         
-        if messagebox.askyesno("Confirm", f"Delete project '{values[1]}' and all its tasks?"):
-            del self.projects[pid]
-            del self.tasks[pid]
-            self.save_data()
-            self.refresh_all_tabs()
+        if messagebox.askyesno("Confirm", f"Delete project '{values[1]}' and all its tasks? (Ctrl+Z undoes this)"):
+            self.apply_task_changes([(pid, None, None)])
     
     # Task Management Functions
     def update_task_project_list(self):
@@ -664,11 +3538,306 @@ class ProjectTaskManager:
     
     def has_subtasks(self, pid, task_id):
         """Check if a task has any subtasks"""
+        return self.hierarchy.has_children(pid, task_id)
+    
+    def generate_task_id(self, pid):
+        """Generate the next free task ID for a project"""
+        return self.allocate_task_ids(pid, 1)[0]
+    
+    def allocate_task_ids(self, pid, count):
+        """Generate `count` consecutive free task IDs for a project"""
+        numbers = [int(tid[1:]) for tid in self.tasks.get(pid, {}) if tid[1:].isdigit()]
+        start = max(numbers, default=0) + 1
+        return [f"T{n:03d}" for n in range(start, start + count)]
+    
+    def create_task(self, pid, task_data):
+        """Store a new task in a project and return its ID"""
+        if pid not in self.projects:
+            raise ValueError(f"Unknown project '{pid}'")
+        if not task_data.get('name'):
+            raise ValueError("Task name is required")
+        parent_id = task_data.get('parent')
+        if parent_id and parent_id not in self.tasks[pid]:
+            raise ValueError(f"Unknown parent task '{parent_id}'")
+        validate_task_fields(task_data)
+        
+        tid = self.generate_task_id(pid)
+        self.apply_task_changes([(pid, tid, task_data)])
+        return tid
+    
+    def set_task_status(self, pid, tid, status):
+        if tid not in self.tasks.get(pid, {}):
+            raise ValueError(f"Unknown task '{pid}/{tid}'")
+        self.apply_task_changes([(pid, tid, {'status': status})])
+    
+    def mark_data_changed(self):
+        """Bump the data version; caches keyed on it become stale"""
+        self.data_version += 1
+    
+    def apply_task_changes(self, changes, save_delay=0, refresh_delay=0):
+        """Apply (pid, tid, fields) changes as one transaction.
+        
+        `fields` updates an existing task, creates the task if it is new, or deletes it
+        when None. A tid of None addresses the project record instead; deleting a project
+        deletes its tasks first. Returns the applied deltas as (pid, tid, before, after)
+        tuples where before/after hold only the changed fields (None for a created/deleted
+        record). The deltas are the single change stream: the undo log records them, the
+        indexes are patched from them, and the batch costs one version bump, one save and
+        one UI refresh.
+        """
+        applied = []
+        dropped = []
+        for pid, tid, fields in changes:
+            if tid is None:
+                self.apply_project_change(pid, fields, applied, dropped)
+                continue
+            tasks = self.tasks[pid]
+            current = tasks.get(tid)
+            if fields is None:
+                if current is not None:
+                    applied.append((pid, tid, tasks.pop(tid), None))
+            elif current is None:
+                tasks[tid] = fields
+                applied.append((pid, tid, None, dict(fields)))
+            else:
+                before = {f: current.get(f) for f, v in fields.items() if current.get(f) != v}
+                if before:
+                    after = {f: fields[f] for f in before}
+                    current.update(after)
+                    applied.append((pid, tid, before, after))
+        
+        if applied:
+            self.mark_data_changed()
+            task_deltas = [delta for delta in applied if delta[1] is not None]
+            if task_deltas:
+                for listener in self.change_listeners:
+                    listener(task_deltas)
+            for pid in dropped:
+                if pid not in self.projects:
+                    self.drop_project_state(pid)
+            self.change_log.record(applied, time.monotonic())
+            self.history.record(applied, datetime.now())
+            if self.batch_depth:
+                self.batch_dirty = True
+            else:
+                self.schedule_save(save_delay)
+                self.schedule_refresh(refresh_delay)
+        return applied
+    
+    def apply_project_change(self, pid, fields, applied, dropped):
+        """Project part of apply_task_changes: create, update or delete one project record"""
+        current = self.projects.get(pid)
+        if fields is None:
+            if current is not None:
+                for tid in list(self.tasks.get(pid, {})):
+                    applied.append((pid, tid, self.tasks[pid].pop(tid), None))
+                applied.append((pid, None, self.projects.pop(pid), None))
+                self.tasks.pop(pid, None)
+                dropped.append(pid)
+        elif current is None:
+            self.projects[pid] = fields
+            self.tasks.setdefault(pid, {})
+            applied.append((pid, None, None, dict(fields)))
+        else:
+            before = {f: current.get(f) for f, v in fields.items() if current.get(f) != v}
+            if before:
+                after = {f: fields[f] for f in before}
+                current.update(after)
+                applied.append((pid, None, before, after))
+    
+    def drop_project_state(self, pid):
+        """Forget a deleted project in every per-project index"""
+        self.hierarchy.drop_project(pid)
+        self.rollup.drop_project(pid)
+        self.capacity.drop_project(pid)
+        self.density.drop_project(pid)
+        self.dependencies.drop_project(pid)
+        self.reminders.drop_project(pid)
+        self.arm_reminders()
+        self.show_overdue_badge()
+    
+    @contextmanager
+    def batch_changes(self, save_delay=0, refresh_delay=0):
+        """Defer the save and refresh of every transaction in the block to its end; the
+        block is also undone as one step"""
+        self.batch_depth += 1
+        self.change_log.begin()
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.change_log.end()
+                if self.batch_dirty:
+                    self.batch_dirty = False
+                    self.schedule_save(save_delay)
+                    self.schedule_refresh(refresh_delay)
+    
+    def undo(self, event=None):
+        """Revert the newest logged transaction as one inverse transaction"""
+        if event is not None and self.is_text_input(event.widget):
+            return
+        entry = self.change_log.take_undo()
+        if entry is not None:
+            with self.change_log.replay():
+                self.apply_task_changes(ChangeLog.inverse(entry['ops']))
+            return 'break'
+    
+    def redo(self, event=None):
+        if event is not None and self.is_text_input(event.widget):
+            return
+        entry = self.change_log.take_redo()
+        if entry is not None:
+            with self.change_log.replay():
+                self.apply_task_changes(ChangeLog.forward(entry['ops']))
+            return 'break'
+    
+    def is_text_input(self, widget):
+        """Typing fields keep Ctrl+Z/Ctrl+Y to themselves"""
+        return isinstance(widget, (tk.Entry, tk.Text, tk.Spinbox, ttk.Entry))
+    
+    def update_edit_menu(self):
+        """Name the steps Undo/Redo would take before the menu opens"""
+        for index, stack, verb in ((0, self.change_log.undo_stack, "Undo"), (1, self.change_log.redo_stack, "Redo")):
+            label = f"{verb} {ChangeLog.describe(stack[-1]['ops'])}" if stack else verb
+            self.edit_menu.entryconfigure(index, label=label, state='normal' if stack else 'disabled')
+    
+    def update_tasks(self, keys, **fields):
+        """Set the same fields on many (pid, tid) tasks in one transaction"""
+        return self.apply_task_changes([(pid, tid, dict(fields)) for pid, tid in keys])
+    
+    def set_status_shown(self, keys, status, occurrences):
+        """Set the status of tasks as a view shows them: plain tasks as a whole, recurring
+        ones only for the occurrence dates listed in `occurrences`, in one transaction"""
+        changes = []
+        for pid, tid in keys:
+            dates = occurrences.get((pid, tid))
+            if not dates:
+                changes.append((pid, tid, {'status': status}))
+                continue
+            done = set(self.tasks[pid][tid].get('done_dates', ()))
+            done = done | set(dates) if status == 'Complete' else done - set(dates)
+            changes.append((pid, tid, {'done_dates': sorted(done)}))
+        return self.apply_task_changes(changes)
+    
+    def shift_tasks(self, keys, days):
+        """Move the start and end dates of many tasks by `days` in one transaction"""
+        changes = []
+        for pid, tid in keys:
+            task = self.tasks[pid][tid]
+            start = datetime.strptime(task['start_date'], '%Y-%m-%d') + timedelta(days=days)
+            end = datetime.strptime(task['end_date'], '%Y-%m-%d') + timedelta(days=days)
+            changes.append((pid, tid, {'start_date': start.strftime('%Y-%m-%d'),
+                                       'end_date': end.strftime('%Y-%m-%d')}))
+        return self.apply_task_changes(changes)
+    
+    # Subtree Functions
+    def collect_subtrees(self, keys):
+        """(pid, tid) of every task under `keys`, each once, parents before children"""
+        seen, result = set(), []
+        for pid, tid in keys:
+            if (pid, tid) in seen or tid not in self.tasks.get(pid, {}):
+                continue
+            for sub_id in self.hierarchy.subtree(pid, tid):
+                if (pid, sub_id) not in seen:
+                    seen.add((pid, sub_id))
+                    result.append((pid, sub_id))
+        return result
+    
+    def delete_tasks(self, keys):
+        """Delete many tasks with all their descendants in one transaction"""
+        return self.apply_task_changes([(pid, tid, None) for pid, tid in self.collect_subtrees(keys)])
+    
+    def complete_subtrees(self, keys, status='Complete'):
+        return self.update_tasks(self.collect_subtrees(keys), status=status)
+    
+    def copy_subtrees(self, keys, target_pid, move=False):
+        """Copy (or move) whole subtrees into `target_pid` under fresh task IDs; returns the new root IDs"""
+        subtree_keys = self.collect_subtrees(keys)
+        new_ids = dict(zip(subtree_keys, self.allocate_task_ids(target_pid, len(subtree_keys))))
+        
+        changes = []
+        for pid, tid in subtree_keys:
+            task = dict(self.tasks[pid][tid])
+            parent_key = (pid, task.get('parent'))
+            if parent_key in new_ids:
+                task['parent'] = new_ids[parent_key]
+            elif move or pid != target_pid:
+                # Root of a moved/copied subtree becomes a main task in the target project
+                task['parent'] = None
+            changes.append((target_pid, new_ids[(pid, tid)], task))
+        if move:
+            changes.extend((pid, tid, None) for pid, tid in subtree_keys)
+        
+        self.apply_task_changes(changes)
+        return [new_ids[key] for key in keys if key in new_ids]
+    
+    def sweep_orphans(self, report=False):
+        """Find tasks no tree can reach (deleted parent or parent cycle) and offer to clean them up"""
+        orphans = [(pid, tid) for pid in self.projects for tid in self.hierarchy.unreachable(pid)]
+        if not report:
+            return orphans
+        if not orphans:
+            messagebox.showinfo("Orphaned Tasks", "No orphaned tasks found.")
+            return orphans
+        
+        sample = ', '.join(f"{pid}/{tid}" for pid, tid in orphans[:10])
+        more = f" and {len(orphans) - 10} more" if len(orphans) > 10 else ""
+        answer = messagebox.askyesnocancel(
+            "Orphaned Tasks",
+            f"Found {len(orphans)} task(s) that no main task leads to, because a parent was deleted "
+            f"or parents form a loop: {sample}{more}.\n\n"
+            "Yes: delete them\nNo: make the top task of each group a main task "
+            "(for a loop, its lowest task ID)\nCancel: leave them")
+        if answer:
+            self.apply_task_changes([(pid, tid, None) for pid, tid in orphans])
+        elif answer is not None:
+            by_project = defaultdict(list)
+            for pid, tid in orphans:
+                by_project[pid].append(tid)
+            self.apply_task_changes([(pid, tid, {'parent': None}) for pid, tids in by_project.items()
+                                     for tid in self.hierarchy.detach_points(pid, tids)])
+        return orphans
+    
+    # Query Functions
+    def get_task_index(self):
+        if self.task_index is None or self.task_index.version != self.data_version:
+            self.task_index = TaskIndex(self.projects, self.tasks, self.data_version)
+        return self.task_index
+    
+    def run_query(self, text, scope=None):
+        """(pid, tid) keys matching a query string; cached until the data version changes"""
+        query = self.compiled_queries.get(text)
+        if query is None:
+            query = TaskQuery(text)
+            if len(self.compiled_queries) >= 256:
+                self.compiled_queries.clear()
+            self.compiled_queries[text] = query
+        
+        today = datetime.now().date()
+        cache_key = (text, scope, self.data_version, today)
+        keys = self.query_results.get(cache_key)
+        if keys is None:
+            keys = query.run(self.projects, self.tasks, self.get_task_index(), scope, today)
+            self.query_results[cache_key] = keys
+            if len(self.query_results) > 64:
+                self.query_results.popitem(last=False)
+        else:
+            self.query_results.move_to_end(cache_key)
+        return keys
+    
+    def get_filtered_tasks(self, pid, query_entry):
+        """Tasks of a project narrowed by the query typed in `query_entry`, in store order"""
         tasks = self.tasks.get(pid, {})
-        for t in tasks.values():
-            if t.get('parent') == task_id:
-                return True
-        return False
+        text = query_entry.get().strip()
+        if not text:
+            return tasks
+        try:
+            keys = self.run_query(text, pid)
+        except ValueError as e:
+            messagebox.showwarning("Invalid Query", str(e))
+            return tasks
+        return {tid: t for tid, t in tasks.items() if (pid, tid) in keys}
     
     def add_task(self):
         selection = self.task_project_select.get()
@@ -683,10 +3852,6 @@ class ProjectTaskManager:
             messagebox.showwarning("Warning", "Please enter task name")
             return
         
-        # Generate task ID
-        task_count = len(self.tasks[pid])
-        tid = f"T{task_count + 1:03d}"
-        
         parent = self.task_parent.get()
         parent_id = None if parent.startswith('(None') else parent.split(' - ')[0]
         
@@ -694,6 +3859,11 @@ class ProjectTaskManager:
         comment_text = self.task_comments.get("1.0", "end-1c").strip()
         
         has_subtasks_flag = self.task_has_subtasks.get()
+        try:
+            recurrence = None if has_subtasks_flag else self.task_recurrence()
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
         
         if has_subtasks_flag:
             time_in = "00:00"
@@ -715,12 +3885,16 @@ class ProjectTaskManager:
             'comments': comment_text,
             'has_subtasks': has_subtasks_flag
         }
+        if recurrence:
+            task_data['recurrence'] = recurrence
         
-        self.tasks[pid][tid] = task_data
-        self.save_data()
+        try:
+            tid = self.create_task(pid, task_data)
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
         self.clear_task_form()
         self.on_project_select_task(None)
-        self.refresh_all_tabs()
         messagebox.showinfo("Success", f"Task {tid} added successfully!")
     
     def clear_task_form(self):
@@ -733,6 +3907,7 @@ class ProjectTaskManager:
         self.task_hour_out.set('17')
         self.task_min_out.set('00')
         self.task_comments.delete("1.0", tk.END)
+        self.set_task_recurrence(None)
         self.toggle_time_fields()
     
     # Edit Functions
@@ -740,7 +3915,9 @@ class ProjectTaskManager:
         values = [f"{p['id']} - {p['name']}" for p in self.projects.values()]
         self.edit_project_select['values'] = values
         if values:
-            self.edit_project_select.current(0)
+            # Keep the project the user is working in across refreshes
+            if self.edit_project_select.get() not in values:
+                self.edit_project_select.current(0)
             self.on_project_select_edit(None)
     
     def on_project_select_edit(self, event):
@@ -749,38 +3926,72 @@ class ProjectTaskManager:
             return
         
         pid = selection.split(' - ')[0]
-        self.display_tasks_tree(pid, self.edit_tree)
+        self.display_tasks_tree(pid, self.edit_tree, self.get_filtered_tasks(pid, self.edit_query))
+    
+    def clear_query(self, entry, callback):
+        entry.delete(0, tk.END)
+        callback(None)
     
-    def display_tasks_tree(self, pid, tree):
+    def display_tasks_tree(self, pid, tree, tasks=None):
         for item in tree.get_children():
             tree.delete(item)
         
-        tasks = self.tasks.get(pid, {})
-        
-        # Display tasks hierarchically
-        main_tasks = {tid: t for tid, t in tasks.items() if not t.get('parent')}
-        
-        for tid, task in main_tasks.items():
-            self.insert_task_tree(tree, '', tid, task, tasks)
+        # Display tasks hierarchically; filtered tasks whose parent is hidden become top level
+        walk = self.hierarchy.walk(pid, tasks)
+        self.insert_walk(tree, pid, walk, tasks)
     
-    def insert_task_tree(self, tree, parent, tid, task, all_tasks):
-        priority_color = self.get_priority_color(task['priority'])
-        
-        item = tree.insert(parent, 'end', text=tid, values=(
-            task['name'],
-            task['priority'],
-            'Yes' if task['mandatory'] else 'No',
-            task['start_date'],
-            task['end_date'],
-            task['status']
-        ), tags=(priority_color,))
-        
-        tree.tag_configure(priority_color, background=priority_color)
-        
-        # Insert subtasks
-        subtasks = {t_id: t for t_id, t in all_tasks.items() if t.get('parent') == tid}
-        for sub_id, subtask in subtasks.items():
-            self.insert_task_tree(tree, item, sub_id, subtask, all_tasks)
+    def insert_walk(self, tree, pid, walk, tasks=None, show_rollup=False):
+        """Insert the rows of a HierarchyIndex walk into a tree, parents before children"""
+        if tasks is None:
+            tasks = self.tasks.get(pid, {})
+        for color in ('lightblue', 'lightgreen', 'lightcoral'):
+            tree.tag_configure(color, background=color)
+        tree.tag_configure('critical', foreground='darkred', font=('Arial', 9, 'bold'))
+        
+        items = {}
+        parents = set()
+        for tid, parent, depth in walk.order:
+            task = tasks[tid]
+            status = task['status']
+            if show_rollup and walk.size[tid] > 1:
+                status = f"{status} ({walk.completed[tid]}/{walk.size[tid]})"
+            items[tid] = tree.insert(items[parent] if parent is not None else '', 'end', text=tid, values=(
+                f"{task['name']} (↻ {describe_recurrence(task['recurrence'])})" if task.get('recurrence') else task['name'],
+                task['priority'],
+                'Yes' if task['mandatory'] else 'No',
+                task['start_date'],
+                task['end_date'],
+                status
+            ), tags=(self.get_priority_color(task['priority']),) + (('critical',) if self.dependencies.critical((pid, tid)) else ()))
+            if parent is not None:
+                parents.add(items[parent])
+        sorter = self.tree_sorters.get(tree)
+        if sorter is not None:
+            sorter.track({item: (pid, tid) for tid, item in items.items()}, parents)
+            sorter.apply()
+    
+    def task_sort_columns(self):
+        return {'#0': 'tid', 'Task': 'name', 'Priority': 'priority', 'Mandatory': 'mandatory',
+                'Start': 'start', 'End': 'end', 'Status': 'status'}
+    
+    def sort_fields(self, key):
+        """Cached typed sort keys of a task, for the column sorters"""
+        if self.sort_cache_version != self.data_version:
+            self.sort_field_cache.clear()
+            self.sort_cache_version = self.data_version
+        fields = self.sort_field_cache.get(key)
+        if fields is None:
+            pid, tid = key
+            fields = self.sort_field_cache[key] = task_sort_fields(pid, tid, self.tasks[pid][tid])
+        return fields
+    
+    def drop_sort_fields(self, applied):
+        """Forget the sort keys of the tasks a transaction touched"""
+        if self.sort_cache_version != self.data_version - 1:
+            return
+        self.sort_cache_version = self.data_version
+        for pid, tid, before, after in applied:
+            self.sort_field_cache.pop((pid, tid), None)
     
     def get_priority_color(self, priority):
         if 'Blue' in priority:
@@ -869,69 +4080,375 @@ class ProjectTaskManager:
         comment_text.insert("1.0", task.get('comments', ''))
         comment_text.grid(row=7, column=1, pady=5)
         
+        get_recurrence = self.recurrence_fields(frame, 8, task.get('recurrence'))[0]
+        
         def save_changes():
-            task['name'] = name_entry.get()
-            task['priority'] = priority_combo.get()
-            task['mandatory'] = mandatory_var.get()
-            task['start_date'] = start_date.get_date().strftime('%Y-%m-%d')
-            task['end_date'] = end_date.get_date().strftime('%Y-%m-%d')
-            task['time_in'] = f"{hour_in_spin.get()}:{min_in_spin.get()}"
-            task['time_out'] = f"{hour_out_spin.get()}:{min_out_spin.get()}"
-            task['comments'] = comment_text.get("1.0", "end-1c").strip()
-            
-            self.save_data()
-            self.on_project_select_edit(None)
-            self.refresh_all_tabs()
+            try:
+                recurrence = get_recurrence()
+            except ValueError as e:
+                messagebox.showwarning("Warning", str(e), parent=edit_win)
+                return
+            self.apply_task_changes([(pid, tid, {
+                'name': name_entry.get(),
+                'priority': priority_combo.get(),
+                'mandatory': mandatory_var.get(),
+                'start_date': start_date.get_date().strftime('%Y-%m-%d'),
+                'end_date': end_date.get_date().strftime('%Y-%m-%d'),
+                'time_in': f"{hour_in_spin.get()}:{min_in_spin.get()}",
+                'time_out': f"{hour_out_spin.get()}:{min_out_spin.get()}",
+                'comments': comment_text.get("1.0", "end-1c").strip(),
+                'recurrence': recurrence
+            })])
             edit_win.destroy()
             messagebox.showinfo("Success", "Task updated successfully!")
         
-        ttk.Button(frame, text="Save Changes", command=save_changes).grid(row=8, column=0, columnspan=2, pady=20)
+        ttk.Button(frame, text="Save Changes", command=save_changes).grid(row=9, column=0, columnspan=2, pady=20)
+    
+    def get_selected_edit_keys(self):
+        """(pid, tid) of every task selected in the Edit tree"""
+        pid = self.edit_project_select.get().split(' - ')[0]
+        return [(pid, self.edit_tree.item(item)['text']) for item in self.edit_tree.selection()]
     
     def mark_complete(self):
-        selected = self.edit_tree.selection()
-        if not selected:
+        keys = self.get_selected_edit_keys()
+        if not keys:
             messagebox.showwarning("Warning", "Please select a task")
             return
+        self.update_tasks(keys, status='Complete')
+    
+    def mark_incomplete(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        self.update_tasks(keys, status='Incomplete')
+    
+    def reprioritize_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        self.bulk_reprioritize(keys)
+    
+    def reschedule_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        self.bulk_reschedule(keys)
+    
+    def auto_schedule_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        self.auto_schedule(keys)
+    
+    def edit_dependencies_selected(self):
+        keys = self.get_selected_edit_keys()
+        if len(keys) != 1:
+            messagebox.showwarning("Warning", "Please select one task")
+            return
+        self.edit_dependencies(*keys[0])
+    
+    def delete_task(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        
+        label = f"task {keys[0][1]}" if len(keys) == 1 else f"{len(keys)} tasks"
+        if messagebox.askyesno("Confirm", f"Delete {label} and their subtasks?"):
+            self.delete_tasks(keys)
+    
+    def complete_subtree_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        self.complete_subtrees(keys)
+    
+    def duplicate_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        new_ids = self.copy_subtrees(keys, keys[0][0])
+        messagebox.showinfo("Success", f"Duplicated as {', '.join(new_ids)}")
+    
+    def move_selected(self):
+        keys = self.get_selected_edit_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        
+        win = tk.Toplevel(self.root)
+        win.title(f"Move {len(keys)} task(s) with subtasks")
+        frame = ttk.Frame(win, padding=20)
+        frame.pack(fill='both', expand=True)
+        
+        ttk.Label(frame, text="Target Project:").grid(row=0, column=0, sticky='w', pady=5)
+        choices = [f"{p['id']} - {p['name']}" for p in self.projects.values() if p['id'] != keys[0][0]]
+        project_combo = ttk.Combobox(frame, width=40, state='readonly', values=choices)
+        project_combo.grid(row=0, column=1, pady=5, padx=10)
+        
+        def apply():
+            if not project_combo.get():
+                messagebox.showwarning("Warning", "Please select a project", parent=win)
+                return
+            target = project_combo.get().split(' - ')[0]
+            new_ids = self.copy_subtrees(keys, target, move=True)
+            win.destroy()
+            messagebox.showinfo("Success", f"Moved to {target} as {', '.join(new_ids)}")
+        
+        ttk.Button(frame, text="Move", command=apply).grid(row=1, column=0, columnspan=2, pady=10)
+    
+    def bulk_reprioritize(self, keys, on_done=None):
+        """Ask for a priority and apply it to all `keys` at once"""
+        win = tk.Toplevel(self.root)
+        win.title(f"Set Priority ({len(keys)} tasks)")
+        frame = ttk.Frame(win, padding=20)
+        frame.pack(fill='both', expand=True)
+        
+        ttk.Label(frame, text="Priority:").grid(row=0, column=0, sticky='w', pady=5)
+        priority_combo = ttk.Combobox(frame, width=30, state='readonly',
+                                      values=["Most Important (Blue)", "Important (Green)", "Average (Red)"])
+        priority_combo.current(0)
+        priority_combo.grid(row=0, column=1, pady=5, padx=10)
+        
+        def apply():
+            self.update_tasks(keys, priority=priority_combo.get())
+            win.destroy()
+            if on_done:
+                on_done()
+        
+        ttk.Button(frame, text="Apply", command=apply).grid(row=1, column=0, columnspan=2, pady=10)
+    
+    def bulk_reschedule(self, keys, on_done=None):
+        """Ask for a day offset and shift all `keys` at once"""
+        win = tk.Toplevel(self.root)
+        win.title(f"Reschedule ({len(keys)} tasks)")
+        frame = ttk.Frame(win, padding=20)
+        frame.pack(fill='both', expand=True)
+        
+        ttk.Label(frame, text="Shift by days:").grid(row=0, column=0, sticky='w', pady=5)
+        days_spin = ttk.Spinbox(frame, from_=-365, to=365, width=8)
+        days_spin.set('1')
+        days_spin.grid(row=0, column=1, pady=5, padx=10)
+        
+        def apply():
+            try:
+                days = int(days_spin.get())
+            except ValueError:
+                messagebox.showwarning("Warning", "Please enter a whole number of days", parent=win)
+                return
+            self.shift_tasks(keys, days)
+            win.destroy()
+            if on_done:
+                on_done()
         
-        tid = self.edit_tree.item(selected[0])['text']
-        pid = self.edit_project_select.get().split(' - ')[0]
-        self.tasks[pid][tid]['status'] = 'Complete'
-        self.save_data()
-        self.on_project_select_edit(None)
-        self.refresh_all_tabs()
+        ttk.Button(frame, text="Apply", command=apply).grid(row=1, column=0, columnspan=2, pady=10)
     
-    def mark_incomplete(self):
-        selected = self.edit_tree.selection()
-        if not selected:
-            messagebox.showwarning("Warning", "Please select a task")
-            return
+    def plan_schedule(self, keys, work_start, work_end):
+        """Free slots for `keys` around every other booking, from today to each task's end date.
+        
+        The tasks being placed count as unscheduled, so only other tasks' bookings block
+        time. A task needs its current daily time_in-time_out span (an hour if it has none)
+        on one day of its window. Returns {key: (ordinal, start, end) or None}; parents and
+        recurring tasks are left out.
+        """
+        today = datetime.now().toordinal()
+        moving = set()
+        requests = []
+        for pid, tid in keys:
+            task = self.tasks.get(pid, {}).get(tid)
+            if task is None or self.has_subtasks(pid, tid) or task.get('recurrence'):
+                continue
+            try:
+                first = datetime.fromisoformat(task['start_date']).toordinal()
+                last = datetime.fromisoformat(task['end_date']).toordinal()
+                duration = parse_minutes(task['time_out']) - parse_minutes(task['time_in'])
+            except ValueError:
+                continue
+            moving.add((pid, tid))
+            requests.append(((pid, tid), priority_rank(task['priority']), max(first, today), last,
+                             duration if duration > 0 else 60))
+        
+        def day_load(ordinal):
+            slots = [slot for key, slot in self.capacity.booked(ordinal).items() if key not in moving]
+            return slots, sum(end - start for start, end in slots)
+        
+        return greedy_schedule(requests, day_load, work_start, work_end, self.capacity.limit)
 
-        tid = self.edit_tree.item(selected[0])['text']
-        pid = self.edit_project_select.get().split(' - ')[0]
-        self.tasks[pid][tid]['status'] = 'Incomplete'
-        self.save_data()
-        self.on_project_select_edit(None)
-        self.refresh_all_tabs()
+    def auto_schedule(self, keys, on_done=None):
+        """Preview free-slot placements for `keys` and apply them in one transaction"""
+        win = tk.Toplevel(self.root)
+        win.title(f"Auto-Schedule ({len(keys)} tasks)")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        
+        hours_frame = ttk.Frame(frame)
+        hours_frame.pack(fill='x')
+        ttk.Label(hours_frame, text="Working hours:").pack(side='left', padx=5)
+        start_entry = ttk.Entry(hours_frame, width=6)
+        start_entry.insert(0, self.settings['work_start'])
+        start_entry.pack(side='left')
+        ttk.Label(hours_frame, text="to").pack(side='left', padx=5)
+        end_entry = ttk.Entry(hours_frame, width=6)
+        end_entry.insert(0, self.settings['work_end'])
+        end_entry.pack(side='left')
+        summary_label = ttk.Label(hours_frame, text="")
+        summary_label.pack(side='left', padx=15)
+        
+        columns = ('Task', 'Priority', 'Window', 'Current', 'Proposed')
+        tree = ttk.Treeview(frame, columns=columns, show='tree headings', height=18)
+        tree.heading('#0', text='Task ID')
+        tree.column('#0', width=80)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=200 if col == 'Task' else 150)
+        tree.tag_configure('unplaced', foreground='red')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True, pady=10)
+        scrollbar.pack(side='left', fill='y', pady=10)
+        plan = {}
+        
+        def preview():
+            try:
+                work_start, work_end = parse_minutes(start_entry.get()), parse_minutes(end_entry.get())
+            except ValueError:
+                messagebox.showwarning("Warning", "Working hours must be HH:MM", parent=win)
+                return
+            if not 0 <= work_start < work_end <= 1440:
+                messagebox.showwarning("Warning", "Working hours must end after they start", parent=win)
+                return
+            self.settings['work_start'], self.settings['work_end'] = start_entry.get(), end_entry.get()
+            plan.clear()
+            plan.update(self.plan_schedule(keys, work_start, work_end))
+            tree.delete(*tree.get_children())
+            for (pid, tid), slot in plan.items():
+                task = self.tasks[pid][tid]
+                if slot is None:
+                    proposed = "No free slot"
+                else:
+                    ordinal, start, end = slot
+                    proposed = f"{datetime.fromordinal(ordinal).strftime('%Y-%m-%d')} {start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+                tree.insert('', 'end', text=tid, values=(
+                    task['name'], task['priority'], f"{task['start_date']} - {task['end_date']}",
+                    f"{task['time_in']}-{task['time_out']}", proposed
+                ), tags=('unplaced',) if slot is None else ())
+            placed = sum(1 for slot in plan.values() if slot is not None)
+            summary_label.config(text=f"{placed} of {len(plan)} placed")
+        
+        def apply():
+            changes = []
+            for (pid, tid), slot in plan.items():
+                if slot is not None:
+                    ordinal, start, end = slot
+                    day = datetime.fromordinal(ordinal).strftime('%Y-%m-%d')
+                    changes.append((pid, tid, {'start_date': day, 'end_date': day,
+                                               'time_in': f"{start // 60:02d}:{start % 60:02d}",
+                                               'time_out': f"{end // 60:02d}:{end % 60:02d}"}))
+            self.apply_task_changes(changes)
+            win.destroy()
+            if on_done:
+                on_done()
+        
+        ttk.Button(hours_frame, text="Preview", command=preview).pack(side='left', padx=5)
+        ttk.Button(hours_frame, text="Apply", command=apply).pack(side='left', padx=5)
+        ttk.Button(hours_frame, text="Cancel", command=win.destroy).pack(side='left', padx=5)
+        preview()
     
-    def delete_task(self):
-        selected = self.edit_tree.selection()
-        if not selected:
-            messagebox.showwarning("Warning", "Please select a task")
-            return
+    def edit_dependencies(self, pid, tid):
+        """Edit the tasks `tid` must wait for, from any project, and show its critical-path figures"""
+        key = (pid, tid)
+        task = self.tasks[pid][tid]
+        depends_on = [tuple(pred) for pred in task.get('depends_on') or ()]
         
-        tid = self.edit_tree.item(selected[0])['text']
-        pid = self.edit_project_select.get().split(' - ')[0]
+        win = tk.Toplevel(self.root)
+        win.title(f"Dependencies of {tid} - {task['name']}")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
         
-        if messagebox.askyesno("Confirm", f"Delete task {tid}?"):
-            del self.tasks[pid][tid]
-            # Delete subtasks
-            to_delete = [t_id for t_id, t in self.tasks[pid].items() if t.get('parent') == tid]
-            for t_id in to_delete:
-                del self.tasks[pid][t_id]
-            
-            self.save_data()
-            self.on_project_select_edit(None)
-            self.refresh_all_tabs()
+        entry = self.dependencies.schedule.get(key)
+        if key in self.dependencies.cycles:
+            summary = "Part of a dependency cycle - no schedule"
+        elif key in self.dependencies.blocked:
+            summary = "Waits on a dependency cycle - no schedule"
+        elif entry:
+            day = lambda ordinal: datetime.fromordinal(ordinal).strftime('%Y-%m-%d')
+            summary = (f"Earliest start {day(entry['es'])}, latest start {day(entry['ls'])}, "
+                       f"slack {entry['slack']} day(s){' - CRITICAL' if entry['critical'] else ''}"
+                       f"{' - starts late: predecessors finish after ' + task['start_date'] if entry['slipped'] else ''}")
+        else:
+            summary = "No dependencies"
+        ttk.Label(frame, text=summary).pack(anchor='w')
+        
+        columns = ('Project', 'Task', 'End Date', 'Status')
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=10)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=200 if col == 'Task' else 120)
+        tree.pack(fill='both', expand=True, pady=10)
+        
+        def show():
+            tree.delete(*tree.get_children())
+            for pred_pid, pred_tid in depends_on:
+                pred = self.tasks.get(pred_pid, {}).get(pred_tid)
+                tree.insert('', 'end', values=(
+                    self.projects.get(pred_pid, {}).get('name', pred_pid),
+                    f"{pred_tid} - {pred['name']}" if pred else f"{pred_tid} (missing)",
+                    pred['end_date'] if pred else '', pred['status'] if pred else ''
+                ))
+        
+        add_frame = ttk.Frame(frame)
+        add_frame.pack(fill='x')
+        ttk.Label(add_frame, text="Waits for:").pack(side='left', padx=5)
+        project_combo = ttk.Combobox(add_frame, width=25, state='readonly',
+                                     values=[f"{p} - {info['name']}" for p, info in self.projects.items()])
+        project_combo.pack(side='left', padx=5)
+        task_combo = ttk.Combobox(add_frame, width=30, state='readonly')
+        task_combo.pack(side='left', padx=5)
+        
+        def pick_project(event=None):
+            pred_pid = project_combo.get().split(' - ')[0]
+            task_combo.set('')
+            task_combo['values'] = [f"{t} - {info['name']}" for t, info in self.tasks.get(pred_pid, {}).items()
+                                    if (pred_pid, t) != key]
+        project_combo.bind('<<ComboboxSelected>>', pick_project)
+        project_combo.set(f"{pid} - {self.projects[pid]['name']}")
+        pick_project()
+        
+        def add():
+            if not task_combo.get():
+                return
+            pred = (project_combo.get().split(' - ')[0], task_combo.get().split(' - ')[0])
+            if pred in depends_on:
+                return
+            if self.dependencies.reaches(key, pred):
+                messagebox.showwarning("Warning", f"Task {pred[1]} already depends on {tid}; this would create a cycle", parent=win)
+                return
+            depends_on.append(pred)
+            show()
+        
+        def remove():
+            selection = tree.selection()
+            if selection:
+                del depends_on[tree.index(selection[0])]
+                show()
+        
+        def save():
+            self.apply_task_changes([(pid, tid, {'depends_on': [list(pred) for pred in depends_on]})])
+            win.destroy()
+        
+        ttk.Button(add_frame, text="Add", command=add).pack(side='left', padx=5)
+        ttk.Button(add_frame, text="Remove Selected", command=remove).pack(side='left', padx=5)
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Save", command=save).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=win.destroy).pack(side='left', padx=5)
+        show()
     
     # Progress Functions
     def update_progress_project_list(self):
@@ -946,52 +4463,44 @@ class ProjectTaskManager:
             return
         
         pid = selection.split(' - ')[0]
-        tasks = self.tasks.get(pid, {})
+        tasks = self.get_filtered_tasks(pid, self.progress_query)
         
         if not tasks:
-            self.progress_info.config(text="No tasks in this project")
+            self.progress_info.config(text="No tasks in this project" if not self.progress_query.get().strip()
+                                      else "No tasks match the query")
+            for item in self.progress_tree.get_children():
+                self.progress_tree.delete(item)
             return
         
-        total = len(tasks)
-        completed = sum(1 for t in tasks.values() if t['status'] == 'Complete')
-        incomplete = total - completed
-        percentage = (completed / total * 100) if total > 0 else 0
-        
+        progress = self.compute_progress(pid, tasks)
         self.progress_info.config(
-            text=f"Total Tasks: {total} | Completed: {completed} | Incomplete: {incomplete} | Progress: {percentage:.1f}%"
+            text=f"Total Tasks: {progress['total']} | Completed: {progress['completed']} | "
+                 f"Incomplete: {progress['incomplete']} | Mandatory Open: {progress['mandatory_remaining']} | "
+                 f"Scheduled: {progress['hours']:.1f} h | Actual: {progress['actual_hours']:.1f} h | "
+                 f"Progress: {progress['percentage']:.1f}%"
         )
         
         # Clear tree
         for item in self.progress_tree.get_children():
             self.progress_tree.delete(item)
         
-        # Sort tasks: incomplete first, then completed
-        sorted_tasks = sorted(tasks.items(), key=lambda x: (x[1]['status'] == 'Complete', x[0]))
-        
-        for tid, task in sorted_tasks:
-            if not task.get('parent'):
-                self.insert_progress_task(tid, task, tasks, '')
+        # Sort tasks: incomplete first, then completed; parents show done/total of their subtree
+        walk = self.hierarchy.walk(pid, tasks, sort_key=lambda tid, t: (t['status'] == 'Complete', tid))
+        self.insert_walk(self.progress_tree, pid, walk, tasks, show_rollup=True)
     
-    def insert_progress_task(self, tid, task, all_tasks, parent):
-        priority_color = self.get_priority_color(task['priority'])
-        
-        item = self.progress_tree.insert(parent, 'end', text=tid, values=(
-            task['name'],
-            task['priority'],
-            'Yes' if task['mandatory'] else 'No',
-            task['start_date'],
-            task['end_date'],
-            task['status']
-        ), tags=(priority_color,))
-        
-        self.progress_tree.tag_configure(priority_color, background=priority_color)
-        
-        # Insert subtasks
-        subtasks = [(t_id, t) for t_id, t in all_tasks.items() if t.get('parent') == tid]
-        subtasks.sort(key=lambda x: (x[1]['status'] == 'Complete', x[0]))
-        
-        for sub_id, subtask in subtasks:
-            self.insert_progress_task(sub_id, subtask, all_tasks, item)
+    def compute_progress(self, pid, tasks=None):
+        """Progress counters; the whole project is answered from the rollup, subsets are counted"""
+        if tasks is None or tasks is self.tasks.get(pid):
+            return self.rollup.totals(pid)
+        counters = [0] * len(ProgressRollup.FIELDS)
+        for tid, task in tasks.items():
+            ProgressRollup.add(counters, ProgressRollup.contribution(task, self.time_log.minutes.get((pid, tid), 0)))
+        return self.rollup.as_dict(counters)
+    
+    def format_progress(self, progress):
+        return (f"Completed: {progress['completed']}/{progress['total']} ({progress['percentage']:.1f}%) | "
+                f"Mandatory Open: {progress['mandatory_remaining']} | Scheduled: {progress['hours']:.1f} h | "
+                f"Actual: {progress['actual_hours']:.1f} h")
     
     # Today's Tasks Functions
     def draw_clock(self):
@@ -1052,6 +4561,8 @@ class ProjectTaskManager:
     
     def update_clock(self):
         self.draw_clock()
+        if self.time_log.running and minute_stamp(datetime.now()) != self.timer_minute:
+            self.show_timers()
         self.root.after(1000, self.update_clock)
     
     def update_today_date(self):
@@ -1066,63 +4577,183 @@ class ProjectTaskManager:
         self.today_date_label.config(text=f"Date: {date_num}")
         self.today_month_year_label.config(text=f"{month_name}, {year}")
         
-        self.root.after(60000, self.update_today_date)
+        # Wake up just after the next local midnight instead of polling
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay = int((next_midnight - now).total_seconds() * 1000) + 1000
+        self.root.after(delay, self.on_day_change)
     
-    def refresh_today_tasks(self):
-        """Load tasks for today - show ONLY subtasks if parent has subtasks"""
-        for item in self.today_tree.get_children():
-            self.today_tree.delete(item)
-        
-        today = datetime.now().date()
-        task_list = []
-        
-        for pid, project in self.projects.items():
-            tasks = self.tasks.get(pid, {})
-            
-            for tid, task in tasks.items():
-                # FIX: Logic to show tasks only if there is no subtask
-                if self.has_subtasks(pid, tid):
-                    continue
-                
-                # Check date range
-                task_start = datetime.strptime(task['start_date'], '%Y-%m-%d').date()
-                task_end = datetime.strptime(task['end_date'], '%Y-%m-%d').date()
-                
-                if task_start <= today <= task_end:
-                    task_list.append({
-                        'pid': pid,
-                        'tid': tid,
-                        'project_id': project['id'],
-                        'name': task['name'],
-                        'priority': task['priority'],
-                        'time_in': task['time_in'],
-                        'time_out': task['time_out'],
-                        'status': task['status']
-                    })
-        
-        # Sort by Importance (Blue > Green > Red)
-        def sort_key(t):
-            p = t['priority']
-            if 'Blue' in p: return 0
-            if 'Green' in p: return 1
-            return 2
-        
-        task_list.sort(key=sort_key)
+    def on_day_change(self):
+        self.update_today_date()
+        self.refresh_today_tasks()
+    
+    def on_reminder_changes(self, applied):
+        self.reminders.apply_changes(applied, minute_stamp(datetime.now()))
+        self.arm_reminders()
+        self.show_overdue_badge()
+    
+    def arm_reminders(self):
+        """Keep a single timer armed for the earliest pending reminder; nothing runs in between"""
+        due = self.reminders.next_due()
+        if due == self.reminder_due:
+            return
+        if self.reminder_timer is not None:
+            self.root.after_cancel(self.reminder_timer)
+            self.reminder_timer = None
+        self.reminder_due = due
+        if due is not None:
+            moment = datetime.fromordinal(due // 1440) + timedelta(minutes=due % 1440)
+            delay = (moment - datetime.now()).total_seconds()
+            # Tk timers overflow after ~24 days, so a far-off event re-arms at most daily
+            self.reminder_timer = self.root.after(int(min(max(delay, 0), 86400) * 1000), self.fire_reminders)
+    
+    def fire_reminders(self):
+        self.reminder_timer = self.reminder_due = None
+        fired = self.reminders.pop_due(minute_stamp(datetime.now()))
+        if fired:
+            self.notify(fired)
+        self.arm_reminders()
+        self.show_overdue_badge()
+    
+    def notify(self, fired):
+        """Log fired reminders in the Today tab and pop them up briefly over the window"""
+        today = datetime.now().toordinal()
+        lines = []
+        for (pid, tid), kind, when in fired:
+            task = self.tasks[pid][tid]
+            label = f"[{self.projects[pid]['id']}] {task['name']}"
+            if kind == 'start':
+                day = '' if when // 1440 == today else datetime.fromordinal(when // 1440).strftime(' on %Y-%m-%d')
+                lines.append(f"⏰ {label} starts at {when % 1440 // 60:02d}:{when % 60:02d}{day}")
+            else:
+                lines.append(f"⚠ {label} is overdue (ended {task['end_date']})")
+        stamp = datetime.now().strftime('%H:%M')
+        for line in reversed(lines):
+            self.notification_list.insert(0, f"{stamp} {line}")
+        self.notification_list.delete(100, 'end')
+        self.root.bell()
+        
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        toast.attributes('-topmost', True)
+        text = "\n".join(lines[:5]) + (f"\n... and {len(lines) - 5} more" if len(lines) > 5 else "")
+        tk.Label(toast, text=text, justify='left', background='lightyellow', relief='solid', padx=10, pady=8).pack()
+        toast.update_idletasks()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - toast.winfo_reqwidth() - 20
+        y = self.root.winfo_rooty() + self.root.winfo_height() - toast.winfo_reqheight() - 20
+        toast.geometry(f"+{x}+{y}")
+        toast.after(8000, toast.destroy)
+    
+    def show_overdue_badge(self):
+        count = len(self.reminders.overdue)
+        self.notebook.tab(self.today_tab, text=f"Today's Tasks ({count} overdue)" if count else "Today's Tasks")
+        self.overdue_label.config(text=f"Overdue: {count}" if count else "Nothing overdue")
+    
+    def set_reminder_lead(self):
+        try:
+            lead = int(self.reminder_lead_spin.get())
+        except ValueError:
+            lead = -1
+        if not 0 <= lead <= 1440:
+            messagebox.showwarning("Warning", "Reminder lead time must be 0-1440 minutes")
+            return
+        self.settings['reminder_lead_minutes'] = self.reminders.lead = lead
+        self.reminders.reset(self.tasks, minute_stamp(datetime.now()))
+        self.schedule_save()
+        self.arm_reminders()
+    
+    def show_overdue_tasks(self):
+        """List overdue tasks, oldest deadline first, with a way to close them out"""
+        win = tk.Toplevel(self.root)
+        win.title(f"Overdue Tasks ({len(self.reminders.overdue)})")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
         
-        total_tasks = len(task_list)
-        completed_tasks = sum(1 for t in task_list if t['status'] == 'Complete')
+        columns = ('Project', 'Task', 'End Date', 'Priority')
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=15, selectmode='extended')
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=250 if col == 'Task' else 120)
+        tree.pack(fill='both', expand=True)
+        rows = {}
+        for pid, tid in sorted(self.reminders.overdue, key=lambda key: self.tasks[key[0]][key[1]]['end_date']):
+            task = self.tasks[pid][tid]
+            item = tree.insert('', 'end', values=(self.projects[pid]['id'], f"{tid} - {task['name']}", task['end_date'], task['priority']))
+            rows[item] = (pid, tid)
+        TreeSorter(tree, {'Project': 'project', 'Task': 'tid', 'End Date': 'end', 'Priority': 'priority'},
+                   self.sort_fields).track(rows)
+        
+        def complete():
+            selected = tree.selection()
+            if selected:
+                self.update_tasks([rows[item] for item in selected], status='Complete')
+                tree.delete(*selected)
+        
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Mark Complete", command=complete).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Close", command=win.destroy).pack(side='left', padx=5)
+    
+    def refresh_today_tasks(self, force=False):
+        """Show tasks for today - ONLY subtasks if parent has subtasks.
         
-        for t in task_list:
-            priority_color = self.get_priority_color(t['priority'])
-            
-            self.today_tree.insert('', 'end', text=t['tid'], values=(
-                t['project_id'],
-                t['name'],
-                f"{t['time_in']} - {t['time_out']}",
-                t['priority']
-            ), tags=(priority_color, t['pid'], t['tid']))
-            
-            self.today_tree.tag_configure(priority_color, background=priority_color)
+        The list is materialized in TodayView; unless the date or data changed outside a
+        transaction, only the rows patched since the last call are touched.
+        """
+        today = datetime.now().date()
+        view = self.today_view
+        if force or view.date != today.isoformat() or view.version != self.data_version:
+            view.rebuild(today, self.data_version)
+        rebuilt, changed = view.take_changes()
+        
+        tree = self.today_tree
+        if rebuilt:
+            for item in tree.get_children():
+                tree.delete(item)
+            self.today_items = {}
+            self.today_keys = {}
+            changed = set(view.rows)
+        for color in ('lightblue', 'lightgreen', 'lightcoral'):
+            tree.tag_configure(color, background=color)
+        
+        tree.tag_configure('overlap', foreground='red')
+        capacity = self.capacity.day(today)
+        conflicts = capacity['conflicts']
+        
+        # Detach every changed row, then re-place them in final order so indexes line up
+        for key in changed:
+            item = self.today_items.get(key)
+            if item is not None:
+                if key in view.rows:
+                    tree.detach(item)
+                else:
+                    tree.delete(item)
+                    del self.today_items[key]
+                    del self.today_keys[item]
+        for key in sorted((k for k in changed if k in view.rows), key=view.index_of):
+            t = view.rows[key]
+            values = (t['project_id'], f"{t['name']} ↻" if t['occurrence'] else t['name'], f"{t['time_in']} - {t['time_out']}", t['priority'])
+            tags = self.today_tags(t, key in conflicts)
+            item = self.today_items.get(key)
+            if item is None:
+                item = self.today_items[key] = tree.insert('', view.index_of(key), text=t['tid'],
+                                                           values=values, tags=tags)
+                self.today_keys[item] = key
+            else:
+                tree.item(item, values=values, tags=tags)
+                tree.move(item, '', view.index_of(key))
+        # Another task's edit can make or break an overlap, so restyle those rows too
+        for key in (conflicts ^ self.today_conflicts) - changed:
+            if key in self.today_items and key in view.rows:
+                tree.item(self.today_items[key], tags=self.today_tags(view.rows[key], key in conflicts))
+        self.today_conflicts = set(conflicts)
+        sorter = self.tree_sorters.get(tree)
+        if sorter is not None and sorter.order and (rebuilt or changed):
+            sorter.track(dict(self.today_keys))
+            sorter.apply()
+        self.show_today_capacity(capacity)
+        
+        total_tasks = len(view.rows)
+        completed_tasks = sum(1 for t in view.rows.values() if t['status'] == 'Complete')
         
         if total_tasks > 0:
             percentage = (completed_tasks / total_tasks * 100)
@@ -1131,24 +4762,50 @@ class ProjectTaskManager:
             )
         else:
             self.today_info_label.config(text="No tasks scheduled for today")
+        
+        overall = [0] * len(ProgressRollup.FIELDS)
+        for pid in self.projects:
+            ProgressRollup.add(overall, self.rollup.project(pid)['totals'])
+        self.today_overall_label.config(text=f"All Projects - {self.format_progress(self.rollup.as_dict(overall))}")
     
+    def today_tags(self, row, overlapping):
+        """Styling tags only; rows map back to their task through self.today_keys"""
+        color = self.get_priority_color(row['priority'])
+        return (color, 'overlap') if overlapping else (color,)
+
+    def show_today_capacity(self, capacity):
+        limit = self.capacity.limit
+        text = f"Committed: {capacity['committed'] / 60:.1f}h of {limit / 60:.1f}h | Busy: {capacity['busy'] / 60:.1f}h"
+        if capacity['conflicts']:
+            text += f" | Double-booked: {capacity['overlap'] / 60:.1f}h ({len(capacity['conflicts'])} tasks)"
+        self.today_capacity_label.config(text=text, foreground='red' if capacity['committed'] > limit else '')
+
+    def set_daily_limit(self):
+        try:
+            hours = float(self.daily_limit_spin.get())
+        except ValueError:
+            hours = 0
+        if not 0 < hours <= 24:
+            messagebox.showwarning("Warning", "Daily limit must be between 0 and 24 hours")
+            return
+        self.settings['daily_limit_minutes'] = self.capacity.limit = int(hours * 60)
+        self.schedule_save()
+        self.show_today_capacity(self.capacity.day(datetime.now().date()))
+        if self.calendar_specs:
+            self.apply_calendar_filter()
+
     def mark_today_complete(self):
         selected = self.today_tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a task")
             return
         
-        tags = self.today_tree.item(selected[0])['tags']
-        if len(tags) >= 3:
-            pid = tags[1]
-            tid = tags[2]
-            
-            if pid in self.tasks and tid in self.tasks[pid]:
-                self.tasks[pid][tid]['status'] = 'Complete'
-                self.save_data()
-                self.refresh_today_tasks()
-                messagebox.showinfo("Success", f"Task marked as complete!")
-                return
+        keys = self.selected_today_keys()
+        if keys:
+            occurrences = {key: [self.today_view.rows[key]['occurrence']] for key in keys
+                           if self.today_view.rows.get(key, {}).get('occurrence')}
+            self.set_status_shown(keys, 'Complete', occurrences)
+            messagebox.showinfo("Success", f"{len(keys)} task(s) marked as complete!")
     
     def mark_project_complete(self):
         selected = self.today_tree.selection()
@@ -1156,48 +4813,234 @@ class ProjectTaskManager:
             messagebox.showwarning("Warning", "Please select a task from the project")
             return
         
-        project_id_val = self.today_tree.item(selected[0])['values'][0]
-        pid = None
-        for p_id, proj in self.projects.items():
-            if proj['id'] == project_id_val:
-                pid = p_id
-                break
+        pid = self.today_keys.get(selected[0], (None, None))[0]
+        if pid in self.projects and messagebox.askyesno("Confirm", f"Mark all tasks in project '{self.projects[pid]['name']}' as complete?"):
+            self.update_tasks([(pid, tid) for tid in self.tasks.get(pid, {})], status='Complete')
+    
+    # Time Tracking Functions
+    def selected_today_keys(self):
+        keys = []
+        for item in self.today_tree.selection():
+            key = self.today_keys.get(item)
+            if key and key[1] in self.tasks.get(key[0], {}):
+                keys.append(key)
+        return keys
+    
+    def start_timers(self):
+        keys = self.selected_today_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task to time")
+            return
+        stamp = minute_stamp(datetime.now())
+        for key in keys:
+            self.time_log.start(key, stamp)
+        self.show_timers()
+    
+    def stop_timers(self):
+        """Stop the timers picked in the list, else those of the selected Today tasks"""
+        keys = [self.timer_keys[i] for i in self.timer_list.curselection()] or self.selected_today_keys()
+        keys = [key for key in keys if key in self.time_log.running]
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a running timer")
+            return
+        stamp = minute_stamp(datetime.now())
+        for key in keys:
+            self.rollup.add_actual(*key, self.time_log.stop(key, stamp))
+        self.show_timers()
+        self.schedule_refresh()
+    
+    def show_timers(self):
+        """List running timers with their elapsed time, keeping the picked ones selected"""
+        picked = {self.timer_keys[i] for i in self.timer_list.curselection()}
+        now = minute_stamp(datetime.now())
+        self.timer_keys = sorted(self.time_log.running, key=self.time_log.running.get)
+        self.timer_list.delete(0, 'end')
+        for index, (pid, tid) in enumerate(self.timer_keys):
+            task = self.tasks.get(pid, {}).get(tid)
+            elapsed = now - self.time_log.running[(pid, tid)]
+            self.timer_list.insert('end', f"{elapsed // 60}:{elapsed % 60:02d}  [{pid}] {tid} - {task['name'] if task else '(deleted)'}")
+            if (pid, tid) in picked:
+                self.timer_list.selection_set(index)
+        self.timer_minute = now
+    
+    def time_report(self, group):
+        """(label, planned minutes, actual minutes) per task, project, priority or week.
+        
+        Actual time is summed over the entry log with one weighted bincount per report;
+        planned time is the leaf tasks' scheduled minutes (spread over days for weeks).
+        """
+        starts, ends, owners = self.time_log.entries()
+        durations = ends - starts
+        if group == 'Week':
+            today = datetime.now().toordinal()
+            days = starts // 1440
+            first = min(int(days.min()), today) if len(days) else today
+            last = max(int(days.max()), today) if len(days) else today
+            first -= (first - 1) % 7
+            weeks = (last - first) // 7 + 1
+            actual = np.bincount((days - first) // 7, weights=durations, minlength=weeks)
+            first_day, last_day = datetime.fromordinal(first).date(), datetime.fromordinal(first + weeks * 7 - 1).date()
+            planned = daily_load(self.get_load_rows(first_day, last_day), first_day, last_day)['minutes'].reshape(weeks, 7).sum(axis=1)
+            labels = [f"Week of {datetime.fromordinal(first + week * 7).strftime('%Y-%m-%d')}" for week in range(weeks)]
+        else:
+            labels, codes = [], {}
+
+            def code_of(pid, tid):
+                task = self.tasks.get(pid, {}).get(tid)
+                if task is None:
+                    label = "(deleted tasks)"
+                elif group == 'Task':
+                    label = f"[{pid}] {tid} - {task['name']}"
+                elif group == 'Project':
+                    label = f"{pid} - {self.projects.get(pid, {}).get('name', '')}"
+                else:
+                    label = PRIORITIES[priority_rank(task['priority'])]
+                if label not in codes:
+                    codes[label] = len(labels)
+                    labels.append(label)
+                return codes[label]
+            
+            leaves = [(code_of(pid, tid), task_minutes(task)) for pid, tasks in self.tasks.items()
+                      for tid, task in tasks.items() if not self.hierarchy.has_children(pid, tid)]
+            entry_codes = np.array([code_of(*key) for key in self.time_log.keys], dtype=np.int64)
+            actual = np.bincount(entry_codes[owners], weights=durations, minlength=len(labels)) if len(owners) else np.zeros(len(labels))
+            planned = np.zeros(len(labels))
+            if leaves:
+                leaf_codes, leaf_minutes = zip(*leaves)
+                planned = np.bincount(leaf_codes, weights=leaf_minutes, minlength=len(labels))
+        return [(label, int(planned[i]), int(actual[i])) for i, label in enumerate(labels) if planned[i] or actual[i]]
+    
+    def show_time_report(self):
+        win = tk.Toplevel(self.root)
+        win.title("Actual vs Planned Time")
+        win.geometry("850x550")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
         
-        if pid and messagebox.askyesno("Confirm", f"Mark all tasks in project '{self.projects[pid]['name']}' as complete?"):
-            tasks = self.tasks.get(pid, {})
-            for task in tasks.values():
-                task['status'] = 'Complete'
-            self.save_data()
-            self.refresh_today_tasks()
+        controls = ttk.Frame(frame)
+        controls.pack(fill='x')
+        ttk.Label(controls, text="Group by:").pack(side='left', padx=5)
+        group_combo = ttk.Combobox(controls, width=12, state='readonly', values=['Task', 'Project', 'Priority', 'Week'])
+        group_combo.set('Project')
+        group_combo.pack(side='left', padx=5)
+        info_label = ttk.Label(frame, text="")
+        info_label.pack(anchor='w', pady=5)
+        
+        columns = ('Group', 'Planned h', 'Actual h', 'Difference h', 'Actual %')
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=20)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=300 if col == 'Group' else 110, anchor='w' if col == 'Group' else 'center')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='left', fill='y')
+        fields = {}
+        sorter = TreeSorter(tree, {'Group': 'name', 'Planned h': 'planned', 'Actual h': 'actual',
+                                   'Difference h': 'difference', 'Actual %': 'ratio'}, fields.__getitem__)
+        
+        def show(event=None):
+            tree.delete(*tree.get_children())
+            fields.clear()
+            items = {}
+            rows = self.time_report(group_combo.get())
+            for label, planned, actual in rows:
+                ratio = actual / planned * 100 if planned else None
+                item = tree.insert('', 'end', values=(label, f"{planned / 60:.1f}", f"{actual / 60:.1f}",
+                                                      f"{(actual - planned) / 60:+.1f}", '' if ratio is None else f"{ratio:.0f}%"))
+                items[item] = item
+                fields[item] = {'name': natural_key(label), 'planned': planned, 'actual': actual,
+                                'difference': actual - planned, 'ratio': -1 if ratio is None else ratio}
+            sorter.track(items)
+            sorter.apply()
+            planned, actual = sum(row[1] for row in rows), sum(row[2] for row in rows)
+            info_label.config(text=f"Planned: {planned / 60:.1f} h | Actual: {actual / 60:.1f} h | "
+                                   f"Entries: {len(self.time_log.owners)} | Running timers: {len(self.time_log.running)}")
+        
+        group_combo.bind('<<ComboboxSelected>>', show)
+        show()
     
     # Calendar Filter Functions
+    def show_month_density(self):
+        """Mark the month the date picker shows; months already marked keep their events"""
+        month, year = self.filter_calendar.get_displayed_month()
+        if (year, month) not in self.density_months or (year, month) not in self.density.months:
+            self.mark_month_density(year, month)
+    
+    def mark_month_density(self, year, month):
+        """Give each day of a month one calendar event with its task counts, colored by the
+        most important open priority; only days whose marker changed are redrawn"""
+        counts = self.density.month(year, month)
+        first = datetime(year, month, 1).toordinal()
+        last = (datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)).toordinal() - 1
+        for day in range(first, last + 1):
+            row = counts.get(day)
+            marker = None
+            if row:
+                rank = next(rank for rank, count in enumerate(row) if count)
+                marker = (f"{sum(row)} task(s): {row[0]} Blue, {row[1]} Green, {row[2]} Red, {row[3]} complete",
+                          f'density{rank}')
+            event = self.density_events.get(day)
+            if (event and event[1]) == marker:
+                continue
+            if event:
+                self.filter_calendar.calevent_remove(event[0])
+                del self.density_events[day]
+            if marker:
+                event_id = self.filter_calendar.calevent_create(datetime.fromordinal(day).date(), *marker)
+                self.density_events[day] = (event_id, marker)
+        self.density_months.add((year, month))
+    
+    def update_density_markers(self):
+        """Re-mark the months whose counts a change invalidated"""
+        for year, month in list(self.density_months):
+            if (year, month) not in self.density.months:
+                self.mark_month_density(year, month)
+    
     def apply_calendar_filter(self):
         """Apply calendar filter based on selected type"""
-        self.calendar_canvas.delete('all')
-        self.calendar_tasks = []
+        self.calendar_specs = []
+        self.calendar_boxes = defaultdict(list)
+        self.calendar_grid = SpatialGrid()
+        self.calendar_links = SpatialGrid()
         
         selected_date = self.filter_calendar.get_date()
         filter_type = self.filter_type.get()
         base_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
         
         if filter_type == "day":
-            self.show_day_timeline(base_date)
+            tasks_to_display = self.show_day_timeline(base_date)
         elif filter_type == "week":
-            self.show_week_grid(base_date)
+            tasks_to_display = self.show_week_grid(base_date)
+        elif filter_type == "month":
+            tasks_to_display = self.show_month_grid(base_date)
         else:
-            self.show_month_grid(base_date)
+            tasks_to_display = self.show_year_heatmap(base_date)
+        self.calendar_rows = tasks_to_display
+        self.selected_calendar_keys &= {(t['pid'], t['tid']) for t in tasks_to_display}
+        self.calendar_occurrences = defaultdict(list)
+        for t in tasks_to_display:
+            if t.get('occurrence'):
+                self.calendar_occurrences[(t['pid'], t['tid'])].append(t['occurrence'])
+        self.render_calendar()
     
     def get_tasks_for_date_range(self, start_date, end_date):
-        """FIX: Strictly excludes parent tasks with subtasks."""
+        """FIX: Strictly excludes parent tasks with subtasks.
+        
+        Recurring tasks contribute one row per occurrence in the range, marked with the
+        occurrence's start date and its own completion status.
+        """
         tasks_to_display = []
+        # ISO dates compare correctly as strings, which avoids parsing every task
+        range_start, range_end = start_date.isoformat(), end_date.isoformat()
         for pid, project in self.projects.items():
             tasks = self.tasks.get(pid, {})
             for tid, task in tasks.items():
                 if self.has_subtasks(pid, tid):
                     continue
-                task_start = datetime.strptime(task['start_date'], '%Y-%m-%d').date()
-                task_end = datetime.strptime(task['end_date'], '%Y-%m-%d').date()
-                if task_start <= end_date and task_end >= start_date:
+                if task.get('recurrence'):
+                    tasks_to_display.extend(self.occurrence_rows(pid, tid, start_date.toordinal(), end_date.toordinal()))
+                elif task['start_date'] <= range_end and task['end_date'] >= range_start:
                     tasks_to_display.append({
                         'pid': pid, 'tid': tid, 'project_id': project['id'],
                         'task_name': task['name'], 'time_in': task['time_in'],
@@ -1207,143 +5050,415 @@ class ProjectTaskManager:
                     })
         return tasks_to_display
     
+    def occurrence_rows(self, pid, tid, first, last):
+        """Calendar rows for the occurrences of a recurring task overlapping the ordinals first..last"""
+        task = self.tasks[pid][tid]
+        span = timedelta(days=max((datetime.fromisoformat(task['end_date']) - datetime.fromisoformat(task['start_date'])).days, 0))
+        done = set(task.get('done_dates', ()))
+        rows = []
+        for ordinal in occurrence_starts(task, first, last):
+            day = datetime.fromordinal(ordinal)
+            occurrence = day.strftime('%Y-%m-%d')
+            rows.append({
+                'pid': pid, 'tid': tid, 'project_id': self.projects[pid]['id'],
+                'task_name': task['name'], 'time_in': task['time_in'],
+                'time_out': task['time_out'], 'importance': task['priority'],
+                'start_date': occurrence, 'end_date': (day + span).strftime('%Y-%m-%d'),
+                'status': 'Complete' if occurrence in done else 'Incomplete',
+                'occurrence': occurrence
+            })
+        return rows
+    
+    def draw_calendar(self, kind, key, coords, layer='calbg', **opts):
+        """Queue one calendar item; render_calendar decides whether it gets a canvas item"""
+        spec = CanvasPool.spec(kind, key, coords, layer, **opts)
+        self.calendar_specs.append(spec)
+        return spec
+
+    def draw_calendar_task(self, task_data, slot, box, label_xy, text, line_width=1, **text_opts):
+        """Queue a task box and its label, keyed by task so redraws move the same items"""
+        task_key = (task_data['pid'], task_data['tid'])
+        key = task_key + (task_data.get('occurrence'), slot)
+        spec = self.draw_calendar('rect', ('box',) + key, box, 'calbox',
+                                  fill=self.get_priority_color(task_data['importance']))
+        spec.update(pid=task_data['pid'], tid=task_data['tid'], line_width=line_width)
+        self.style_calendar_box(spec)
+        if task_data['status'] == 'Complete': text += " ✓"
+        label = self.draw_calendar('text', ('label',) + key, label_xy, 'caltext', text=text, **text_opts)
+        label.update(pid=task_data['pid'], tid=task_data['tid'])
+        self.calendar_boxes[task_key].append(spec)
+        self.calendar_grid.insert(spec['bbox'], spec)
+
+    def get_calendar_layout(self, kind, start_date, end_date):
+        """Tasks in range plus their timeline segments, month summary or daily load; cached until the data version changes"""
+        cache_key = (kind, start_date, end_date, self.data_version)
+        layout = self.calendar_layouts.get(cache_key)
+        if layout is None:
+            if kind == 'year':
+                layout = ([], daily_load(self.get_load_rows(start_date, end_date), start_date, end_date))
+            else:
+                tasks_to_display = self.get_tasks_for_date_range(start_date, end_date)
+                arrange = layout_timeline if kind == 'timeline' else summarize_days
+                layout = (tasks_to_display, arrange(tasks_to_display, start_date, end_date))
+            self.calendar_layouts[cache_key] = layout
+            if len(self.calendar_layouts) > 16:
+                self.calendar_layouts.popitem(last=False)
+        else:
+            self.calendar_layouts.move_to_end(cache_key)
+        return layout
+
+    def draw_timeline_segments(self, segments, x_origin, col_width, top_margin, row_height, label_len, line_width, **text_opts):
+        """Queue each segment as a box in its day column, split across its overlap columns"""
+        for segment in segments:
+            task_data = segment['task']
+            lane = (col_width - 4) / segment['columns']
+            x0 = x_origin + segment['day'] * col_width + 2 + segment['column'] * lane
+            y_start = top_margin + segment['start'] * row_height / 60
+            y_end = top_margin + segment['end'] * row_height / 60
+            self.draw_calendar_task(task_data, segment['slot'], (x0, y_start, x0 + max(lane - 1, 1), y_end),
+                                    (x0 + lane / 2, (y_start + y_end) / 2),
+                                    f"[{task_data['project_id']}] {task_data['task_name']}"[:label_len],
+                                    line_width=line_width, width=max(int(lane) - 6, 1), **text_opts)
+
     def show_day_timeline(self, date):
         range_text = date.strftime('%B %d, %Y')
-        tasks_to_display = self.get_tasks_for_date_range(date, date)
+        tasks_to_display, segments = self.get_calendar_layout('timeline', date, date)
         left_margin, col_width, row_height, top_margin = 100, 800, 40, 40
-        self.calendar_canvas.create_text(left_margin + col_width // 2, 20, text=f"Timeline: {range_text}", font=('Arial', 14, 'bold'))
+        capacity = self.capacity.day(date)
+        self.draw_calendar('text', 'title', (left_margin + col_width // 2, 20), 'caltext', font=('Arial', 14, 'bold'),
+                           text=f"Timeline: {range_text} ({capacity['committed'] / 60:.1f}h of {self.capacity.limit / 60:.1f}h committed)",
+                           fill='red' if self.capacity.overloaded(date) else 'black')
         for hour in range(24):
             y_pos = top_margin + hour * row_height
-            self.calendar_canvas.create_text(50, y_pos + 20, text=f"{hour:02d}:00", font=('Arial', 10, 'bold'))
-            self.calendar_canvas.create_line(left_margin, y_pos, left_margin + col_width, y_pos, fill='lightgray')
-        for task_data in tasks_to_display:
-            try:
-                time_in_parts = task_data['time_in'].split(':')
-                time_out_parts = task_data['time_out'].split(':')
-                y_start = top_margin + int(time_in_parts[0]) * row_height + 5
-                y_end = top_margin + int(time_out_parts[0]) * row_height + 35
-                color = self.get_priority_color(task_data['importance'])
-                task_box = self.calendar_canvas.create_rectangle(left_margin + 10, y_start, left_margin + col_width - 10, y_end, fill=color, outline='black', width=2)
-                task_text = f"[{task_data['project_id']}] {task_data['task_name']}"
-                if task_data['status'] == 'Complete': task_text += " ✓"
-                self.calendar_canvas.create_text(left_margin + col_width // 2, (y_start + y_end) // 2, text=task_text, font=('Arial', 9), width=col_width - 30)
-                self.calendar_tasks.append({'box': task_box, 'pid': task_data['pid'], 'tid': task_data['tid']})
-            except: continue
+            self.draw_calendar('text', ('hour', hour), (50, y_pos + 20), 'caltext', text=f"{hour:02d}:00", font=('Arial', 10, 'bold'))
+            self.draw_calendar('line', ('hline', hour), (left_margin, y_pos, left_margin + col_width, y_pos), fill='lightgray')
+        self.draw_timeline_segments(segments, left_margin + 8, col_width - 16, top_margin, row_height, None, 2)
         self.calendar_canvas.configure(scrollregion=(0, 0, left_margin + col_width + 50, top_margin + 24 * row_height + 50))
-        self.calendar_canvas.bind('<Button-1>', self.on_calendar_click)
         self.update_filter_info(range_text, tasks_to_display)
+        return tasks_to_display
 
     def show_week_grid(self, date):
         start_date = date - timedelta(days=date.weekday())
         dates = [start_date + timedelta(days=i) for i in range(7)]
         range_text = f"Week: {start_date.strftime('%b %d')} - {dates[-1].strftime('%b %d, %Y')}"
-        left_margin, top_margin, col_width, row_height = 80, 60, 150, 30
-        self.calendar_canvas.create_text(left_margin + 3.5 * col_width, 20, text=range_text, font=('Arial', 14, 'bold'))
+        left_margin, top_margin, col_width, row_height = 80, 75, 150, 30
+        self.draw_calendar('text', 'title', (left_margin + 3.5 * col_width, 20), 'caltext', text=range_text, font=('Arial', 14, 'bold'))
         for i, day_date in enumerate(dates):
             x_pos = left_margin + i * col_width
-            self.calendar_canvas.create_text(x_pos + col_width // 2, top_margin - 20, text=day_date.strftime('%a\n%m/%d'), font=('Arial', 9, 'bold'))
-            self.calendar_canvas.create_line(x_pos, top_margin, x_pos, top_margin + 24 * row_height, fill='gray')
+            self.draw_calendar('text', ('weekday', i), (x_pos + col_width // 2, top_margin - 30), 'caltext', text=day_date.strftime('%a\n%m/%d'), font=('Arial', 9, 'bold'))
+            committed = self.capacity.day(day_date)['committed']
+            self.draw_calendar('text', ('capacity', i), (x_pos + col_width // 2, top_margin - 8), 'caltext', text=f"{committed / 60:.1f}h",
+                               font=('Arial', 8), fill='red' if committed > self.capacity.limit else 'gray')
+            self.draw_calendar('line', ('vline', i), (x_pos, top_margin, x_pos, top_margin + 24 * row_height), fill='gray')
         for hour in range(24):
             y_pos = top_margin + hour * row_height
-            self.calendar_canvas.create_text(40, y_pos + 15, text=f"{hour:02d}:00", font=('Arial', 8))
-            self.calendar_canvas.create_line(left_margin, y_pos, left_margin + 7 * col_width, y_pos, fill='lightgray')
-        tasks_to_display = self.get_tasks_for_date_range(dates[0], dates[-1])
-        for task_data in tasks_to_display:
-            task_date = datetime.strptime(task_data['start_date'], '%Y-%m-%d').date()
-            if dates[0] <= task_date <= dates[-1]:
-                day_index = (task_date - dates[0]).days
-                try:
-                    y_start = top_margin + int(task_data['time_in'].split(':')[0]) * row_height + 2
-                    y_end = top_margin + int(task_data['time_out'].split(':')[0]) * row_height + row_height - 2
-                    color = self.get_priority_color(task_data['importance'])
-                    task_box = self.calendar_canvas.create_rectangle(left_margin + day_index * col_width + 2, y_start, left_margin + day_index * col_width + col_width - 2, y_end, fill=color, outline='black')
-                    task_name = f"[{task_data['project_id']}] {task_data['task_name']}"[:20]
-                    if task_data['status'] == 'Complete': task_name += " ✓"
-                    self.calendar_canvas.create_text(left_margin + day_index * col_width + col_width//2, (y_start + y_end)//2, text=task_name, font=('Arial', 7), width=col_width - 10)
-                    self.calendar_tasks.append({'box': task_box, 'pid': task_data['pid'], 'tid': task_data['tid']})
-                except: continue
+            self.draw_calendar('text', ('hour', hour), (40, y_pos + 15), 'caltext', text=f"{hour:02d}:00", font=('Arial', 8))
+            self.draw_calendar('line', ('hline', hour), (left_margin, y_pos, left_margin + 7 * col_width, y_pos), fill='lightgray')
+        tasks_to_display, segments = self.get_calendar_layout('timeline', dates[0], dates[-1])
+        self.draw_timeline_segments(segments, left_margin, col_width, top_margin, row_height, 20, 1, font=('Arial', 7))
         self.calendar_canvas.configure(scrollregion=(0, 0, left_margin + 7 * col_width + 50, top_margin + 24 * row_height + 50))
-        self.calendar_canvas.bind('<Button-1>', self.on_calendar_click)
         self.update_filter_info(range_text, tasks_to_display)
+        return tasks_to_display
 
-    def show_month_grid(self, date):
+    def month_range(self, date):
         first_day = date.replace(day=1)
-        last_day = (date.replace(month=date.month % 12 + 1, day=1) - timedelta(days=1)) if date.month < 12 else date.replace(day=31)
+        next_month = first_day.replace(year=first_day.year + 1, month=1) if first_day.month == 12 else first_day.replace(month=first_day.month + 1)
+        return first_day, next_month - timedelta(days=1)
+
+    def show_month_grid(self, date):
+        first_day, last_day = self.month_range(date)
         range_text = date.strftime('%B %Y')
         left_margin, top_margin, col_width, row_height = 100, 80, 140, 100
-        self.calendar_canvas.create_text(left_margin + 3.5 * col_width, 20, text=range_text, font=('Arial', 16, 'bold'))
+        self.draw_calendar('text', 'title', (left_margin + 3.5 * col_width, 20), 'caltext', text=range_text, font=('Arial', 16, 'bold'))
         days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        for i, d in enumerate(days): self.calendar_canvas.create_text(left_margin + i * col_width + col_width//2, top_margin-20, text=d, font=('Arial', 10, 'bold'))
+        for i, d in enumerate(days): self.draw_calendar('text', ('weekday', i), (left_margin + i * col_width + col_width//2, top_margin-20), 'caltext', text=d, font=('Arial', 10, 'bold'))
         week_starts = []
         curr = first_day - timedelta(days=first_day.weekday())
         while curr <= last_day:
             week_starts.append(curr)
             curr += timedelta(days=7)
-        for w_idx, w_start in enumerate(week_starts[:5]):
+        tasks_to_display, summary = self.get_calendar_layout('month', first_day, last_day)
+        colors = [self.get_priority_color(p) for p in ('Blue', 'Green', 'Red')]
+        for w_idx, w_start in enumerate(week_starts):
             y_pos = top_margin + w_idx * row_height
             for d_idx in range(7):
                 cell_date = w_start + timedelta(days=d_idx)
                 x_pos = left_margin + d_idx * col_width
-                self.calendar_canvas.create_rectangle(x_pos, y_pos, x_pos + col_width, y_pos + row_height, outline='gray')
-                self.calendar_canvas.create_text(x_pos + 10, y_pos + 10, text=cell_date.day, font=('Arial', 8), fill='black' if first_day <= cell_date <= last_day else 'lightgray', anchor='nw')
-                if first_day <= cell_date <= last_day:
-                    day_tasks = [t for t in self.get_tasks_for_date_range(cell_date, cell_date)]
-                    y_off = 25
-                    for t_data in day_tasks[:3]:
-                        color = self.get_priority_color(t_data['importance'])
-                        t_box = self.calendar_canvas.create_rectangle(x_pos + 5, y_pos + y_off, x_pos + col_width - 5, y_pos + y_off + 20, fill=color, outline='black')
-                        t_name = f"[{t_data['project_id']}] {t_data['task_name']}"[:12]
-                        if t_data['status'] == 'Complete': t_name += " ✓"
-                        self.calendar_canvas.create_text(x_pos + col_width//2, y_pos + y_off + 10, text=t_name, font=('Arial', 7), width=col_width - 15)
-                        self.calendar_tasks.append({'box': t_box, 'pid': t_data['pid'], 'tid': t_data['tid']})
-                        y_off += 22
-        self.calendar_canvas.configure(scrollregion=(0, 0, left_margin + 7 * col_width + 50, top_margin + 5 * row_height + 50))
-        self.calendar_canvas.bind('<Button-1>', self.on_calendar_click)
-        self.update_filter_info(range_text, self.get_tasks_for_date_range(first_day, last_day))
+                in_month = first_day <= cell_date <= last_day
+                over = in_month and self.capacity.overloaded(cell_date)
+                self.draw_calendar('rect', ('cell', w_idx, d_idx), (x_pos, y_pos, x_pos + col_width, y_pos + row_height),
+                                   outline='red' if over else 'gray', width=2 if over else 1)
+                self.draw_calendar('text', ('daynum', w_idx, d_idx), (x_pos + 10, y_pos + 10), 'caltext', text=str(cell_date.day), font=('Arial', 8), fill='black' if in_month else 'lightgray', anchor='nw')
+                bucket = summary['days'].get((cell_date - first_day).days) if in_month else None
+                if bucket is None:
+                    continue
+                count = len(bucket['tasks'])
+                self.draw_calendar('text', ('ratio', w_idx, d_idx), (x_pos + col_width - 5, y_pos + 8), 'caltext',
+                                   text=f"{bucket['completed']}/{count} ✓", font=('Arial', 7), fill='gray', anchor='ne')
+                self.draw_calendar('text', ('capacity', w_idx, d_idx), (x_pos + 5, y_pos + row_height - 2), 'caltext', anchor='sw',
+                                   text=f"{self.capacity.day(cell_date)['committed'] / 60:.1f}h", font=('Arial', 7), fill='red' if over else 'gray')
+                # Priority mix strip: one segment per priority, sized by its share of the day
+                strip_x = x_pos + 30
+                strip_width = col_width - 80
+                for rank, n in enumerate(bucket['mix']):
+                    if n:
+                        seg = strip_width * n / count
+                        self.draw_calendar('rect', ('mix', w_idx, d_idx, rank), (strip_x, y_pos + 10, strip_x + seg, y_pos + 16), fill=colors[rank], outline='')
+                        strip_x += seg
+                y_off = 24
+                for _, _, slot, t_data in bucket['tasks'][:3]:
+                    self.draw_calendar_task(t_data, slot, (x_pos + 5, y_pos + y_off, x_pos + col_width - 5, y_pos + y_off + 18),
+                                            (x_pos + col_width//2, y_pos + y_off + 9),
+                                            f"[{t_data['project_id']}] {t_data['task_name']}"[:12], font=('Arial', 7), width=col_width - 15)
+                    y_off += 20
+                if count > 3:
+                    more_xy = (x_pos + col_width - 5, y_pos + row_height - 2)
+                    self.draw_calendar('text', ('more', w_idx, d_idx), more_xy, 'caltext', text=f"+{count - 3} more",
+                                       font=('Arial', 7, 'underline'), fill='blue', anchor='se')
+                    self.calendar_links.insert((x_pos + col_width - 70, y_pos + row_height - 16, x_pos + col_width, y_pos + row_height), ('more', cell_date))
+        self.calendar_canvas.configure(scrollregion=(0, 0, left_margin + 7 * col_width + 50, top_margin + len(week_starts) * row_height + 50))
+        self.show_filter_stats(range_text, summary['total'], summary['completed'])
+        return tasks_to_display
+
+    def show_day_popover(self, day, event):
+        """List every task of a month cell, including the ones the cell has no room for"""
+        first_day, last_day = self.month_range(day)
+        bucket = self.get_calendar_layout('month', first_day, last_day)[1]['days'].get((day - first_day).days)
+        if bucket is None:
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"Tasks on {day.strftime('%B %d, %Y')} ({len(bucket['tasks'])})")
+        win.geometry(f"+{event.x_root}+{event.y_root}")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        
+        columns = ('Project', 'Task', 'Time', 'Priority', 'Status')
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=12, selectmode='extended')
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150 if col == 'Task' else 90)
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        scrollbar.grid(row=0, column=1, sticky='ns')
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=1)
+        
+        rows = {}
+        for _, _, _, t_data in bucket['tasks']:
+            item = tree.insert('', 'end', values=(t_data['project_id'], t_data['task_name'],
+                                                  f"{t_data['time_in']}-{t_data['time_out']}",
+                                                  t_data['importance'], t_data['status']))
+            rows[item] = (t_data['pid'], t_data['tid'])
+        TreeSorter(tree, {'Project': 'project', 'Task': 'name', 'Time': 'time', 'Priority': 'priority'},
+                   self.sort_fields).track(rows)
+        
+        def select():
+            chosen = {rows[item] for item in tree.selection()}
+            if chosen:
+                self.set_calendar_selection(chosen)
+            win.destroy()
+        
+        btn_frame = ttk.Frame(frame)
+        btn_frame.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+        ttk.Button(btn_frame, text="Select in Calendar", command=select).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Close", command=win.destroy).pack(side='left', padx=5)
+
+    def get_load_rows(self, first_day, last_day):
+        """(start, end, time_in, time_out, complete) of every leaf task, for daily_load;
+        recurring tasks add a row per occurrence in the range"""
+        rows = []
+        first, last = first_day.toordinal(), last_day.toordinal()
+        for pid in self.projects:
+            for tid, task in self.tasks.get(pid, {}).items():
+                if self.has_subtasks(pid, tid):
+                    continue
+                if task.get('recurrence'):
+                    rows.extend((t['start_date'], t['end_date'], t['time_in'], t['time_out'], t['status'] == 'Complete')
+                                for t in self.occurrence_rows(pid, tid, first, last))
+                else:
+                    rows.append((task['start_date'], task['end_date'], task['time_in'], task['time_out'],
+                                 task['status'] == 'Complete'))
+        return rows
+
+    def show_year_heatmap(self, date):
+        """One cell per day, shaded by scheduled hours, with a bar for the completed share"""
+        first_day, last_day = date.replace(month=1, day=1), date.replace(month=12, day=31)
+        load = self.get_calendar_layout('year', first_day, last_day)[1]
+        left_margin, top_margin, cell = 60, 70, 17
+        self.draw_calendar('text', 'title', (left_margin + 26 * cell, 20), 'caltext', text=f"Year {date.year}: scheduled load", font=('Arial', 14, 'bold'))
+        for d_idx, d in enumerate(['Mon', 'Wed', 'Fri', 'Sun']):
+            self.draw_calendar('text', ('weekday', d_idx), (left_margin - 8, top_margin + (2 * d_idx) * cell + cell // 2), 'caltext', text=d, font=('Arial', 8), anchor='e')
+        busiest = max(int(load['minutes'].max()), 1)
+        offset = first_day.weekday()
+        for day in range((last_day - first_day).days + 1):
+            cell_date = first_day + timedelta(days=day)
+            column, row = divmod(day + offset, 7)
+            x0, y0 = left_margin + column * cell, top_margin + row * cell
+            if cell_date.day == 1:
+                self.draw_calendar('text', ('monthname', cell_date.month), (x0, top_margin - 10), 'caltext', text=cell_date.strftime('%b'), font=('Arial', 8), anchor='w')
+            count, minutes = int(load['tasks'][day]), int(load['minutes'][day])
+            # Shade from white to deep orange by the share of the busiest day's hours
+            share = minutes / busiest if count else 0
+            fill = '#%02x%02x%02x' % (255, int(255 - 115 * share), int(255 - 255 * share))
+            over = minutes > self.capacity.limit
+            self.draw_calendar('rect', ('day', day), (x0, y0, x0 + cell - 2, y0 + cell - 2), fill=fill,
+                               outline='red' if over else 'lightgray', width=2 if over else 1)
+            if count:
+                done = int(load['completed'][day]) / count
+                self.draw_calendar('rect', ('done', day), (x0 + 1, y0 + cell - 5, x0 + 1 + (cell - 4) * done, y0 + cell - 3), fill='green', outline='')
+            self.calendar_links.insert((x0, y0, x0 + cell - 2, y0 + cell - 2), ('day', cell_date))
+        weeks = (last_day - first_day).days // 7 + 2
+        legend_y = top_margin + 8 * cell
+        self.draw_calendar('text', 'legend', (left_margin, legend_y), 'caltext', anchor='w', font=('Arial', 8),
+                           text=f"Darker = more scheduled hours (busiest day {busiest / 60:.1f}h); green bar = share completed; red = over the daily limit. Click a day to open its timeline.")
+        self.calendar_canvas.configure(scrollregion=(0, 0, left_margin + weeks * cell + 50, legend_y + 40))
+        total_tasks = int(load['tasks'].sum())
+        hours = int(load['minutes'].sum()) / 60
+        self.filter_info_label.config(text=f"Year {date.year} | Task-days: {total_tasks} | Scheduled: {hours:.1f}h | Busiest day: {busiest / 60:.1f}h")
+        return []
+
+    def follow_calendar_link(self, link, event):
+        """Open what a clicked link points at: a month cell's popover or a year cell's day"""
+        action, day = link
+        if action == 'more':
+            self.show_day_popover(day, event)
+        else:
+            self.filter_calendar.selection_set(day)
+            self.filter_type.set('day')
+            self.apply_calendar_filter()
+
+    def calendar_viewport(self):
+        """Visible part of the calendar canvas, padded so short scrolls reuse drawn items"""
+        canvas = self.calendar_canvas
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = int(canvas.cget('width')), int(canvas.cget('height'))
+        x, y = canvas.canvasx(0), canvas.canvasy(0)
+        margin = 150
+        return (x - margin, y - margin, x + width + margin, y + height + margin)
+
+    def render_calendar(self):
+        """Draw the queued calendar specs that fall inside the viewport"""
+        self.calendar_render_pending = False
+        self.calendar_pool.render(self.calendar_specs, self.calendar_viewport())
+        self.calendar_items = {s['item']: s for s in self.calendar_specs if s['item'] is not None and 'pid' in s}
+
+    def schedule_calendar_render(self):
+        """Coalesce scroll and resize events into one render once Tk is idle"""
+        if self.calendar_render_pending:
+            return
+        self.calendar_render_pending = True
+        self.root.after_idle(self.render_calendar)
+
+    def scroll_calendar(self, view, *args):
+        view(*args)
+        self.schedule_calendar_render()
 
     def update_filter_info(self, range_text, tasks):
-        total = len(tasks)
-        completed = sum(1 for t in tasks if t['status'] == 'Complete')
+        self.show_filter_stats(range_text, len(tasks), sum(1 for t in tasks if t['status'] == 'Complete'))
+
+    def show_filter_stats(self, range_text, total, completed):
         if total > 0:
             self.filter_info_label.config(text=f"{range_text} | Total: {total} | Completed: {completed} | Progress: {(completed/total*100):.1f}%")
         else:
             self.filter_info_label.config(text=f"{range_text} | No tasks found")
 
-    def on_calendar_click(self, event):
+    def style_calendar_box(self, spec):
+        chosen = (spec['pid'], spec['tid']) in self.selected_calendar_keys
+        spec['opts']['outline'] = 'blue' if chosen else 'black'
+        spec['opts']['width'] = 3 if chosen else spec['line_width']
+
+    def set_calendar_selection(self, keys):
+        """Restyle only the boxes of tasks entering or leaving the selection"""
+        changed = keys ^ self.selected_calendar_keys
+        self.selected_calendar_keys = keys
+        for key in changed:
+            for spec in self.calendar_boxes.get(key, ()):
+                self.style_calendar_box(spec)
+                if spec['item'] is not None:
+                    self.calendar_pool.place(spec['item'], spec)
+
+    def calendar_hit(self, x, y):
+        """Task under the pointer: the item Tk reports first, else the topmost box in the grid"""
+        current = self.calendar_canvas.find_withtag('current')
+        spec = self.calendar_items.get(current[0]) if current else None
+        if spec is None:
+            hits = self.calendar_grid.at(x, y)
+            spec = hits[-1] if hits else None
+        return (spec['pid'], spec['tid']) if spec else None
+
+    def on_calendar_click(self, event, extend=False):
         x, y = self.calendar_canvas.canvasx(event.x), self.calendar_canvas.canvasy(event.y)
-        closest = self.calendar_canvas.find_closest(x, y)
-        if closest:
-            clicked_item = closest[0]
-            for task_data in self.calendar_tasks:
-                if task_data['box'] == clicked_item:
-                    self.calendar_canvas.itemconfig(clicked_item, width=3, outline='blue')
-                    self.selected_calendar_task = task_data
-                else:
-                    self.calendar_canvas.itemconfig(task_data['box'], width=1, outline='black')
+        self.calendar_drag = {'x': x, 'y': y, 'extend': extend, 'band': False}
+
+    def on_calendar_drag(self, event):
+        """Rubber-band selection: stretch a dashed rectangle from the press point"""
+        drag = self.calendar_drag
+        if drag is None:
+            return
+        x, y = self.calendar_canvas.canvasx(event.x), self.calendar_canvas.canvasy(event.y)
+        if not drag['band'] and abs(x - drag['x']) < 4 and abs(y - drag['y']) < 4:
+            return
+        drag['band'] = True
+        if self.calendar_band is None:
+            self.calendar_band = self.calendar_canvas.create_rectangle(drag['x'], drag['y'], x, y, outline='blue', dash=(4, 2))
+        else:
+            self.calendar_canvas.coords(self.calendar_band, drag['x'], drag['y'], x, y)
+            self.calendar_canvas.itemconfigure(self.calendar_band, state='normal')
+            self.calendar_canvas.tag_raise(self.calendar_band)
+
+    def on_calendar_release(self, event):
+        drag, self.calendar_drag = self.calendar_drag, None
+        if drag is None:
+            return
+        x, y = self.calendar_canvas.canvasx(event.x), self.calendar_canvas.canvasy(event.y)
+        if drag['band']:
+            self.calendar_canvas.itemconfigure(self.calendar_band, state='hidden')
+            band = (min(x, drag['x']), min(y, drag['y']), max(x, drag['x']), max(y, drag['y']))
+            hits = {(s['pid'], s['tid']) for s in self.calendar_grid.overlapping(band)}
+            keys = self.selected_calendar_keys | hits if drag['extend'] else hits
+        else:
+            clicked = self.calendar_hit(x, y)
+            links = self.calendar_links.at(x, y) if clicked is None else None
+            if links:
+                self.follow_calendar_link(links[-1], event)
+                return
+            if drag['extend']:
+                keys = self.selected_calendar_keys ^ {clicked} if clicked else self.selected_calendar_keys
+            else:
+                keys = {clicked} if clicked else set()
+        self.set_calendar_selection(set(keys))
+
+    def get_selected_calendar_keys(self):
+        return sorted(self.selected_calendar_keys)
 
     def mark_filter_complete(self):
-        if self.selected_calendar_task:
-            pid, tid = self.selected_calendar_task['pid'], self.selected_calendar_task['tid']
-            self.tasks[pid][tid]['status'] = 'Complete'
-            self.save_data()
+        keys = self.get_selected_calendar_keys()
+        if keys:
+            self.set_status_shown(keys, 'Complete', self.calendar_occurrences)
             self.apply_calendar_filter()
 
     def mark_filter_incomplete(self):
-        if self.selected_calendar_task:
-            pid, tid = self.selected_calendar_task['pid'], self.selected_calendar_task['tid']
-            self.tasks[pid][tid]['status'] = 'Incomplete'
-            self.save_data()
+        keys = self.get_selected_calendar_keys()
+        if keys:
+            self.set_status_shown(keys, 'Incomplete', self.calendar_occurrences)
             self.apply_calendar_filter()
 
+    def bulk_filter_action(self, action):
+        keys = self.get_selected_calendar_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select a task")
+            return
+        action(keys, on_done=self.apply_calendar_filter)
+
     def export_filtered_csv(self):
         filename = filedialog.asksaveasfilename(defaultextension=".csv")
         if filename:
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow(['Project_ID', 'Task_Name', 'Time_In', 'Time_Out', 'Importance', 'Status'])
-                for task_data in self.calendar_tasks:
-                    task = self.tasks[task_data['pid']][task_data['tid']]
-                    writer.writerow([self.projects[task_data['pid']]['id'], task['name'], task['time_in'], task['time_out'], task['priority'], task['status']])
+                writer.writerows(calendar_export_rows(self.calendar_rows))
             messagebox.showinfo("Success", "Exported successfully")
 
     def export_csv(self):
@@ -1354,27 +5469,526 @@ class ProjectTaskManager:
         if filename:
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow(['Task_ID', 'Name', 'Parent', 'Priority', 'Status'])
-                for tid, task in self.tasks[pid].items():
-                    writer.writerow([tid, task['name'], task.get('parent', ''), task['priority'], task['status']])
+                writer.writerow(self.EXPORT_COLUMNS)
+                writer.writerows(self.export_rows(pid, self.get_filtered_tasks(pid, self.progress_query)))
             messagebox.showinfo("Success", "Exported successfully")
 
+    EXPORT_COLUMNS = ['Task_ID', 'Name', 'Parent', 'Priority', 'Status', 'Depth', 'Subtasks_Done']
+
+    def export_rows(self, pid, tasks=None):
+        """Rows in hierarchy order; orphans and cycle members are appended, never dropped"""
+        if tasks is None:
+            tasks = self.tasks[pid]
+        walk = self.hierarchy.walk(pid, tasks, include_unreached=True)
+        rows = []
+        for tid, parent, depth in walk.order:
+            task = tasks[tid]
+            done = f"{walk.completed[tid]}/{walk.size[tid]}" if walk.size[tid] > 1 else ''
+            rows.append([tid, task['name'], task.get('parent', ''), task['priority'], task['status'], depth, done])
+        return rows
+
     def import_csv(self):
         filename = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if filename:
             messagebox.showinfo("Note", "Import logic depends on specific CSV structure. Standard format required.")
 
+    def show_history(self):
+        """Browse the saved history: a project's tasks as of a date, or what changed between two dates"""
+        win = tk.Toplevel(self.root)
+        win.title("History")
+        win.geometry("1000x600")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        
+        controls = ttk.Frame(frame)
+        controls.pack(fill='x')
+        ttk.Label(controls, text="From:").pack(side='left', padx=5)
+        from_entry = DateEntry(controls, width=12)
+        from_entry.set_date(datetime.now() - timedelta(days=7))
+        from_entry.pack(side='left')
+        ttk.Label(controls, text="To:").pack(side='left', padx=5)
+        to_entry = DateEntry(controls, width=12)
+        to_entry.pack(side='left')
+        ttk.Label(controls, text="Project:").pack(side='left', padx=5)
+        project_combo = ttk.Combobox(controls, width=30, state='readonly',
+                                     values=["(All projects)"] + [f"{p} - {info['name']}" for p, info in self.projects.items()])
+        project_combo.set(self.progress_project_select.get() or "(All projects)")
+        project_combo.pack(side='left', padx=5)
+        info_label = ttk.Label(frame, text="")
+        info_label.pack(anchor='w', pady=5)
+        
+        tree = ttk.Treeview(frame, show='headings', height=22)
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='left', fill='y')
+        
+        def fill(columns, rows):
+            tree.delete(*tree.get_children())
+            tree['columns'] = columns
+            for col in columns:
+                tree.heading(col, text=col)
+                tree.column(col, width=220 if col in ('Task', 'Old', 'New') else 100)
+            for row in rows:
+                tree.insert('', 'end', values=[str('' if value is None else value)[:80] for value in row])
+        
+        def state_at(day):
+            """State at the end of `day`; today means the live data"""
+            if day >= datetime.now().date():
+                return self.projects, self.tasks
+            self.history.flush(self.projects, self.tasks)
+            return self.history.state_at(datetime.combine(day, datetime.max.time()))
+        
+        def selected_pid():
+            choice = project_combo.get()
+            return None if choice.startswith('(All') else choice.split(' - ')[0]
+        
+        def show_state():
+            day = from_entry.get_date()
+            state = state_at(day)
+            if state is None:
+                info_label.config(text=f"No history recorded as far back as {day}")
+                fill((), [])
+                return
+            projects, tasks = state
+            pid = selected_pid()
+            rows = [(p, f"{tid} - {task['name']}", task['status'], task['priority'], task['start_date'], task['end_date'])
+                    for p in projects if pid is None or p == pid
+                    for tid, task in tasks.get(p, {}).items()]
+            done = sum(1 for row in rows if row[2] == 'Complete')
+            info_label.config(text=f"As of {day}: {len(rows)} tasks, {done} complete")
+            fill(('Project', 'Task', 'Status', 'Priority', 'Start', 'End'), rows)
+        
+        def show_diff():
+            start, end = from_entry.get_date(), to_entry.get_date()
+            old, new = state_at(start), state_at(end)
+            if old is None or new is None:
+                info_label.config(text=f"No history recorded as far back as {start if old is None else end}")
+                fill((), [])
+                return
+            rows = HistoryStore.diff(old, new, selected_pid())
+            info_label.config(text=f"{len(rows)} change(s) from the end of {start} to the end of {end}")
+            fill(('Project', 'Task', 'Change', 'Field', 'Old', 'New'), rows)
+        
+        ttk.Button(controls, text="Tasks as of From", command=show_state).pack(side='left', padx=5)
+        ttk.Button(controls, text="Changes From → To", command=show_diff).pack(side='left', padx=5)
+        ttk.Button(controls, text="Close", command=win.destroy).pack(side='left', padx=5)
+
+    # Gantt Functions
+    GANTT_ZOOM = {'day': 24, 'week': 6, 'month': 1.5}
+    GANTT_GUTTER, GANTT_HEADER, GANTT_ROW = 260, 40, 22
+
+    def update_gantt_project_list(self):
+        values = [f"{p['id']} - {p['name']}" for p in self.projects.values()]
+        self.gantt_project_select['values'] = values
+        if self.gantt_project_select.get() not in values:
+            if values:
+                self.gantt_project_select.current(0)
+            else:
+                self.gantt_project_select.set('')
+        self.show_gantt()
+
+    def show_gantt(self):
+        """Point the chart at the selected project, keeping scroll and collapse state for the same one"""
+        selection = self.gantt_project_select.get()
+        pid = selection.split(' - ')[0] if selection else None
+        if pid != self.gantt_pid:
+            self.gantt_pid = pid
+            self.gantt_collapsed = set()
+            self.gantt_top = 0
+            self.gantt_left = None
+        self.schedule_gantt_render()
+
+    def get_gantt_layout(self):
+        """Rows and bar geometry for the shown project; rebuilt only when the data changes"""
+        key = (self.gantt_pid, self.data_version)
+        if self.gantt_layout_key != key:
+            pid = self.gantt_pid
+            tasks = self.tasks.get(pid, {})
+            self.gantt_layout = GanttLayout(self.hierarchy.walk(pid, include_unreached=True), tasks, self.projects.get(pid))
+            self.gantt_layout_key = key
+            self.gantt_collapsed &= set(tasks)
+            self.gantt_rows = self.gantt_layout.visible(self.gantt_collapsed)
+        return self.gantt_layout
+
+    def gantt_viewport(self):
+        canvas = self.gantt_canvas
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = int(canvas.cget('width')), int(canvas.cget('height'))
+        return width, height
+
+    def set_gantt_zoom(self):
+        """Change zoom keeping the date at the left edge of the chart in place"""
+        if self.gantt_left is not None:
+            self.gantt_left *= self.GANTT_ZOOM[self.gantt_zoom.get()] / self.gantt_scale
+        self.schedule_gantt_render()
+
+    def collapse_gantt(self, collapse):
+        layout = self.get_gantt_layout()
+        self.gantt_collapsed = {row[0] for row in layout.rows if row[4] > 1} if collapse else set()
+        self.gantt_rows = layout.visible(self.gantt_collapsed)
+        self.gantt_top = 0
+        self.schedule_gantt_render()
+
+    def scroll_gantt_today(self):
+        layout = self.get_gantt_layout()
+        width = self.gantt_viewport()[0] - self.GANTT_GUTTER
+        self.gantt_left = (datetime.now().toordinal() - layout.origin) * self.GANTT_ZOOM[self.gantt_zoom.get()] - width / 3
+        self.schedule_gantt_render()
+
+    def scroll_gantt(self, axis, *args):
+        """Scrollbar and wheel handler: moves the virtual offsets and re-renders once idle"""
+        width, height = self.gantt_viewport()
+        if axis == 'y':
+            page = max((height - self.GANTT_HEADER) // self.GANTT_ROW, 1)
+            total, current, unit = len(self.gantt_rows), self.gantt_top, 3
+        else:
+            page = max(width - self.GANTT_GUTTER, 1)
+            total = self.get_gantt_layout().days * self.GANTT_ZOOM[self.gantt_zoom.get()]
+            current, unit = self.gantt_left or 0, 60
+        if args[0] == 'moveto':
+            target = float(args[1]) * total
+        else:
+            target = current + int(args[1]) * (page if args[2] == 'pages' else unit)
+        target = max(min(target, total - page), 0)
+        if axis == 'y':
+            self.gantt_top = int(target)
+        else:
+            self.gantt_left = target
+        self.schedule_gantt_render()
+
+    def schedule_gantt_render(self):
+        if self.gantt_render_pending:
+            return
+        self.gantt_render_pending = True
+        self.root.after_idle(self.render_gantt)
+
+    def gantt_columns(self, first_day, last_day, zoom):
+        """(ordinal, label) for each time column boundary between two ordinals"""
+        day = datetime.fromordinal(first_day).date()
+        end = datetime.fromordinal(last_day).date()
+        if zoom == 'day':
+            while day <= end:
+                yield day.toordinal(), day.strftime('%d\n%b') if day.day == 1 or day.weekday() == 0 else day.strftime('%d')
+                day += timedelta(days=1)
+        elif zoom == 'week':
+            day -= timedelta(days=day.weekday())
+            while day <= end:
+                yield day.toordinal(), day.strftime('%b %d')
+                day += timedelta(days=7)
+        else:
+            day = day.replace(day=1)
+            while day <= end:
+                yield day.toordinal(), day.strftime('%b %Y')
+                day = day.replace(year=day.year + 1, month=1) if day.month == 12 else day.replace(month=day.month + 1)
+
+    def render_gantt(self):
+        """Draw only the rows and time columns inside the viewport from the precomputed layout"""
+        self.gantt_render_pending = False
+        width, height = self.gantt_viewport()
+        specs = []
+        if self.gantt_pid is None or self.gantt_pid not in self.projects:
+            self.gantt_pool.render(specs, (0, 0, width, height))
+            return
+        layout = self.get_gantt_layout()
+        zoom = self.gantt_zoom.get()
+        scale = self.gantt_scale = self.GANTT_ZOOM[zoom]
+        gutter, header, row_h = self.GANTT_GUTTER, self.GANTT_HEADER, self.GANTT_ROW
+        chart_w = max(width - gutter, 1)
+        total_w = layout.days * scale
+        if self.gantt_left is None:
+            self.gantt_left = max((datetime.now().toordinal() - layout.origin) * scale - chart_w / 3, 0)
+        self.gantt_left = max(min(self.gantt_left, total_w - chart_w), 0)
+        page = max((height - header) // row_h, 1)
+        self.gantt_top = max(min(self.gantt_top, len(self.gantt_rows) - page), 0)
+        left, top = self.gantt_left, self.gantt_top
+        
+        def x_of(day):
+            return gutter + day * scale - left
+        
+        # Time columns: header labels and gridlines for the visible date span only
+        first_day = layout.origin + int(left // scale)
+        last_day = layout.origin + int((left + chart_w) // scale) + 1
+        for ordinal, label in self.gantt_columns(first_day, last_day, zoom):
+            x = x_of(ordinal - layout.origin)
+            if x < gutter:
+                continue
+            specs.append(CanvasPool.spec('line', ('col', ordinal), (x, header, x, height), fill='#e6e6e6'))
+            specs.append(CanvasPool.spec('text', ('collabel', ordinal), (x + 2, header / 2), 'caltext', text=label, font=('Arial', 7), anchor='w'))
+        today = datetime.now().toordinal() - layout.origin
+        if gutter <= x_of(today) <= width:
+            specs.append(CanvasPool.spec('line', 'today', (x_of(today), header, x_of(today), height), 'calbox', fill='red', width=2))
+        specs.append(CanvasPool.spec('line', 'header', (0, header, width, header), fill='gray'))
+        specs.append(CanvasPool.spec('line', 'gutter', (gutter, 0, gutter, height), fill='gray'))
+        
+        tasks = self.tasks.get(self.gantt_pid, {})
+        for slot, index in enumerate(self.gantt_rows[top:top + page + 1]):
+            tid, depth, start, end, size = layout.rows[index]
+            task = tasks[tid]
+            y = header + slot * row_h
+            toggle = ('▸ ' if tid in self.gantt_collapsed else '▾ ') if size > 1 else '   '
+            specs.append(CanvasPool.spec('text', ('label', tid), (6 + depth * 14, y + row_h / 2), 'caltext', anchor='w',
+                                         text=f"{toggle}{tid} {task['name']}"[:40], font=('Arial', 8, 'bold') if size > 1 else ('Arial', 8)))
+            if start is None:
+                continue
+            x0, x1 = max(x_of(start), gutter), min(x_of(end), width)
+            if x0 >= x1:
+                continue
+            done = task['status'] == 'Complete'
+            critical = self.dependencies.critical((self.gantt_pid, tid))
+            specs.append(CanvasPool.spec('rect', ('bar', tid), (x0, y + 4, x1, y + row_h - 4), 'calbox',
+                                         fill='gray70' if size > 1 else self.get_priority_color(task['priority']),
+                                         outline='red' if critical else 'darkgreen' if done else 'black',
+                                         width=2 if critical or done else 1))
+        self.gantt_pool.render(specs, (0, 0, width, height))
+        
+        rows = max(len(self.gantt_rows), 1)
+        self.gantt_vbar.set(top / rows, min((top + page) / rows, 1))
+        self.gantt_hbar.set(left / total_w, min((left + chart_w) / total_w, 1))
+
+    def on_gantt_click(self, event):
+        """Clicking a parent row's label expands or collapses its subtree"""
+        if event.x > self.GANTT_GUTTER or event.y < self.GANTT_HEADER or self.gantt_layout is None:
+            return
+        slot = self.gantt_top + int((event.y - self.GANTT_HEADER) // self.GANTT_ROW)
+        if slot >= len(self.gantt_rows):
+            return
+        tid, size = self.gantt_layout.rows[self.gantt_rows[slot]][0::4]
+        if size > 1:
+            self.gantt_collapsed ^= {tid}
+            self.gantt_rows = self.gantt_layout.visible(self.gantt_collapsed)
+            self.schedule_gantt_render()
+
+    # Workspace Functions
+    # Below this many bytes in all, files are parsed in-process: starting worker processes
+    # (a whole interpreter each in frozen builds) costs more than the parsing
+    WORKSPACE_POOL_BYTES = 16 * 1024 * 1024
+
+    def add_workspace(self, path):
+        """Register another workspace file under a name unique among the open ones"""
+        name = base = workspace_name(path)
+        number = 1
+        while name in self.workspaces:
+            number += 1
+            name = f"{base}{number}"
+        self.workspaces[name] = path
+        return name
+    
+    def workspace_of(self, pid):
+        owner = pid.split(':', 1)[0]
+        return owner if ':' in pid and owner in self.workspaces else self.primary_workspace
+    
+    def file_id(self, pid, name):
+        """How workspace `name` writes a project ID: its own bare, other workspaces' qualified"""
+        owner = self.workspace_of(pid)
+        bare = pid if owner == self.primary_workspace else pid.split(':', 1)[1]
+        return bare if owner == name else f"{owner}:{bare}"
+    
+    def split_workspaces(self):
+        """{name: (projects, tasks)} of the combined model as each workspace file stores it"""
+        split = {name: ({}, {}) for name in self.workspaces}
+        for pid, project in self.projects.items():
+            name = self.workspace_of(pid)
+            if name == self.primary_workspace:
+                split[name][0][pid] = project
+                split[name][1][pid] = self.tasks.get(pid, {})
+                continue
+            local = self.file_id(pid, name)
+            split[name][0][local] = dict(project, id=local)
+            split[name][1][local] = {
+                tid: dict(task, depends_on=[[self.file_id(p, name), t] for p, t in task['depends_on']])
+                if task.get('depends_on') else task for tid, task in self.tasks.get(pid, {}).items()
+            }
+        return split
+    
+    def read_workspaces(self):
+        """Parse every workspace file, one worker process per file when there are several large ones"""
+        names = list(self.workspaces)
+        paths = [self.workspaces[name] for name in names]
+        primaries = [self.primary_workspace] * len(names)
+        workers = min(len(names), os.cpu_count() or 1)
+        size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        if workers == 1 or size < self.WORKSPACE_POOL_BYTES:
+            return list(map(read_workspace, paths, names, primaries))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(read_workspace, paths, names, primaries))
+    
+    def open_workspace(self):
+        path = filedialog.askopenfilename(title="Open Workspace", filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if not path:
+            return
+        if any(os.path.abspath(path) == os.path.abspath(open_path) for open_path in self.workspaces.values()):
+            messagebox.showwarning("Warning", "That workspace is already open")
+            return
+        self.save_data()
+        name = self.add_workspace(path)
+        try:
+            self.load_data()
+        except Exception as e:
+            # load_data left the model as it was
+            del self.workspaces[name]
+            messagebox.showwarning("Warning", f"Could not open workspace: {e}")
+            return
+        self.refresh_all_tabs()
+        messagebox.showinfo("Success", f"Opened workspace '{name}' ({sum(1 for pid in self.projects if self.workspace_of(pid) == name)} projects)")
+    
+    def close_workspace(self):
+        """Pick an open workspace (other than the primary one) to save and close"""
+        names = [name for name in self.workspaces if name != self.primary_workspace]
+        if not names:
+            messagebox.showinfo("Info", "Only the primary workspace is open")
+            return
+        win = tk.Toplevel(self.root)
+        win.title("Close Workspace")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        listbox = tk.Listbox(frame, width=60, height=min(len(names), 10))
+        for name in names:
+            listbox.insert(tk.END, f"{name} - {self.workspaces[name]}")
+        listbox.pack(fill='both', expand=True)
+        
+        def close():
+            selected = listbox.curselection()
+            if not selected:
+                return
+            self.save_data()
+            name = names[selected[0]]
+            path = self.workspaces.pop(name)
+            try:
+                self.load_data()
+            except Exception as e:
+                # load_data left the model as it was, so the workspace stays open
+                self.workspaces[name] = path
+                messagebox.showwarning("Warning", f"Could not reload the other workspaces: {e}", parent=win)
+                return
+            self.refresh_all_tabs()
+            win.destroy()
+        
+        ttk.Button(frame, text="Close Workspace", command=close).pack(pady=(10, 0))
+    
+    def show_workspace_report(self):
+        """Progress of every project grouped by workspace, with workspace totals"""
+        win = tk.Toplevel(self.root)
+        win.title("Workspace Report")
+        win.geometry("900x500")
+        frame = ttk.Frame(win, padding=10)
+        frame.pack(fill='both', expand=True)
+        
+        columns = ('Total', 'Completed', 'Mandatory Open', 'Hours', 'Actual Hours', 'Progress')
+        tree = ttk.Treeview(frame, columns=columns, show='tree headings', height=20)
+        tree.heading('#0', text='Workspace / Project')
+        tree.column('#0', width=300)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=100, anchor='center')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='left', fill='y')
+        
+        def values(totals):
+            percentage = totals['completed'] / totals['total'] * 100 if totals['total'] else 0
+            return (totals['total'], totals['completed'], totals['mandatory_remaining'],
+                    f"{totals['minutes'] / 60:.1f}", f"{totals['actual_minutes'] / 60:.1f}", f"{percentage:.1f}%")
+        
+        # Project totals come from the rollup, so the report costs one lookup per project
+        grand = dict.fromkeys(ProgressRollup.FIELDS, 0)
+        for name, path in self.workspaces.items():
+            pids = [pid for pid in self.projects if self.workspace_of(pid) == name]
+            sums = dict.fromkeys(ProgressRollup.FIELDS, 0)
+            node = tree.insert('', 'end', text=f"{name} ({path})", open=True)
+            for pid in pids:
+                totals = self.rollup.totals(pid)
+                for field in ProgressRollup.FIELDS:
+                    sums[field] += totals[field]
+                tree.insert(node, 'end', text=f"{pid} - {self.projects[pid]['name']}", values=values(totals))
+            tree.item(node, values=values(sums))
+            for field in ProgressRollup.FIELDS:
+                grand[field] += sums[field]
+        tree.insert('', 'end', text="All workspaces", values=values(grand))
+    
+    # Diagnostics Functions
+    def write_diagnostics(self, quit_after=False, measure=False):
+        """Write the memory report, which lists any regressions against the previous one.
+        
+        `measure` is the unattended --diagnostics-exit run: it first measures one full refresh
+        and calendar render if none ran yet, and leaves regressions to the exit status. On a
+        normal close nothing extra is rendered and regressions are shown in a dialog.
+        """
+        if measure:
+            if 'refresh_all_tabs' not in self.diagnostics.phases:
+                self.refresh_all_tabs()
+            if 'apply_calendar_filter' not in self.diagnostics.phases:
+                self.apply_calendar_filter()
+            self.root.update()
+        self.memory_regressions = self.diagnostics.write(self.projects, self.tasks, self.root)
+        if self.memory_regressions and not measure:
+            lines = [f"{r['measure']}: {r['baseline']} -> {r['current']} ({r['change']})" for r in self.memory_regressions]
+            messagebox.showwarning("Memory Regressions", f"Compared with the previous report ({self.diagnostics.path}):\n\n"
+                                   + "\n".join(lines))
+        if quit_after:
+            self.root.destroy()
+    
     def save_data(self):
-        data = {'projects': self.projects, 'tasks': self.tasks}
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        if len(self.workspaces) == 1:
+            data = {'projects': self.projects, 'tasks': self.tasks, 'settings': self.settings}
+            with open(self.data_file, 'w') as f:
+                json.dump(data, f, indent=2)
+        else:
+            for name, (projects, tasks) in self.split_workspaces().items():
+                settings = self.settings if name == self.primary_workspace else self.workspace_settings.get(name, {})
+                with open(self.workspaces[name], 'w') as f:
+                    json.dump({'projects': projects, 'tasks': tasks, 'settings': settings}, f, indent=2)
+        self.history.flush(self.projects, self.tasks)
 
     def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                self.projects = data.get('projects', {})
-                self.tasks = data.get('tasks', {})
+        """Read every open workspace into the model and rebuild the indexes over it.
+        
+        Files are parsed into locals and only then swapped in; if anything fails the previous
+        model and indexes are restored and the error is raised.
+        """
+        projects, tasks, workspace_settings = {}, {}, {}
+        settings = dict(self.settings)
+        for name, (file_projects, file_tasks, file_settings) in zip(list(self.workspaces), self.read_workspaces()):
+            projects.update(file_projects)
+            tasks.update(file_tasks)
+            if name == self.primary_workspace:
+                settings.update(file_settings)
+            else:
+                workspace_settings[name] = file_settings
+        
+        previous = (self.projects, self.tasks, self.workspace_settings, dict(self.settings))
+        self.projects, self.tasks, self.workspace_settings = projects, tasks, workspace_settings
+        self.settings.update(settings)
+        try:
+            self.reset_indexes()
+        except Exception:
+            self.projects, self.tasks, self.workspace_settings, settings = previous
+            self.settings.clear()
+            self.settings.update(settings)
+            self.reset_indexes()
+            raise
+        self.change_log.reset()
+        # History covers every open workspace; a change in that set snapshots the combined state
+        self.history.open(os.path.splitext(self.data_file)[0] + '_history',
+                          sorted(self.workspaces) if len(self.workspaces) > 1 else None)
+        self.history.flush(self.projects, self.tasks)
+        self.mark_data_changed()
+
+    def reset_indexes(self):
+        """Rebuild every index and engine over the current model"""
+        self.hierarchy.reset(self.tasks)
+        self.time_log.open(os.path.splitext(self.data_file)[0] + '_time.log',
+                           {name: path for name, path in self.workspaces.items() if name != self.primary_workspace})
+        self.rollup.reset()
+        self.today_view.reset(self.projects, self.tasks)
+        self.capacity.limit = self.settings['daily_limit_minutes']
+        self.capacity.reset(self.tasks)
+        self.density.reset(self.tasks)
+        self.dependencies.reset(self.tasks)
+        self.reminders.lead = self.settings['reminder_lead_minutes']
+        self.reminders.reset(self.tasks, minute_stamp(datetime.now()))
 
     def auto_save(self):
         self.save_data()
@@ -1385,9 +5999,167 @@ class ProjectTaskManager:
         self.update_task_project_list()
         self.update_edit_project_list()
         self.update_progress_project_list()
+        self.update_gantt_project_list()
         self.refresh_today_tasks()
+        self.show_timers()
+        self.update_density_markers()
+
+    def schedule_refresh(self, delay=200):
+        """Coalesce bursts of background changes into one full refresh"""
+        if self.refresh_pending:
+            return
+        self.refresh_pending = True
+        self.root.after(delay, self.run_scheduled_refresh)
+
+    def run_scheduled_refresh(self):
+        self.refresh_pending = False
+        self.refresh_all_tabs()
+
+    def schedule_save(self, delay=1000):
+        """Coalesce bursts of background changes into one write to disk"""
+        if self.save_pending:
+            return
+        self.save_pending = True
+        self.root.after(delay, self.run_scheduled_save)
+
+    def run_scheduled_save(self):
+        self.save_pending = False
+        self.save_data()
+
+    # Local API Functions
+    def start_api_server(self, port):
+        self.api_methods = {
+            'list_projects': self.api_list_projects,
+            'add_task': self.api_add_task,
+            'mark_complete': self.api_mark_complete,
+            'mark_incomplete': self.api_mark_incomplete,
+            'get_tasks_for_date_range': self.api_get_tasks_for_date_range,
+            'show_progress': self.api_show_progress,
+            'export': self.api_export,
+            'query': self.api_query,
+        }
+        self.api_server = TaskApiServer(self, port)
+        self.root.bind('<<ApiCall>>', lambda e: self.process_api_queue())
+        self.api_server.start()
+
+    def process_api_queue(self):
+        """Run queued API calls on the Tk thread once woken; one save and refresh per drain"""
+        if self.api_queue.empty():
+            return
+        with self.batch_changes(save_delay=1000, refresh_delay=200):
+            while True:
+                try:
+                    job = self.api_queue.get_nowait()
+                except queue.Empty:
+                    break
+                job['results'] = [self.dispatch_api_call(call) for call in job['calls']]
+                job['done'].set()
+
+    def dispatch_api_call(self, call):
+        """Run one call; None for a notification (no id), which gets no response even on error"""
+        if not isinstance(call, dict) or call.get('jsonrpc') != '2.0' or 'method' not in call:
+            return TaskApiServer.error(call.get('id') if isinstance(call, dict) else None, -32600, "Invalid Request")
+        req_id = call.get('id')
+        method = self.api_methods.get(call['method'])
+        if method is None:
+            response = TaskApiServer.error(req_id, -32601, "Method not found")
+        else:
+            params = call.get('params', {})
+            try:
+                result = method(*params) if isinstance(params, list) else method(**params)
+                response = {'jsonrpc': '2.0', 'id': req_id, 'result': result}
+            except (ValueError, KeyError, TypeError) as e:
+                response = TaskApiServer.error(req_id, -32602, str(e))
+            except Exception as e:
+                response = TaskApiServer.error(req_id, -32603, str(e))
+        
+        if 'id' not in call:
+            return None
+        return response
+
+    def api_list_projects(self):
+        return [dict(project) for project in self.projects.values()]
+
+    def api_add_task(self, project_id, name, parent=None, priority="Average (Red)", mandatory=False,
+                     start_date=None, end_date=None, time_in="09:00", time_out="17:00",
+                     comments="", has_subtasks=False):
+        today = datetime.now().strftime('%Y-%m-%d')
+        start_date = start_date or today
+        end_date = end_date or start_date
+        if has_subtasks:
+            time_in = time_out = "00:00"
+        
+        return self.create_task(project_id, {
+            'name': name,
+            'parent': parent,
+            'priority': priority,
+            'mandatory': bool(mandatory),
+            'start_date': start_date,
+            'end_date': end_date,
+            'time_in': time_in,
+            'time_out': time_out,
+            'status': 'Incomplete',
+            'comments': comments,
+            'has_subtasks': bool(has_subtasks)
+        })
+
+    def api_mark_complete(self, project_id, task_id):
+        self.set_task_status(project_id, task_id, 'Complete')
+        return True
+
+    def api_mark_incomplete(self, project_id, task_id):
+        self.set_task_status(project_id, task_id, 'Incomplete')
+        return True
+
+    def api_get_tasks_for_date_range(self, start_date, end_date=None):
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else start
+        return self.get_tasks_for_date_range(start, end)
+
+    def api_show_progress(self, project_id):
+        if project_id not in self.projects:
+            raise ValueError(f"Unknown project '{project_id}'")
+        progress = self.compute_progress(project_id)
+        progress['tasks'] = [dict(task, id=tid) for tid, task in self.tasks[project_id].items()]
+        return progress
+
+    def api_export(self, project_id, query=None):
+        if project_id not in self.projects:
+            raise ValueError(f"Unknown project '{project_id}'")
+        tasks = self.tasks[project_id]
+        if query:
+            keys = self.run_query(query, project_id)
+            tasks = {tid: t for tid, t in tasks.items() if (project_id, tid) in keys}
+        return {'columns': self.EXPORT_COLUMNS, 'rows': self.export_rows(project_id, tasks)}
+
+    def api_query(self, query, project_id=None):
+        keys = sorted(self.run_query(query, project_id))
+        return [dict(self.tasks[pid][tid], project_id=pid, id=tid) for pid, tid in keys]
 
 if __name__ == "__main__":
+    # Workspace loading runs in worker processes, which frozen builds must be able to start
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Project & Task Management System")
+    parser.add_argument('--api-port', type=int, default=None,
+                        help="serve a local JSON-RPC API on 127.0.0.1:PORT")
+    parser.add_argument('--workspace', action='append', default=[], metavar='FILE',
+                        help="also open another team's workspace file (repeatable)")
+    parser.add_argument('--diagnostics', metavar='REPORT', default=None,
+                        help="trace memory use and write a JSON report to REPORT on exit")
+    parser.add_argument('--diagnostics-exit', action='store_true',
+                        help="write the report once started and quit, failing on regressions against the previous report")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = ProjectTaskManager(root)
+    app = ProjectTaskManager(root, workspaces=args.workspace, diagnostics=args.diagnostics)
+    if args.api_port:
+        try:
+            app.start_api_server(args.api_port)
+        except OSError as e:
+            messagebox.showwarning("Warning", f"Could not serve the API on port {args.api_port}: {e.strerror or e}\n"
+                                   "The application will run without it.")
+    if app.diagnostics and args.diagnostics_exit:
+        root.after(1000, lambda: app.write_diagnostics(quit_after=True, measure=True))
     root.mainloop()
+    if app.memory_regressions and args.diagnostics_exit:
+        sys.exit(1)
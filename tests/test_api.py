@@ -0,0 +1,61 @@
+import http.client
+import json
+import queue
+import socket
+
+import pytest
+
+from Project_Task import TaskApiRequestHandler, TaskApiServer
+
+
+class FakeApp:
+    """Answers every queued call at once instead of on a Tk thread"""
+
+    def __init__(self):
+        self.api_queue = queue.Queue()
+        self.root = self
+
+    def event_generate(self, *args, **kwargs):
+        job = self.api_queue.get_nowait()
+        job['results'] = [{'jsonrpc': '2.0', 'id': call['id'], 'result': call['method']} for call in job['calls']]
+        job['done'].set()
+
+
+@pytest.fixture
+def server():
+    api = TaskApiServer(FakeApp(), 0)
+    api.start()
+    yield api
+    api.stop()
+
+
+def send(server, headers, body=b''):
+    """Raw request, so the Content-Length header can be missing or malformed"""
+    sock = socket.create_connection(server.httpd.server_address[:2], timeout=5)
+    try:
+        sock.sendall(b"POST / HTTP/1.1\r\nHost: localhost\r\n" + headers + b"\r\n" + body)
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        return response.status, json.loads(response.read() or b'null'), response.will_close
+    finally:
+        sock.close()
+
+
+def test_a_well_formed_request_is_answered(server):
+    body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'list_projects'}).encode()
+    status, payload, _ = send(server, b"Content-Length: %d\r\n" % len(body), body)
+    assert (status, payload['result']) == (200, 'list_projects')
+
+
+@pytest.mark.parametrize('headers, status', [
+    (b"", 411),
+    (b"Content-Length: abc\r\n", 400),
+    (b"Content-Length: -5\r\n", 400),
+    (b"Content-Length: %d\r\n" % (TaskApiRequestHandler.max_body + 1), 413),
+])
+def test_bad_lengths_get_a_json_rpc_error_without_reading_the_body(server, headers, status):
+    # The oversized request sends no body; reading it would block until the client gave up
+    got, payload, closing = send(server, headers)
+    assert got == status and closing
+    assert payload['error']['code'] == -32600 and payload['id'] is None
+
@@ -0,0 +1,138 @@
+import random
+from datetime import date, timedelta
+
+from Project_Task import (array_minutes, calendar_export_rows, daily_load, layout_timeline, pack_intervals,
+                          parse_minutes, summarize_days)
+
+
+def row(tid, start, end, occurrence=None, importance='Average (Red)', status='Incomplete', time_in='09:00', time_out='10:00'):
+    data = {'pid': 'P001', 'tid': tid, 'project_id': 'P001', 'task_name': f"task {tid}",
+            'time_in': time_in, 'time_out': time_out, 'importance': importance,
+            'start_date': start, 'end_date': end, 'status': status}
+    if occurrence:
+        data['occurrence'] = occurrence
+    return data
+
+
+def test_three_day_task_exports_as_one_row():
+    tasks = [row('T001', '2026-10-19', '2026-10-21')]
+    week = summarize_days(tasks, date(2026, 10, 19), date(2026, 10, 25))
+    # The week grid draws one box per day the task covers
+    boxes = [entry[3] for bucket in week['days'].values() for entry in bucket['tasks']]
+    assert len(boxes) == 3
+    assert calendar_export_rows(boxes) == [['P001', 'task T001', '09:00', '10:00', 'Average (Red)', 'Incomplete']]
+
+
+def test_each_occurrence_of_a_recurring_task_exports_once():
+    tasks = [row('T002', '2026-10-19', '2026-10-20', occurrence='2026-10-19'),
+             row('T002', '2026-10-19', '2026-10-20', occurrence='2026-10-19'),
+             row('T002', '2026-10-22', '2026-10-23', occurrence='2026-10-22', status='Complete')]
+    assert [r[5] for r in calendar_export_rows(tasks)] == ['Incomplete', 'Complete']
+
+
+def test_touching_intervals_share_a_column_and_overlapping_ones_do_not():
+    assert pack_intervals([(60, 120), (120, 180)]) == [(0, 1), (0, 1)]
+    assert pack_intervals([(60, 121), (120, 180)]) == [(0, 2), (1, 2)]
+    # A later interval after a gap starts a new cluster with its own width
+    assert pack_intervals([(0, 30), (10, 40), (20, 50), (100, 110)]) == [(0, 3), (1, 3), (2, 3), (0, 1)]
+
+
+def test_packing_is_valid_and_uses_the_fewest_columns():
+    rng = random.Random(35)
+    for _ in range(300):
+        intervals = []
+        for _ in range(rng.randint(1, 25)):
+            start = rng.randint(0, 1400)
+            intervals.append((start, start + rng.randint(1, 180)))
+        packed = pack_intervals(intervals)
+        for i, (a, (col_a, cols_a)) in enumerate(zip(intervals, packed)):
+            assert 0 <= col_a < cols_a
+            for b, (col_b, cols_b) in zip(intervals[i + 1:], packed[i + 1:]):
+                if a[0] < b[1] and b[0] < a[1]:
+                    assert col_a != col_b and cols_a == cols_b
+        # Each cluster of transitive overlaps is exactly as wide as its busiest moment
+        order = sorted(range(len(intervals)), key=intervals.__getitem__)
+        clusters, reach = [], None
+        for i in order:
+            if reach is None or intervals[i][0] >= reach:
+                clusters.append([])
+                reach = intervals[i][1]
+            clusters[-1].append(i)
+            reach = max(reach, intervals[i][1])
+        for cluster in clusters:
+            busiest = max(sum(1 for j in cluster if intervals[j][0] <= intervals[i][0] < intervals[j][1])
+                          for i in cluster)
+            assert {packed[i][1] for i in cluster} == {busiest}
+
+
+def test_timeline_splits_multi_day_tasks_and_clamps_spans_past_midnight():
+    tasks = [row('T001', '2026-10-18', '2026-10-21', time_in='09:00', time_out='10:30'),
+             row('T002', '2026-10-19', '2026-10-19', time_in='22:00', time_out='02:00'),
+             row('T003', '2026-10-19', '2026-10-19', time_in='23:55', time_out='23:59'),
+             row('T004', '2026-10-19', '2026-10-19', time_in='bad', time_out='10:00')]
+    segments = layout_timeline(tasks, date(2026, 10, 19), date(2026, 10, 20))
+    spans = [(s['task']['tid'], s['day'], s['slot'], s['start'], s['end']) for s in segments]
+    assert spans == [('T001', 0, 1, 540, 630), ('T002', 0, 0, 1320, 1335), ('T003', 0, 0, 1425, 1440),
+                     ('T001', 1, 2, 540, 630)]
+    day_one = {s['task']['tid']: (s['column'], s['columns']) for s in segments if s['day'] == 0}
+    assert day_one == {'T001': (0, 1), 'T002': (0, 1), 'T003': (0, 1)}
+
+
+def test_month_summary_buckets_each_covered_day_in_priority_and_time_order():
+    tasks = [row('T001', '2026-09-29', '2026-10-02', importance='Average (Red)', time_in='08:00'),
+             row('T002', '2026-10-01', '2026-10-01', importance='Most Important (Blue)', time_in='11:00', status='Complete'),
+             row('T003', '2026-10-01', '2026-10-01', importance='Most Important (Blue)', time_in='07:00'),
+             row('T004', '2026-10-31', '2026-11-03', importance='Important (Green)'),
+             row('T005', 'not a date', '2026-10-01')]
+    summary = summarize_days(tasks, date(2026, 10, 1), date(2026, 10, 31))
+    assert sorted(summary['days']) == [0, 1, 30]
+    first = summary['days'][0]
+    assert [entry[3]['tid'] for entry in first['tasks']] == ['T003', 'T002', 'T001']
+    # The slot is how many days into the task this bucket is
+    assert [entry[2] for entry in first['tasks']] == [0, 0, 2]
+    assert first['mix'] == [2, 0, 1] and first['completed'] == 1
+    assert summary['days'][30]['mix'] == [0, 1, 0]
+    assert (summary['total'], summary['completed']) == (5, 1)
+
+
+def minutes_or_zero(value):
+    try:
+        return parse_minutes(value)
+    except ValueError:
+        return 0
+
+
+def test_array_minutes_matches_parse_minutes_and_zeroes_malformed_values():
+    values = ['00:00', '09:05', '23:59', '9:30', '12:3', '', 'ab:cd', '12-30', '24:00', '07:45']
+    assert array_minutes(values).tolist() == [minutes_or_zero(v) for v in values]
+    assert array_minutes([]).tolist() == []
+
+
+def test_daily_load_matches_a_day_by_day_count_across_a_leap_year():
+    rng = random.Random(37)
+    first, last = date(2028, 1, 1), date(2028, 12, 31)
+    rows = []
+    for _ in range(400):
+        start = first + timedelta(days=rng.randint(-40, 400))
+        end = start + timedelta(days=rng.randint(-2, 30))
+        time_in = f"{rng.randint(6, 12):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+        time_out = rng.choice([f"{rng.randint(8, 20):02d}:00", '7:30', 'bad'])
+        rows.append((start.isoformat(), end.isoformat(), time_in, time_out, rng.random() < 0.3))
+    rows.append(('2028-02-29', '2028-02-29', '09:00', '17:00', True))
+    rows.append(('2028-02-30', '2028-03-01', '09:00', '10:00', False))
+
+    load = daily_load(rows, first, last)
+    assert len(load['tasks']) == 366
+    for offset in range(366):
+        day = (first + timedelta(days=offset)).isoformat()
+        covering = [r for r in rows if r[0] != '2028-02-30' and r[0] <= day <= r[1]]
+        assert load['tasks'][offset] == len(covering)
+        assert load['completed'][offset] == sum(r[4] for r in covering)
+        assert load['minutes'][offset] == sum(max(minutes_or_zero(r[3]) - minutes_or_zero(r[2]), 0) for r in covering)
+    # Feb 29 carries the 8-hour leap-day task
+    assert load['minutes'][59] >= 480
+
+
+def test_daily_load_of_no_rows_is_all_zero():
+    load = daily_load([], date(2026, 2, 1), date(2026, 2, 28))
+    assert load['tasks'].tolist() == [0] * 28
@@ -0,0 +1,119 @@
+import random
+
+from Project_Task import CanvasPool, SpatialGrid
+
+
+class FakeCanvas:
+    """Records the Tk calls a pool makes and the resulting item state"""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = []
+
+    def create(self, kind, coords, tags, **opts):
+        item = len(self.items) + 1
+        self.items[item] = {'kind': kind, 'coords': coords, 'state': 'normal', **opts}
+        self.calls.append(('create', item))
+        return item
+
+    def create_rectangle(self, *coords, tags=(), **opts):
+        return self.create('rect', coords, tags, **opts)
+
+    def create_text(self, *coords, tags=(), **opts):
+        return self.create('text', coords, tags, **opts)
+
+    def create_line(self, *coords, tags=(), **opts):
+        return self.create('line', coords, tags, **opts)
+
+    def coords(self, item, *coords):
+        self.items[item]['coords'] = coords
+        self.calls.append(('coords', item))
+
+    def itemconfigure(self, item, **opts):
+        self.items[item].update(opts)
+        self.calls.append(('configure', item, tuple(sorted(opts))))
+
+    def tag_raise(self, tag):
+        pass
+
+
+def boxes(keys, x=0):
+    return [CanvasPool.spec('rect', ('box', key), (x + 10 * i, 0, x + 10 * i + 8, 8), 'calbox', fill='red')
+            for i, key in enumerate(keys)]
+
+
+def visible(canvas):
+    return {item for item, state in canvas.items.items() if state['state'] == 'normal'}
+
+
+def test_items_are_kept_by_key_and_only_changes_are_sent():
+    canvas = FakeCanvas()
+    pool = CanvasPool(canvas)
+    first = boxes('abc')
+    pool.render(first, (0, 0, 500, 500))
+    items = {spec['key']: spec['item'] for spec in first}
+    assert len(canvas.calls) == 3
+
+    canvas.calls.clear()
+    pool.render(boxes('abc'), (0, 0, 500, 500))
+    assert canvas.calls == []
+
+    canvas.calls.clear()
+    moved = boxes('cab')
+    pool.render(moved, (0, 0, 500, 500))
+    assert {spec['key']: spec['item'] for spec in moved} == items
+    assert all(call[0] == 'coords' for call in canvas.calls)
+
+
+def test_items_outside_the_view_are_hidden_and_reused():
+    canvas = FakeCanvas()
+    pool = CanvasPool(canvas)
+    pool.render(boxes('abcd'), (0, 0, 500, 500))
+    specs = boxes('abcd')
+    pool.render(specs, (0, 0, 15, 500))
+    assert [spec['item'] is not None for spec in specs] == [True, True, False, False]
+    assert len(visible(canvas)) == 2
+
+    # New keys take hidden items of the same kind before anything is created
+    canvas.calls.clear()
+    specs = boxes('wxyz')
+    pool.render(specs, (0, 0, 500, 500))
+    assert not any(call[0] == 'create' for call in canvas.calls)
+    assert len(visible(canvas)) == 4 and len(canvas.items) == 4
+
+
+def test_culling_uses_the_text_reach_around_its_anchor():
+    centred = CanvasPool.spec('text', 't', (300, 50), 'caltext', text='label')
+    left = CanvasPool.spec('text', 'l', (300, 50), 'caltext', text='label', anchor='w', width=40)
+    assert centred['bbox'] == (150, 30, 450, 70)
+    assert left['bbox'] == (300, 30, 340, 70)
+    line = CanvasPool.spec('line', 'v', (10, 90, 10, 5))
+    assert line['bbox'] == (10, 5, 10, 90)
+
+
+def test_grid_hits_match_a_brute_force_scan():
+    rng = random.Random(34)
+    grid = SpatialGrid(cell=50)
+    boxes = []
+    for n in range(300):
+        x0, y0 = rng.uniform(-100, 900), rng.uniform(-100, 900)
+        box = (x0, y0, x0 + rng.uniform(0, 200), y0 + rng.uniform(0, 60))
+        boxes.append((box, n))
+        grid.insert(box, n)
+    for _ in range(200):
+        x, y = rng.uniform(-100, 1000), rng.uniform(-100, 1000)
+        assert grid.at(x, y) == [n for (x0, y0, x1, y1), n in boxes if x0 <= x <= x1 and y0 <= y <= y1]
+        rx0, ry0 = rng.uniform(-100, 900), rng.uniform(-100, 900)
+        band = (rx0, ry0, rx0 + rng.uniform(0, 300), ry0 + rng.uniform(0, 300))
+        assert grid.overlapping(band) == [n for (x0, y0, x1, y1), n in boxes
+                                          if x0 <= band[2] and x1 >= band[0] and y0 <= band[3] and y1 >= band[1]]
+
+
+def test_grid_edges_and_cell_boundaries_count_as_hits():
+    grid = SpatialGrid(cell=100)
+    grid.insert((0, 0, 100, 100), 'a')
+    grid.insert((100, 0, 150, 50), 'b')
+    assert grid.at(100, 50) == ['a', 'b']
+    assert grid.at(100.5, 75) == []
+    # A box spanning several cells is reported once
+    assert grid.overlapping((-10, -10, 400, 400)) == ['a', 'b']
@@ -0,0 +1,100 @@
+import random
+from datetime import date
+
+from Project_Task import CapacityPlanner, HierarchyIndex
+
+
+def task(start='2026-10-19', end='2026-10-19', time_in='09:00', time_out='10:00', parent=None, recurrence=None):
+    data = {'name': 'task', 'parent': parent, 'priority': 'Average (Red)', 'mandatory': False,
+            'start_date': start, 'end_date': end, 'time_in': time_in, 'time_out': time_out,
+            'status': 'Incomplete', 'comments': ''}
+    if recurrence:
+        data['recurrence'] = recurrence
+    return data
+
+
+def planner(project):
+    tasks = {'P001': project}
+    return CapacityPlanner(tasks, HierarchyIndex(tasks))
+
+
+def test_sweep_matches_a_minute_by_minute_count():
+    rng = random.Random(39)
+    for _ in range(300):
+        slots = {}
+        for n in range(rng.randint(0, 8)):
+            start = rng.randint(0, 1380)
+            slots[n] = (start, start + rng.randint(1, 240))
+        summary = CapacityPlanner.sweep(slots)
+        counts = [sum(1 for s, e in slots.values() if s <= m < e) for m in range(1700)]
+        assert summary['committed'] == sum(e - s for s, e in slots.values())
+        assert summary['busy'] == sum(1 for c in counts if c)
+        assert summary['overlap'] == sum(1 for c in counts if c > 1)
+        assert summary['peak'] == max(counts)
+        assert summary['conflicts'] == {k for k, (s, e) in slots.items()
+                                        if any(k != o and s < oe and os < e for o, (os, oe) in slots.items())}
+
+
+def test_back_to_back_slots_do_not_clash():
+    summary = CapacityPlanner.sweep({'a': (540, 600), 'b': (600, 660), 'c': (630, 700)})
+    assert summary['conflicts'] == {'b', 'c'}
+    assert (summary['busy'], summary['overlap'], summary['peak']) == (160, 30, 2)
+
+
+def test_multi_day_and_recurring_tasks_book_every_day_they_cover():
+    capacity = planner({
+        'T001': task('2026-10-19', '2026-10-21', '09:00', '12:00'),
+        'T002': task('2026-10-20', '2026-10-20', '11:00', '13:00'),
+        'T003': task('2026-10-19', '2026-10-19', '22:00', '02:00'),  # past midnight: not bookable
+        'T004': task('2026-10-19', '2026-10-19', '08:00', '09:00',
+                     recurrence={'freq': 'daily', 'interval': 2}),
+    })
+    monday, tuesday, wednesday = (date(2026, 10, d) for d in (19, 20, 21))
+    assert capacity.day(monday)['committed'] == 240
+    assert capacity.day(tuesday)['committed'] == 300
+    assert capacity.day(tuesday)['conflicts'] == {('P001', 'T001'), ('P001', 'T002')}
+    assert capacity.day(wednesday)['committed'] == 240
+    assert capacity.day(date(2026, 10, 22))['committed'] == 0
+    capacity.limit = 280
+    assert capacity.overloaded(tuesday) and not capacity.overloaded(monday)
+
+
+def test_patched_bookings_match_a_rebuild():
+    rng = random.Random(391)
+    project = {}
+    tasks = {'P001': project}
+    hierarchy = HierarchyIndex(tasks)
+    capacity = CapacityPlanner(tasks, hierarchy)
+    for step in range(300):
+        tid = f"T{rng.randint(1, 15):02d}"
+        if tid not in project:
+            day = rng.randint(18, 24)
+            project[tid] = task(f"2026-10-{day}", f"2026-10-{day + rng.randint(0, 3)}",
+                                f"{rng.randint(7, 12):02d}:00", f"{rng.randint(9, 16):02d}:30",
+                                parent=rng.choice([None, None, f"T{rng.randint(1, 15):02d}"]))
+            delta = ('P001', tid, None, dict(project[tid]))
+        elif rng.random() < 0.2:
+            delta = ('P001', tid, project.pop(tid), None)
+        else:
+            field, value = rng.choice([('time_in', f"{rng.randint(7, 12):02d}:00"),
+                                       ('end_date', f"2026-10-{rng.randint(18, 28)}"),
+                                       ('parent', rng.choice([None, f"T{rng.randint(1, 15):02d}"]))])
+            delta = ('P001', tid, {field: project[tid][field]}, {field: value})
+            project[tid][field] = value
+        hierarchy.apply_changes([delta])
+        capacity.apply_changes([delta])
+        rebuilt = CapacityPlanner(tasks, HierarchyIndex(tasks))
+        assert capacity.slots == rebuilt.slots, step
+        for ordinal in range(date(2026, 10, 17).toordinal(), date(2026, 10, 30).toordinal()):
+            assert capacity.day(ordinal) == rebuilt.day(ordinal), (step, ordinal)
+
+
+def test_days_left_without_bookings_are_dropped():
+    project = {'T001': task('2026-10-19', '2026-10-25'), 'T002': task('2026-10-20', '2026-10-20')}
+    capacity = planner(project)
+    assert len(capacity.days) == 7
+    project['T001']['end_date'] = '2026-10-19'
+    capacity.apply_changes([('P001', 'T001', {'end_date': '2026-10-25'}, {'end_date': '2026-10-19'})])
+    assert sorted(capacity.days) == [date(2026, 10, 19).toordinal(), date(2026, 10, 20).toordinal()]
+    capacity.drop_project('P001')
+    assert not capacity.days and not capacity.slots
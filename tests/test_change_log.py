@@ -0,0 +1,81 @@
+from Project_Task import ChangeLog
+
+
+def edit(tid, field, before, after):
+    return ('P001', tid, {field: before}, {field: after})
+
+
+def test_quick_edits_of_the_same_fields_coalesce_into_one_entry():
+    log = ChangeLog()
+    log.record([edit('T001', 'name', 'a', 'ab')], 10.0)
+    log.record([edit('T001', 'name', 'ab', 'abc')], 11.0)
+    log.record([edit('T001', 'name', 'abc', 'abcd')], 12.4)
+    assert len(log.undo_stack) == 1 and log.deltas == 1
+    assert log.undo_stack[0]['ops'] == [edit('T001', 'name', 'a', 'abcd')]
+    assert ChangeLog.inverse(log.take_undo()['ops']) == [('P001', 'T001', {'name': 'a'})]
+
+
+def test_slow_or_different_edits_stay_separate():
+    log = ChangeLog()
+    log.record([edit('T001', 'name', 'a', 'b')], 10.0)
+    log.record([edit('T001', 'name', 'b', 'c')], 12.0)
+    log.record([edit('T001', 'status', 'Incomplete', 'Complete')], 12.5)
+    log.record([edit('T002', 'status', 'Incomplete', 'Complete')], 13.0)
+    log.record([('P001', 'T003', None, {'name': 'new'})], 13.5)
+    log.record([('P001', 'T004', None, {'name': 'new'})], 14.0)
+    assert len(log.undo_stack) == 6
+
+
+def test_an_undo_closes_the_entry_below_it_to_coalescing():
+    log = ChangeLog()
+    log.record([edit('T001', 'name', 'a', 'b')], 10.0)
+    log.record([edit('T001', 'status', 'Incomplete', 'Complete')], 10.5)
+    log.take_undo()
+    log.record([edit('T001', 'name', 'b', 'c')], 11.0)
+    assert [entry['ops'] for entry in log.undo_stack] == [[edit('T001', 'name', 'a', 'b')],
+                                                          [edit('T001', 'name', 'b', 'c')]]
+    assert log.redo_stack == []
+
+
+def test_undo_and_redo_move_entries_and_replay_is_not_recorded():
+    log = ChangeLog()
+    created = ('P001', 'T001', None, {'name': 'a', 'status': 'Incomplete'})
+    log.record([created, edit('T001', 'status', 'Incomplete', 'Complete')], 10.0)
+    entry = log.take_undo()
+    # Inverse changes run last delta first; a creation is undone by deleting the task
+    assert ChangeLog.inverse(entry['ops']) == [('P001', 'T001', {'status': 'Incomplete'}), ('P001', 'T001', None)]
+    assert log.deltas == 0 and log.take_undo() is None
+    with log.replay():
+        log.record([edit('T001', 'name', 'a', 'b')], 10.5)
+    assert log.take_redo() is entry and log.deltas == 2 and log.redo_stack == []
+    assert ChangeLog.forward(entry['ops'])[1] == ('P001', 'T001', {'status': 'Complete'})
+
+
+def test_grouped_transactions_undo_together():
+    log = ChangeLog()
+    log.begin()
+    log.record([edit('T001', 'status', 'Incomplete', 'Complete')], 10.0)
+    log.record([edit('T002', 'status', 'Incomplete', 'Complete')], 10.0)
+    log.end()
+    log.begin()
+    log.end()
+    assert len(log.undo_stack) == 1 and len(log.take_undo()['ops']) == 2
+
+
+def test_history_is_bounded_by_entries_and_deltas():
+    log = ChangeLog(limit=3, max_deltas=10)
+    for n in range(5):
+        log.record([edit('T001', f"field{n}", 0, 1)], n * 10.0)
+    assert len(log.undo_stack) == 3 and log.deltas == 3
+    log.record([edit(f"T{n:03d}", 'status', 'Incomplete', 'Complete') for n in range(9)], 100.0)
+    assert len(log.undo_stack) == 2 and log.deltas == 10
+    # A single oversized entry is kept rather than leaving nothing to undo
+    log.record([edit(f"T{n:03d}", 'name', 'a', 'b') for n in range(20)], 200.0)
+    assert len(log.undo_stack) == 1 and log.deltas == 20
+
+
+def test_entries_are_described_for_the_edit_menu():
+    assert ChangeLog.describe([('P001', None, None, {'name': 'p'})]) == 'create project P001'
+    assert ChangeLog.describe([('P001', f"T{n}", {'name': 'x'}, None) for n in range(3)]) == 'delete 3 tasks'
+    assert ChangeLog.describe([edit('T001', 'status', 'a', 'b'), edit('T001', 'name', 'a', 'b')]) == \
+        'edit name, status of 1 task'
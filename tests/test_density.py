@@ -0,0 +1,99 @@
+import random
+from datetime import date, timedelta
+
+from Project_Task import DayDensity, HierarchyIndex, occurrence_starts, priority_rank
+
+PRIORITIES = ['Most Important (Blue)', 'Important (Green)', 'Average (Red)']
+
+
+def task(start, end, priority='Average (Red)', status='Incomplete', parent=None, **extra):
+    return {'name': 'task', 'parent': parent, 'priority': priority, 'mandatory': False,
+            'start_date': start, 'end_date': end, 'time_in': '09:00', 'time_out': '10:00',
+            'status': status, 'comments': '', **extra}
+
+
+def recount(tasks, year, month):
+    """Reference month counts: check every leaf task against every day"""
+    first = date(year, month, 1)
+    days = [first + timedelta(days=n) for n in range(40) if (first + timedelta(days=n)).month == month]
+    parents = {(pid, t['parent']) for pid, project in tasks.items() for t in project.values()}
+    counts = {}
+    for pid, project in tasks.items():
+        for tid, t in project.items():
+            if (pid, tid) in parents:
+                continue
+            try:
+                start, end = date.fromisoformat(t['start_date']), date.fromisoformat(t['end_date'])
+            except ValueError:
+                continue
+            if end < start:
+                continue
+            if t.get('recurrence'):
+                spans = [(date.fromordinal(o), date.fromordinal(o) + (end - start))
+                         for o in occurrence_starts(t, days[0].toordinal(), days[-1].toordinal())]
+            else:
+                spans = [(start, end)]
+            for first_day, last_day in spans:
+                done = t['status'] == 'Complete' and not t.get('recurrence') or \
+                    first_day.isoformat() in t.get('done_dates', ())
+                for day in days:
+                    if first_day <= day <= last_day:
+                        row = counts.setdefault(day.toordinal(), [0] * 4)
+                        row[3 if done else priority_rank(t['priority'])] += 1
+    return counts
+
+
+def test_month_counts_cover_multi_month_leap_and_recurring_tasks():
+    tasks = {'P001': {
+        'T001': task('2028-01-30', '2028-03-02', 'Most Important (Blue)'),
+        'T002': task('2028-02-29', '2028-02-29', status='Complete'),
+        'T003': task('2028-01-31', '2028-01-31', 'Important (Green)', recurrence={'freq': 'monthly'},
+                     done_dates=['2028-03-31']),
+        'T004': task('2028-02-01', '2028-02-05'), 'T005': task('2028-02-03', '2028-02-03', parent='T004'),
+        'T006': task('2028-02-10', '2028-02-09'),
+    }}
+    density = DayDensity(tasks, HierarchyIndex(tasks))
+    february = density.month(2028, 2)
+    assert february[date(2028, 2, 29).toordinal()] == [1, 1, 0, 1]
+    assert february[date(2028, 2, 3).toordinal()] == [1, 0, 1, 0]
+    # T004 has a subtask, so only its subtask counts on its days
+    assert february[date(2028, 2, 4).toordinal()] == [1, 0, 0, 0]
+    assert density.month(2028, 3)[date(2028, 3, 31).toordinal()] == [0, 0, 0, 1]
+    for month in (1, 2, 3, 4):
+        assert density.month(2028, month) == recount(tasks, 2028, month), month
+
+
+def test_patched_counts_match_a_recount_after_random_transactions():
+    rng = random.Random(47)
+    tasks = {'P001': {}}
+    hierarchy = HierarchyIndex(tasks)
+    density = DayDensity(tasks, hierarchy)
+    months = [(2026, 11), (2026, 12), (2027, 1), (2027, 2)]
+    for step in range(300):
+        tid = f"T{rng.randint(1, 12):02d}"
+        project = tasks['P001']
+        if tid not in project:
+            start = date(2026, 11, 1) + timedelta(days=rng.randint(-10, 120))
+            extra = {}
+            if rng.random() < 0.2:
+                extra['recurrence'] = {'freq': rng.choice(['weekly', 'monthly']), 'count': rng.randint(1, 6)}
+            project[tid] = task(start.isoformat(), (start + timedelta(days=rng.randint(-1, 40))).isoformat(),
+                                rng.choice(PRIORITIES), parent=rng.choice([None, None, f"T{rng.randint(1, 12):02d}"]),
+                                **extra)
+            delta = ('P001', tid, None, dict(project[tid]))
+        elif rng.random() < 0.2:
+            delta = ('P001', tid, project.pop(tid), None)
+        else:
+            field, value = rng.choice([('status', rng.choice(['Complete', 'Incomplete'])),
+                                       ('priority', rng.choice(PRIORITIES)),
+                                       ('end_date', (date(2026, 11, 1) + timedelta(days=rng.randint(0, 120))).isoformat()),
+                                       ('parent', rng.choice([None, f"T{rng.randint(1, 12):02d}"]))])
+            delta = ('P001', tid, {field: project[tid][field]}, {field: value})
+            project[tid][field] = value
+        hierarchy.apply_changes([delta])
+        density.apply_changes([delta])
+        year, month = rng.choice(months)
+        assert density.month(year, month) == recount(tasks, year, month), (step, year, month)
+    density.drop_project('P001')
+    tasks.clear()
+    assert all(density.month(year, month) == {} for year, month in months)
@@ -0,0 +1,40 @@
+import random
+
+from Project_Task import DependencyGraph
+
+
+def task(depends_on):
+    return {'name': 'task', 'start_date': '2026-10-19', 'end_date': '2026-10-19',
+            'depends_on': [['P001', tid] for tid in depends_on]}
+
+
+def reachable(tasks, start):
+    """Tasks downstream of `start`, by walking depends_on backwards"""
+    succs = {tid: [s for s, t in tasks.items() if tid in [p[1] for p in t['depends_on']]] for tid in tasks}
+    seen, stack = set(), [start]
+    while stack:
+        for succ in succs[stack.pop()]:
+            if succ not in seen:
+                seen.add(succ)
+                stack.append(succ)
+    return seen
+
+
+def test_only_tasks_on_a_cycle_are_cycle_members():
+    # A <-> B is a cycle; C waits on it and D waits on C
+    tasks = {'P001': {'A': task(['B']), 'B': task(['A']), 'C': task(['B']), 'D': task(['C']), 'E': task([])}}
+    graph = DependencyGraph(tasks)
+    assert graph.cycles == {('P001', 'A'), ('P001', 'B')}
+    assert graph.blocked == {('P001', 'C'), ('P001', 'D')}
+
+
+def test_cycles_and_blocked_match_reachability():
+    rng = random.Random(41)
+    for _ in range(200):
+        tids = [f"T{i:02d}" for i in range(rng.randint(2, 12))]
+        project = {tid: task(rng.sample([t for t in tids if t != tid], rng.randint(0, min(2, len(tids) - 1)))) for tid in tids}
+        graph = DependencyGraph({'P001': project})
+        on_cycle = {tid for tid in tids if tid in reachable(project, tid)}
+        downstream = set().union(*(reachable(project, tid) for tid in on_cycle)) - on_cycle
+        assert graph.cycles == {('P001', tid) for tid in on_cycle}
+        assert graph.blocked == {('P001', tid) for tid in downstream}
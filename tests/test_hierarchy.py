@@ -0,0 +1,95 @@
+import random
+
+from Project_Task import HierarchyIndex
+
+
+def task(parent=None, status='Incomplete'):
+    return {'name': 'task', 'parent': parent, 'priority': 'Average (Red)', 'mandatory': False,
+            'start_date': '2026-10-19', 'end_date': '2026-10-19', 'time_in': '09:00',
+            'time_out': '10:00', 'status': status, 'comments': ''}
+
+
+def test_detach_points_reattach_deleted_parent_chains_and_cycles():
+    tasks = {'P001': {
+        'T001': task(),
+        'T002': task('T099'), 'T003': task('T002'),                    # under a deleted parent
+        'T004': task('T006'), 'T005': task('T004'), 'T006': task('T005'),  # parent cycle
+        'T007': task('T006'), 'T008': task('T007'),                    # hanging off the cycle
+        'T010': task('T010'),                                          # its own parent
+    }}
+    hierarchy = HierarchyIndex(tasks)
+    unreachable = hierarchy.unreachable('P001')
+    assert sorted(unreachable) == ['T002', 'T003', 'T004', 'T005', 'T006', 'T007', 'T008', 'T010']
+    points = hierarchy.detach_points('P001', unreachable)
+    assert sorted(points) == ['T002', 'T004', 'T010']
+
+    for tid in points:
+        tasks['P001'][tid]['parent'] = None
+    assert HierarchyIndex(tasks).unreachable('P001') == []
+
+
+def recursive_walk(tasks, parent=None, depth=0):
+    """Reference pre-order walk over an acyclic project"""
+    rows = []
+    for tid, t in tasks.items():
+        if (t['parent'] or None) == parent:
+            rows.append((tid, parent, depth))
+            rows.extend(recursive_walk(tasks, tid, depth + 1))
+    return rows
+
+
+def test_walk_matches_a_recursive_walk_with_subtree_rollups():
+    rng = random.Random(30)
+    tids = [f"T{i:03d}" for i in range(1, 200)]
+    project = {}
+    for i, tid in enumerate(tids):
+        project[tid] = task(rng.choice(tids[:i]) if i and rng.random() < 0.8 else None,
+                            'Complete' if rng.random() < 0.4 else 'Incomplete')
+    walk = HierarchyIndex({'P001': project}).walk('P001')
+    assert walk.order == recursive_walk(project)
+    assert walk.cycles == []
+    for tid in tids:
+        members = {tid}
+        for row_tid, parent, _ in walk.order:
+            if parent in members:
+                members.add(row_tid)
+        assert walk.size[tid] == len(members)
+        assert walk.completed[tid] == sum(project[m]['status'] == 'Complete' for m in members)
+
+
+def test_walk_survives_deep_chains_and_parent_cycles():
+    depth = 10000
+    project = {f"T{i:05d}": task(f"T{i - 1:05d}" if i else None) for i in range(depth)}
+    walk = HierarchyIndex({'P001': project}).walk('P001')
+    assert len(walk.order) == depth and walk.order[-1][2] == depth - 1
+    assert walk.size['T00000'] == depth
+
+    # Close a loop at the bottom of the chain and add a separate two-task cycle
+    project['T00000']['parent'] = f"T{depth - 1:05d}"
+    project['X1'], project['X2'] = task('X2'), task('X1')
+    hierarchy = HierarchyIndex({'P001': project})
+    assert hierarchy.walk('P001').order == []
+    walk = hierarchy.walk('P001', include_unreached=True)
+    assert sorted(tid for tid, _, _ in walk.order) == sorted(project)
+    assert len(walk.cycles) == 2
+    assert hierarchy.subtree('P001', 'X1') == ['X1', 'X2']
+
+
+def test_walk_of_a_subset_promotes_tasks_whose_parent_is_outside_it():
+    project = {'T001': task(), 'T002': task('T001'), 'T003': task('T002'), 'T004': task('T001')}
+    subset = {tid: project[tid] for tid in ('T002', 'T003', 'T004')}
+    walk = HierarchyIndex({'P001': project}).walk('P001', subset, sort_key=lambda tid, t: tid)
+    assert walk.order == [('T002', None, 0), ('T003', 'T002', 1), ('T004', None, 0)]
+
+
+def test_index_follows_transaction_deltas():
+    tasks = {'P001': {'T001': task(), 'T002': task('T001')}}
+    hierarchy = HierarchyIndex(tasks)
+    assert hierarchy.children('P001', 'T001') == ['T002']
+    tasks['P001']['T003'] = task('T002')
+    tasks['P001']['T002']['parent'] = None
+    hierarchy.apply_changes([('P001', 'T003', None, dict(tasks['P001']['T003'])),
+                             ('P001', 'T002', {'parent': 'T001'}, {'parent': None})])
+    assert not hierarchy.has_children('P001', 'T001')
+    assert hierarchy.children('P001', None) == ['T001', 'T002']
+    assert hierarchy.subtree('P001', 'T002') == ['T002', 'T003']
@@ -0,0 +1,110 @@
+import copy
+import os
+import random
+from datetime import datetime, timedelta
+
+from Project_Task import HistoryStore
+
+
+def project(pid):
+    return {'name': pid, 'id': pid, 'type': 'Office', 'start': '2026-01-01', 'end': '2026-12-31'}
+
+
+def task(name, status='Incomplete'):
+    return {'name': name, 'parent': None, 'priority': 'Average (Red)', 'mandatory': False,
+            'start_date': '2026-10-19', 'end_date': '2026-10-19', 'time_in': '09:00',
+            'time_out': '10:00', 'status': status, 'comments': ''}
+
+
+def test_state_at_round_trips_with_two_workspaces_open(tmp_path):
+    directory = os.path.join(tmp_path, 'project_data_history')
+    start = datetime(2026, 10, 1, 9, 0)
+    projects = {'P001': project('P001')}
+    tasks = {'P001': {'T001': task('primary')}}
+
+    history = HistoryStore()
+    history.open(directory)
+    history.flush(projects, tasks, start)
+    before_open = copy.deepcopy((projects, tasks))
+
+    # Opening a second workspace brings its projects in under 'team:'
+    projects['team:P001'] = project('team:P001')
+    tasks['team:P001'] = {'T001': task('team')}
+    history.open(directory, ['project_data', 'team'])
+    history.flush(projects, tasks, start + timedelta(minutes=1))
+
+    moment = start + timedelta(minutes=2)
+    history.record([('team:P001', 'T001', {'status': 'Incomplete'}, {'status': 'Complete'})], moment)
+    tasks['team:P001']['T001']['status'] = 'Complete'
+    history.flush(projects, tasks, moment)
+
+    assert history.state_at(moment) == (projects, tasks)
+    assert history.state_at(start) == before_open
+    reopened = HistoryStore(directory)
+    assert reopened.state_at(moment) == (projects, tasks)
+    assert HistoryStore.diff(before_open, reopened.state_at(moment), 'P001') == []
+
+
+def test_every_recorded_moment_is_reconstructed_across_segments(tmp_path):
+    rng = random.Random(45)
+    directory = os.path.join(tmp_path, 'project_data_history')
+    start = datetime(2026, 10, 1, 9, 0)
+    projects = {'P001': project('P001')}
+    tasks = {'P001': {}}
+    history = HistoryStore(segment_deltas=12)
+    history.open(directory)
+    history.flush(projects, tasks, start)
+    states = {start: copy.deepcopy((projects, tasks))}
+    for step in range(1, 120):
+        moment = start + timedelta(minutes=step)
+        pid = rng.choice(sorted(projects))
+        tid = f"T{rng.randint(1, 6):03d}"
+        if rng.random() < 0.05 and pid != 'P001':
+            delta = (pid, None, projects.pop(pid), None)
+            tasks.pop(pid)
+        elif rng.random() < 0.05:
+            new = f"P{rng.randint(2, 4):03d}"
+            if new in projects:
+                continue
+            projects[new], tasks[new] = project(new), {}
+            delta = (new, None, None, project(new))
+        elif tid not in tasks[pid]:
+            tasks[pid][tid] = task(f"task {step}")
+            delta = (pid, tid, None, task(f"task {step}"))
+        elif rng.random() < 0.2:
+            delta = (pid, tid, tasks[pid].pop(tid), None)
+        else:
+            status = rng.choice(['Complete', 'Incomplete'])
+            delta = (pid, tid, {'status': tasks[pid][tid]['status']}, {'status': status})
+            tasks[pid][tid]['status'] = status
+        history.record([delta], moment)
+        states[moment] = copy.deepcopy((projects, tasks))
+        if rng.random() < 0.3:
+            history.flush(projects, tasks, moment)
+    history.flush(projects, tasks, start + timedelta(minutes=120))
+    assert len(history.segments) > 3
+
+    reopened = HistoryStore(directory)
+    for moment, state in states.items():
+        assert reopened.state_at(moment) == state, moment
+        # Between transactions the state is the one left by the latest
+        assert reopened.state_at(moment + timedelta(seconds=30)) == state, moment
+    assert reopened.state_at(start - timedelta(seconds=1)) is None
+
+
+def test_diff_lists_project_and_field_changes():
+    old = ({'P001': project('P001'), 'P002': project('P002')},
+           {'P001': {'T001': task('a'), 'T002': task('b')}, 'P002': {}})
+    new = copy.deepcopy(old)
+    new[0]['P001']['name'] = 'renamed'
+    del new[0]['P002'], new[1]['P002']
+    new[1]['P001']['T001']['status'] = 'Complete'
+    del new[1]['P001']['T002']
+    new[1]['P001']['T003'] = task('c')
+    assert HistoryStore.diff(old, new) == [
+        ('P001', '', 'project changed', 'name', 'P001', 'renamed'),
+        ('P001', 'T001', 'changed', 'status', 'Incomplete', 'Complete'),
+        ('P001', 'T002', 'removed', 'name', '', 'b'),
+        ('P001', 'T003', 'added', 'name', '', 'c'),
+        ('P002', '', 'project removed', '', '', '')]
+    assert HistoryStore.diff(old, new, 'P002') == [('P002', '', 'project removed', '', '', '')]
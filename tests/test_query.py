@@ -0,0 +1,91 @@
+import random
+from datetime import date
+
+import pytest
+
+from Project_Task import TaskIndex, TaskQuery
+
+TODAY = date(2026, 10, 19)
+PRIORITIES = ('Most Important (Blue)', 'Important (Green)', 'Average (Red)')
+
+
+def make_store(seed=27):
+    rng = random.Random(seed)
+    projects = {'P001': {'name': 'Website', 'id': 'P001', 'type': 'Office'},
+                'P002': {'name': 'Garden', 'id': 'P002', 'type': 'Home'}}
+    tasks = {}
+    for pid in projects:
+        tasks[pid] = {}
+        for i in range(1, 41):
+            start = date(2026, 10, rng.randint(10, 28))
+            end = date(2026, 10, min(start.day + rng.randint(0, 4), 31))
+            tasks[pid][f"T{i:03d}"] = {
+                'name': rng.choice(['Write report', 'Fix bug', 'Plant tree', 'Call client']),
+                'parent': f"T{rng.randint(1, i - 1):03d}" if i > 1 and rng.random() < 0.3 else None,
+                'priority': rng.choice(PRIORITIES), 'mandatory': rng.random() < 0.5,
+                'start_date': start.isoformat(), 'end_date': end.isoformat(),
+                'time_in': '09:00', 'time_out': '10:00',
+                'status': rng.choice(['Complete', 'Incomplete']), 'comments': ''}
+    return projects, tasks
+
+
+def run(text, projects, tasks, scope=None):
+    return TaskQuery(text).run(projects, tasks, TaskIndex(projects, tasks, 0), scope, TODAY)
+
+
+def scan(text, projects, tasks):
+    """The same query without the index narrowing the candidates"""
+    query = TaskQuery(text)
+    index = TaskIndex(projects, tasks, 0)
+    predicates = query.compile(TODAY)
+    return {(pid, tid) for pid in tasks for tid, task in tasks[pid].items()
+            if all(pred(pid, tid, task, projects[pid], index) for pred in predicates)}
+
+
+@pytest.mark.parametrize('text', [
+    'priority:blue status:incomplete',
+    'due<2026-10-20', 'due<=2026-10-20', 'start>=today', 'start>today-3', 'end=2026-10-22',
+    'on:2026-10-21', 'project:P00* -mandatory', 'project:garden leaf', 'overdue',
+    '-status:complete report', '"write report" type:office', 'id:T01? parent:T00*',
+])
+def test_indexed_run_matches_a_full_scan(text):
+    projects, tasks = make_store()
+    assert run(text, projects, tasks) == scan(text, projects, tasks)
+
+
+def test_longer_operators_bind_before_their_prefixes():
+    query = TaskQuery('due<=2026-10-20 start>=today name:a<b')
+    assert query.terms == [('end', '<=', '2026-10-20', False), ('start', '>=', 'today', False),
+                           ('name', ':', 'a<b', False)]
+
+
+def test_terms_are_and_ed_and_negation_applies_to_one_term():
+    projects, tasks = make_store()
+    both = run('priority:red -mandatory', projects, tasks)
+    assert both == run('priority:red', projects, tasks) - run('mandatory', projects, tasks)
+    assert run('-priority:red', projects, tasks) == run('', projects, tasks) - run('priority:red', projects, tasks)
+
+
+def test_scope_limits_results_to_one_project():
+    projects, tasks = make_store()
+    assert {pid for pid, _ in run('status:incomplete', projects, tasks, scope='P002')} == {'P002'}
+
+
+def test_relative_dates_resolve_against_today():
+    assert TaskQuery.parse_date('today', TODAY) == '2026-10-19'
+    assert TaskQuery.parse_date('today+13', TODAY) == '2026-11-01'
+    assert TaskQuery.parse_date('today-19', TODAY) == '2026-09-30'
+
+
+@pytest.mark.parametrize('text, message', [
+    ('priority:purple', 'Unknown priority'),
+    ('due<2026-13-01', 'Invalid date'),
+    ('start>today+x', 'Invalid relative date'),
+    ('on<2026-10-19', "'on' only supports ':'"),
+    ('status<done', "only supports ':'"),
+    ('colour:red', 'Unknown query term'),
+    ('"unclosed', 'Invalid query'),
+])
+def test_malformed_queries_raise_value_error(text, message):
+    with pytest.raises(ValueError, match=message):
+        TaskQuery(text)
@@ -0,0 +1,112 @@
+import calendar
+import random
+from datetime import date, timedelta
+
+from Project_Task import describe_recurrence, occurrence_starts
+
+
+def task(start, end=None, **rule):
+    return {'start_date': start, 'end_date': end or start, 'recurrence': rule}
+
+
+def starts(data, first, last):
+    return [date.fromordinal(o).isoformat()
+            for o in occurrence_starts(data, date.fromisoformat(first).toordinal(), date.fromisoformat(last).toordinal())]
+
+
+def expand(data, horizon):
+    """Reference expansion: walk the series from its first occurrence up to `horizon`"""
+    rule = data['recurrence']
+    start = date.fromisoformat(data['start_date'])
+    until = date.fromisoformat(rule['until']) if rule.get('until') else None
+    interval = rule.get('interval') or 1
+    found = []
+    if rule['freq'] == 'daily':
+        candidates = (start + timedelta(days=n * interval) for n in range(10000))
+    elif rule['freq'] == 'weekly':
+        weekdays = set(rule.get('weekdays') or [start.weekday()])
+        monday = start - timedelta(days=start.weekday())
+        candidates = (day for day in (start + timedelta(days=n) for n in range(10000))
+                      if day.weekday() in weekdays and (day - monday).days // 7 % interval == 0)
+    else:
+        step = interval * (12 if rule['freq'] == 'yearly' else 1)
+
+        def nth(n):
+            year, month = divmod(start.year * 12 + start.month - 1 + n * step, 12)
+            return date(year, month + 1, min(start.day, calendar.monthrange(year, month + 1)[1]))
+        candidates = (nth(n) for n in range(2000))
+    for day in candidates:
+        if day > horizon or (until and day > until) or (rule.get('count') and len(found) == rule['count']):
+            break
+        found.append(day)
+    return found
+
+
+def test_monthly_on_the_31st_falls_on_each_month_end():
+    data = task('2027-01-31', freq='monthly')
+    assert starts(data, '2027-01-01', '2027-06-30') == [
+        '2027-01-31', '2027-02-28', '2027-03-31', '2027-04-30', '2027-05-31', '2027-06-30']
+    assert starts(data, '2028-02-01', '2028-02-29') == ['2028-02-29']
+
+
+def test_yearly_leap_day_uses_feb_28_in_common_years():
+    data = task('2028-02-29', freq='yearly')
+    assert starts(data, '2028-01-01', '2032-12-31') == [
+        '2028-02-29', '2029-02-28', '2030-02-28', '2031-02-28', '2032-02-29']
+
+
+def test_until_and_count_end_the_series():
+    assert starts(task('2026-10-19', freq='daily', interval=3, until='2026-10-28'), '2026-10-01', '2026-12-31') == [
+        '2026-10-19', '2026-10-22', '2026-10-25', '2026-10-28']
+    assert starts(task('2026-10-19', freq='monthly', count=3), '2026-01-01', '2027-12-31') == [
+        '2026-10-19', '2026-11-19', '2026-12-19']
+    # The count is over the whole series, not the part inside the range
+    assert starts(task('2026-10-19', freq='daily', count=5), '2026-10-22', '2026-12-31') == ['2026-10-22', '2026-10-23']
+
+
+def test_weekly_skips_chosen_weekdays_before_the_start_date():
+    # 2026-10-21 is a Wednesday; Monday of that week is not an occurrence
+    data = task('2026-10-21', freq='weekly', interval=2, weekdays=[0, 2, 4], count=4)
+    assert starts(data, '2026-10-01', '2026-12-31') == ['2026-10-21', '2026-10-23', '2026-11-02', '2026-11-04']
+
+
+def test_multi_day_occurrences_overlapping_the_range_are_included():
+    data = task('2026-10-19', '2026-10-21', freq='weekly')
+    assert starts(data, '2026-10-28', '2026-10-28') == ['2026-10-26']
+    assert starts(data, '2026-10-29', '2026-11-01') == []
+
+
+def test_malformed_rules_produce_no_occurrences():
+    assert starts(task('not a date', freq='daily'), '2026-10-01', '2026-10-31') == []
+    assert starts(task('2026-10-19', freq='daily', until='someday'), '2026-10-01', '2026-10-31') == []
+    assert starts(task('2026-10-19', freq='daily'), '2026-10-01', '2026-10-18') == []
+
+
+def test_windows_match_a_full_expansion():
+    rng = random.Random(42)
+    horizon = date(2031, 12, 31)
+    for _ in range(400):
+        start = date(2026, 1, 1) + timedelta(days=rng.randint(0, 800))
+        span = rng.choice([0, 0, 1, 3])
+        rule = {'freq': rng.choice(['daily', 'weekly', 'monthly', 'yearly']), 'interval': rng.randint(1, 3)}
+        if rule['freq'] == 'weekly' and rng.random() < 0.7:
+            rule['weekdays'] = rng.sample(range(7), rng.randint(1, 4))
+        if rng.random() < 0.3:
+            rule['count'] = rng.randint(1, 20)
+        elif rng.random() < 0.3:
+            rule['until'] = (start + timedelta(days=rng.randint(0, 400))).isoformat()
+        if rule['freq'] == 'daily' and not (rule.get('count') or rule.get('until')):
+            rule['count'] = 500
+        data = task(start.isoformat(), (start + timedelta(days=span)).isoformat(), **rule)
+        series = expand(data, horizon)
+        for _ in range(5):
+            first = start + timedelta(days=rng.randint(-30, 900))
+            last = first + timedelta(days=rng.randint(0, 90))
+            expected = [day for day in series if day <= last and day + timedelta(days=span) >= first]
+            assert starts(data, first.isoformat(), last.isoformat()) == [day.isoformat() for day in expected], (rule, first)
+
+
+def test_rules_are_described_in_words():
+    assert describe_recurrence({'freq': 'weekly', 'interval': 2, 'weekdays': [3, 0], 'until': '2026-12-31'}) == \
+        'every 2 weeks on Mon, Thu until 2026-12-31'
+    assert describe_recurrence({'freq': 'monthly', 'count': 6}) == 'every month, 6 times'
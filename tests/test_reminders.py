@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from Project_Task import HierarchyIndex, ReminderQueue, minute_stamp
+
+
+def task(start='2026-10-19', end='2026-10-19', time_in='09:00', time_out='10:00', parent=None, **extra):
+    return {'name': 'task', 'parent': parent, 'priority': 'Average (Red)', 'mandatory': False,
+            'start_date': start, 'end_date': end, 'time_in': time_in, 'time_out': time_out,
+            'status': 'Incomplete', 'comments': '', **extra}
+
+
+def stamp(text):
+    return minute_stamp(datetime.fromisoformat(text))
+
+
+def queue(project, now):
+    tasks = {'P001': project}
+    reminders = ReminderQueue(tasks, HierarchyIndex(tasks))
+    reminders.reset(tasks, stamp(now))
+    return reminders
+
+
+def test_start_reminders_repeat_each_day_then_the_task_goes_overdue():
+    reminders = queue({'T001': task('2026-10-19', '2026-10-20')}, '2026-10-19 08:00')
+    assert reminders.next_due() == stamp('2026-10-19 08:45')
+    assert reminders.pop_due(stamp('2026-10-19 08:44')) == []
+    assert reminders.pop_due(stamp('2026-10-19 08:50')) == [(('P001', 'T001'), 'start', stamp('2026-10-19 09:00'))]
+    assert reminders.next_due() == stamp('2026-10-20 08:45')
+    assert reminders.pop_due(stamp('2026-10-21 00:00')) == [
+        (('P001', 'T001'), 'start', stamp('2026-10-20 09:00')),
+        (('P001', 'T001'), 'overdue', stamp('2026-10-21 00:00'))]
+    assert reminders.overdue == {('P001', 'T001')} and reminders.next_due() is None
+
+
+def test_edits_supersede_queued_events():
+    project = {'T001': task(), 'T002': task(end='2026-10-25', time_in='11:00', time_out='18:00')}
+    reminders = queue(project, '2026-10-19 08:00')
+    project['T001']['status'] = 'Complete'
+    reminders.apply_changes([('P001', 'T001', {'status': 'Incomplete'}, {'status': 'Complete'})], stamp('2026-10-19 08:00'))
+    project['T002']['time_in'] = '10:00'
+    reminders.apply_changes([('P001', 'T002', {'time_in': '11:00'}, {'time_in': '10:00'})], stamp('2026-10-19 08:00'))
+    assert reminders.next_due() == stamp('2026-10-19 09:45')
+    assert reminders.pop_due(stamp('2026-10-19 10:50')) == [(('P001', 'T002'), 'start', stamp('2026-10-19 10:00'))]
+    # Many edits of one task leave one live event per kind and a bounded heap
+    for n in range(3000):
+        project['T002']['time_in'] = f"{11 + n % 5}:00"
+        reminders.patch(('P001', 'T002'), stamp('2026-10-19 08:00'))
+    assert len(reminders.pending) == 2 and len(reminders.heap) <= 2 * len(reminders.pending) + 1025
+
+
+def test_past_tasks_spans_past_midnight_and_parents():
+    project = {'T001': task('2026-10-01', '2026-10-02'), 'T002': task(time_in='22:00', time_out='02:00'),
+               'T003': task(), 'T004': task(parent='T003')}
+    reminders = queue(project, '2026-10-19 08:00')
+    assert reminders.overdue == {('P001', 'T001')}
+    assert set(reminders.pending) == {(('P001', 'T002'), 'overdue'), (('P001', 'T004'), 'start'),
+                                      (('P001', 'T004'), 'overdue')}
+    # Deleting the only subtask makes the parent a leaf with its own reminders
+    removed = project.pop('T004')
+    reminders.hierarchy.apply_changes([('P001', 'T004', removed, None)])
+    reminders.apply_changes([('P001', 'T004', removed, None)], stamp('2026-10-19 08:00'))
+    assert {kind for (key, kind) in reminders.pending if key == ('P001', 'T003')} == {'start', 'overdue'}
+
+
+def test_recurring_tasks_remind_for_open_occurrences_and_never_go_overdue():
+    project = {'T001': task('2026-10-01', '2026-10-01', recurrence={'freq': 'weekly'}, done_dates=['2026-10-22'])}
+    reminders = queue(project, '2026-10-19 08:00')
+    assert reminders.overdue == set()
+    assert reminders.pending == {(('P001', 'T001'), 'start'): stamp('2026-10-29 08:45')}
@@ -0,0 +1,83 @@
+import random
+
+from Project_Task import HierarchyIndex, ProgressRollup, task_minutes
+
+FIELDS = ('parent', 'status', 'mandatory', 'start_date', 'end_date', 'time_in', 'time_out')
+
+
+def task(parent=None, status='Incomplete', mandatory=False, start='2026-10-19', end='2026-10-19',
+         time_in='09:00', time_out='10:00'):
+    return {'name': 'task', 'parent': parent, 'priority': 'Average (Red)', 'mandatory': mandatory,
+            'start_date': start, 'end_date': end, 'time_in': time_in, 'time_out': time_out,
+            'status': status, 'comments': ''}
+
+
+def fresh(tasks, actual):
+    rollup = ProgressRollup(HierarchyIndex(tasks), actual)
+    return {pid: rollup.project(pid) for pid in tasks}
+
+
+def test_task_minutes_counts_every_day_and_ignores_inverted_spans():
+    assert task_minutes(task(time_in='09:30', time_out='11:00')) == 90
+    assert task_minutes(task(start='2026-10-19', end='2026-10-21')) == 180
+    # A span past midnight is not representable as one day's slot and counts nothing
+    assert task_minutes(task(time_in='22:00', time_out='02:00')) == 0
+    assert task_minutes(task(start='2026-10-21', end='2026-10-19')) == 0
+    assert task_minutes(task(time_in='bad')) == 0
+
+
+def test_project_totals_and_subtree_rollups():
+    tasks = {'P001': {'T001': task(), 'T002': task('T001', status='Complete'),
+                      'T003': task('T001', mandatory=True), 'T004': task('T003', start='2026-10-19', end='2026-10-20')}}
+    rollup = ProgressRollup(HierarchyIndex(tasks), {('P001', 'T004'): 25})
+    totals = rollup.totals('P001')
+    assert (totals['total'], totals['completed'], totals['mandatory_remaining']) == (4, 1, 1)
+    assert (totals['minutes'], totals['actual_minutes']) == (300, 25)
+    sub = rollup.subtree_totals('P001', 'T003')
+    assert (sub['total'], sub['minutes'], sub['actual_minutes']) == (2, 180, 25)
+    assert rollup.subtree_totals('P001', 'T001')['percentage'] == 25
+
+
+def test_patched_rollups_match_a_rebuild_after_random_transactions():
+    rng = random.Random(31)
+    tids = [f"T{i:02d}" for i in range(1, 25)]
+    tasks = {'P001': {}}
+    actual = {}
+    hierarchy = HierarchyIndex(tasks)
+    rollup = ProgressRollup(hierarchy, actual)
+    rollup.project('P001')
+    for step in range(400):
+        tid = rng.choice(tids)
+        current = tasks['P001'].get(tid)
+        roll = rng.random()
+        if current is None:
+            after = task(rng.choice(tids + [None] * 5), mandatory=rng.random() < 0.5)
+            tasks['P001'][tid] = after
+            delta = ('P001', tid, None, dict(after))
+        elif roll < 0.15:
+            delta = ('P001', tid, tasks['P001'].pop(tid), None)
+        elif roll < 0.25:
+            minutes = rng.randint(1, 60)
+            actual[('P001', tid)] = actual.get(('P001', tid), 0) + minutes
+            rollup.add_actual('P001', tid, minutes)
+            continue
+        else:
+            # Reparenting may create cycles; they must not double count
+            field, value = rng.choice([('parent', rng.choice(tids + [None])),
+                                       ('status', rng.choice(['Complete', 'Incomplete'])),
+                                       ('mandatory', rng.random() < 0.5),
+                                       ('end_date', rng.choice(['2026-10-19', '2026-10-22']))])
+            if current[field] == value:
+                continue
+            delta = ('P001', tid, {field: current[field]}, {field: value})
+            current[field] = value
+        hierarchy.apply_changes([delta])
+        rollup.apply_changes([delta])
+
+        expected = fresh(tasks, actual)['P001']
+        state = rollup.project('P001')
+        assert state['totals'] == expected['totals'], step
+        # Subtree sums must agree wherever the rebuilt walk reaches the task from a main task
+        reachable = {t for root in hierarchy.children('P001', None) for t in hierarchy.subtree('P001', root)}
+        for t in reachable:
+            assert state['sub'][t] == expected['sub'][t], (step, t)
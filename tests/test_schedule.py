@@ -0,0 +1,71 @@
+import random
+
+from Project_Task import free_slot, greedy_schedule
+
+
+def test_free_slot_fits_between_touching_and_overlapping_bookings():
+    busy = [(540, 600), (600, 660), (650, 700), (760, 800)]
+    assert free_slot(busy, 60, 540, 1020) == 700
+    assert free_slot(busy, 61, 540, 1020) == 800
+    assert free_slot(busy, 30, 480, 1020) == 480
+    # A booking starting before the working day still blocks its start
+    assert free_slot([(400, 560)], 30, 540, 1020) == 560
+    assert free_slot(busy, 30, 980, 1020) == 980
+    assert free_slot(busy, 41, 980, 1020) is None
+
+
+def test_free_slot_matches_a_minute_scan():
+    rng = random.Random(40)
+    for _ in range(500):
+        busy = []
+        for _ in range(rng.randint(0, 6)):
+            start = rng.randint(400, 1100)
+            busy.append((start, start + rng.randint(1, 120)))
+        busy.sort()
+        duration = rng.randint(1, 180)
+        taken = set(m for start, end in busy for m in range(start, end))
+        expected = next((t for t in range(540, 1020 - duration + 1)
+                         if not taken.intersection(range(t, t + duration))), None)
+        assert free_slot(busy, duration, 540, 1020) == expected
+
+
+def test_more_important_tasks_are_placed_first():
+    requests = [('low', 2, 10, 10, 240), ('high', 0, 10, 10, 240), ('mid', 1, 10, 11, 240)]
+    placed = greedy_schedule(requests, lambda ordinal: ([], 0), 540, 1020, 480)
+    assert placed == {'high': (10, 540, 780), 'mid': (10, 780, 1020), 'low': None}
+
+
+def test_existing_load_and_the_daily_limit_push_tasks_to_later_days():
+    load = {10: ([(540, 600)], 400), 11: ([(600, 900)], 300)}
+    requests = [('a', 0, 10, 12, 90), ('b', 0, 10, 12, 120)]
+    placed = greedy_schedule(requests, lambda ordinal: load.get(ordinal, ([], 0)), 540, 1020, 480)
+    # 400 + 90 is over the limit on day 10; 'a' does not fit before day 11's meeting, so it follows it
+    assert placed == {'a': (11, 900, 990), 'b': (12, 540, 660)}
+
+
+def test_placements_never_overlap_bookings_or_exceed_the_limit():
+    rng = random.Random(400)
+    for _ in range(100):
+        load = {}
+        for ordinal in range(5):
+            busy = []
+            for _ in range(rng.randint(0, 3)):
+                start = rng.randint(480, 1000)
+                busy.append((start, start + rng.randint(15, 90)))
+            load[ordinal] = (busy, sum(end - start for start, end in busy))
+        requests = []
+        for n in range(rng.randint(1, 12)):
+            first = rng.randint(0, 4)
+            requests.append((n, rng.randint(0, 2), first, rng.randint(first, 4), rng.randint(15, 180)))
+        placed = greedy_schedule(requests, load.__getitem__, 540, 1020, 420)
+        for ordinal, (busy, committed) in load.items():
+            mine = [(start, end) for slot in placed.values() if slot and slot[0] == ordinal
+                    for start, end in [slot[1:]]]
+            assert committed + sum(end - start for start, end in mine) <= 420 or not mine
+            for i, (start, end) in enumerate(mine):
+                assert 540 <= start and end <= 1020
+                for other_start, other_end in busy + mine[i + 1:]:
+                    assert end <= other_start or other_end <= start
+        for key, rank, first, last, duration in requests:
+            if placed[key]:
+                assert first <= placed[key][0] <= last and placed[key][2] - placed[key][1] == duration
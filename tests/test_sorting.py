@@ -0,0 +1,108 @@
+import random
+
+from Project_Task import TreeSorter, natural_key, task_sort_fields
+
+
+class FakeTree:
+    """Parent/children bookkeeping of a Treeview, counting the calls that move items"""
+
+    def __init__(self, children):
+        self.children = {parent: list(items) for parent, items in children.items()}
+        self.headings = {}
+        self.calls = []
+
+    def heading(self, column, text=None, command=None):
+        entry = self.headings.setdefault(column, {'text': column})
+        if text is not None:
+            entry['text'] = text
+        return entry
+
+    def exists(self, item):
+        return any(item in items for items in self.children.values())
+
+    def get_children(self, parent=''):
+        return tuple(self.children.get(parent, ()))
+
+    def set_children(self, parent, *items):
+        self.calls.append('set_children')
+        self.children[parent] = list(items)
+
+    def detach(self, *items):
+        self.calls.append('detach')
+        for siblings in self.children.values():
+            siblings[:] = [item for item in siblings if item not in items]
+
+    def move(self, item, parent, index):
+        self.calls.append('move')
+        self.children[parent].insert(index, item)
+
+
+def task(name, priority='Average (Red)', end='2026-10-19', time_in='09:00'):
+    return {'name': name, 'parent': None, 'priority': priority, 'mandatory': False,
+            'start_date': '2026-10-19', 'end_date': end, 'time_in': time_in, 'time_out': '18:00',
+            'status': 'Incomplete', 'comments': ''}
+
+
+def test_natural_key_orders_embedded_numbers():
+    assert sorted(['T10', 'T9', 't2', 'T100', 'Task 2b', 'Task 10a'], key=natural_key) == \
+        ['t2', 'T9', 'T10', 'T100', 'Task 2b', 'Task 10a']
+
+
+def test_reorder_moves_only_items_off_the_longest_sorted_run():
+    rng = random.Random(46)
+    for _ in range(200):
+        current = [f"I{n}" for n in range(rng.randint(2, 60))]
+        ordered = list(current)
+        for _ in range(rng.randint(1, 6)):
+            i, j = rng.randrange(len(ordered)), rng.randrange(len(ordered))
+            ordered.insert(j, ordered.pop(i))
+        tree = FakeTree({'': current})
+        TreeSorter(tree, {}, None).reorder('', tuple(current), ordered)
+        assert tree.children[''] == ordered
+        # Longest run of items already in the target order, by brute force over the target positions
+        rank = [ordered.index(item) for item in current]
+        best = [1] * len(rank)
+        for i in range(len(rank)):
+            for j in range(i):
+                if rank[j] < rank[i]:
+                    best[i] = max(best[i], best[j] + 1)
+        if tree.calls != ['set_children']:
+            assert tree.calls.count('move') == len(current) - max(best)
+
+
+def test_heavily_shuffled_siblings_are_reordered_in_one_call():
+    current = [f"I{n}" for n in range(200)]
+    ordered = current[::-1]
+    tree = FakeTree({'': current})
+    TreeSorter(tree, {}, None).reorder('', tuple(current), ordered)
+    assert tree.calls == ['set_children'] and tree.children[''] == ordered
+
+
+def test_headings_sort_siblings_with_earlier_keys_breaking_ties():
+    tasks = {'T1': task('b', 'Important (Green)', '2026-10-20'), 'T2': task('a', 'Most Important (Blue)', '2026-10-21'),
+             'T3': task('c', 'Important (Green)', '2026-10-19'), 'T4': task('d', end='2026-10-19'),
+             'T10': task('e', end='2026-10-19'), 'T11': task('f', 'Most Important (Blue)', '2026-10-19')}
+    items = {tid: f"item-{tid}" for tid in tasks}
+    tree = FakeTree({'': [items['T1'], items['T2'], items['T3']], items['T3']: [items['T4'], items['T10'], items['T11']]})
+    sorter = TreeSorter(tree, {'Task': 'tid', 'End Date': 'end', 'Priority': 'priority'},
+                        lambda key: task_sort_fields(*key, tasks[key[1]]))
+    sorter.track({item: ('P001', tid) for tid, item in items.items()}, [items['T3']])
+
+    def shown(parent=''):
+        return [item.split('-')[1] for item in tree.get_children(parent)]
+
+    sorter.sort_by('Task')
+    sorter.sort_by('Task')
+    assert shown() == ['T3', 'T2', 'T1'] and shown(items['T3']) == ['T11', 'T10', 'T4']
+    assert tree.heading('Task')['text'] == 'Task ▼'
+    sorter.sort_by('End Date')
+    assert shown() == ['T3', 'T1', 'T2'] and shown(items['T3']) == ['T11', 'T10', 'T4']
+    sorter.sort_by('Priority')
+    assert shown() == ['T2', 'T3', 'T1'] and shown(items['T3']) == ['T11', 'T10', 'T4']
+    assert tree.heading('Task')['text'] == 'Task' and tree.heading('Priority')['text'] == 'Priority ▲'
+
+    # A fresh track sorts again by every key in use rather than trusting the current order
+    tree.children[''] = [items['T1'], items['T3'], items['T2']]
+    sorter.track({item: ('P001', tid) for tid, item in items.items()}, [items['T3']])
+    sorter.apply()
+    assert shown() == ['T2', 'T3', 'T1']
@@ -0,0 +1,49 @@
+import random
+from datetime import date
+
+from Project_Task import HierarchyIndex, TodayView
+
+PRIORITIES = ('Most Important (Blue)', 'Important (Green)', 'Average (Red)')
+TODAY = date(2026, 10, 19)
+
+
+def task(priority, day='2026-10-19', parent=None):
+    return {'name': 'task', 'parent': parent, 'priority': priority, 'mandatory': False,
+            'start_date': day, 'end_date': day, 'time_in': '09:00', 'time_out': '10:00',
+            'status': 'Incomplete', 'comments': '', 'has_subtasks': False}
+
+
+def rebuilt_order(projects, tasks):
+    view = TodayView(projects, tasks, HierarchyIndex(tasks))
+    view.rebuild(TODAY, 0)
+    return list(view.order)
+
+
+def test_patched_order_matches_rebuilt_order():
+    rng = random.Random(32)
+    projects = {pid: {'name': pid, 'id': pid} for pid in ('P001', 'P002', 'P010')}
+    tasks = {pid: {f"T{i:03d}": task(rng.choice(PRIORITIES)) for i in range(1, 30)} for pid in projects}
+    hierarchy = HierarchyIndex(tasks)
+    view = TodayView(projects, tasks, hierarchy)
+    view.rebuild(TODAY, 0)
+
+    for version in range(1, 200):
+        pid = rng.choice(list(projects))
+        tid = f"T{rng.randint(1, 40):03d}"
+        current = tasks[pid].get(tid)
+        if current is None:
+            after = task(rng.choice(PRIORITIES))
+            tasks[pid][tid] = after
+            delta = (pid, tid, None, dict(after))
+        elif rng.random() < 0.2:
+            delta = (pid, tid, tasks[pid].pop(tid), None)
+        else:
+            field, value = rng.choice([('priority', rng.choice(PRIORITIES)),
+                                       ('start_date', rng.choice(['2026-10-18', '2026-10-19'])),
+                                       ('name', f"renamed {version}")])
+            delta = (pid, tid, {field: current[field]}, {field: value})
+            current[field] = value
+        hierarchy.apply_changes([delta])
+        view.apply_changes([delta], version)
+
+        assert view.order == rebuilt_order(projects, tasks)
@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from Project_Task import TimeLog, read_workspace
+
+
+def write(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    return path
+
+
+@pytest.mark.parametrize('data', [
+    [1, 2],
+    {'projects': [], 'tasks': {}},
+    {'projects': {'P001': {'id': 'P001'}}, 'tasks': {'P001': {'T001': 'not a task'}}},
+    {'projects': {}, 'tasks': {}, 'settings': 'dark'},
+])
+def test_read_workspace_rejects_files_not_shaped_like_a_workspace(tmp_path, data):
+    path = write(os.path.join(tmp_path, 'team.json'), data)
+    with pytest.raises(ValueError):
+        read_workspace(path, 'team', 'project_data')
+
+
+def test_read_workspace_namespaces_secondary_projects(tmp_path):
+    path = write(os.path.join(tmp_path, 'team.json'), {
+        'projects': {'P001': {'id': 'P001'}},
+        'tasks': {'P001': {'T001': {'name': 'a', 'depends_on': [['project_data:P002', 'T004']]}}},
+    })
+    projects, tasks, settings = read_workspace(path, 'team', 'project_data')
+    assert projects == {'team:P001': {'id': 'team:P001'}}
+    assert tasks['team:P001']['T001']['depends_on'] == [['P002', 'T004']]
+    assert settings == {}
+
+
+def test_time_log_follows_the_workspace_file_not_its_name(tmp_path):
+    log_path = os.path.join(tmp_path, 'project_data_time.log')
+    first, second = os.path.join(tmp_path, 'a', 'team.json'), os.path.join(tmp_path, 'b', 'team.json')
+    log = TimeLog()
+    log.open(log_path, {'team': first, 'team2': second})
+    log.start(('team:P001', 'T001'), 100)
+    log.stop(('team:P001', 'T001'), 160)
+    log.start(('P001', 'T001'), 200)
+
+    # Opened the other way round, the first file is now shown as 'team2'
+    log.open(log_path, {'team': second, 'team2': first})
+    assert log.minutes == {('team2:P001', 'T001'): 60}
+    assert log.running == {('P001', 'T001'): 200}